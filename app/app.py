@@ -1,66 +1,265 @@
-from flask import Flask, render_template, request, send_file
+from flask import Flask, render_template, request, jsonify
 import numpy as np
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from scipy import sparse
+from scipy.sparse.linalg import splu
+import csv
+import hashlib
 import io
+import os
+import re
+import threading
+from cache_lru import CacheLRU
+from reportes import AlmacenResultados, FORMATOS_DESCARGA, descarga
+from trabajos import ColaTrabajos, reportar_progreso, respuesta_estado, respuesta_resultado
 
 app = Flask(__name__)
 
-def simplex(c, A, b, tipo):
-    """ Resuelve el problema de programación lineal usando el método Simplex """
-    num_vars = len(c)
-    num_restricciones = len(A)
-
-    if tipo == "max":
-        c = [-x for x in c]  # Convertimos a problema de minimización
-
-    # Crear la tabla del método Simplex
-    tabla = np.zeros((num_restricciones + 1, num_vars + num_restricciones + 1))
-    
-    # Llenar la tabla con restricciones
-    for i in range(num_restricciones):
-        tabla[i, :num_vars] = A[i]
-        tabla[i, num_vars + i] = 1  # Variables de holgura
-        tabla[i, -1] = b[i]
-
-    # Agregar la función objetivo
-    tabla[-1, :num_vars] = c
-    pasos = []
-
+TOLERANCIA = 1e-9  # Tolerancia numérica para costos reducidos y razones
+REFACTORIZAR_CADA = 50  # Pivotes entre refactorizaciones LU de la base
+TAMANO_CACHE_RESULTADOS = int(os.environ.get("TAMANO_CACHE_RESULTADOS", "256"))  # 0 desactiva la caché
+BYTES_TRAZA_CACHE = 8 * 1024 * 1024  # Las trazas más grandes que esto no se guardan en la caché
+LIMITE_ITERACIONES = "Se alcanzó el límite de iteraciones"
+TAMANO_PAGINA_PASOS = 20  # Máximo de pasos por consulta a /pasos
+
+def pivotear(tabla, col_pivote, base=None, num_objetivos=1):
+    """ Pivote vectorizado sobre la tabla (en sitio). Devuelve la fila pivote o None si no está acotada.
+    Si se da la base, los empates de la razón mínima se rompen por el menor índice básico (Bland).
+    Las últimas num_objetivos filas son filas de Z y no entran en la prueba de la razón """
+    columna = tabla[:-num_objetivos, col_pivote]
+
+    # Prueba de la razón mínima con máscara sobre los coeficientes positivos
+    positivos = columna > TOLERANCIA
+    if not positivos.any():
+        return None
+    ratios = np.full(len(columna), np.inf)
+    np.divide(tabla[:-num_objetivos, -1], columna, out=ratios, where=positivos)
+    fila_pivote = np.argmin(ratios)
+    if base is not None:
+        empates = np.flatnonzero(ratios <= ratios[fila_pivote] + TOLERANCIA)
+        fila_pivote = empates[np.argmin(np.asarray(base)[empates])]
+
+    eliminar(tabla, fila_pivote, col_pivote)
+    return fila_pivote
+
+def eliminar(tabla, fila_pivote, col_pivote):
+    """ Pivotea la tabla (en sitio) sobre el elemento (fila_pivote, col_pivote) """
+    # Normalizar la fila pivote
+    tabla[fila_pivote, :] /= tabla[fila_pivote, col_pivote]
+
+    # Hacer ceros en la columna pivote: una actualización de rango 1 (producto exterior) en sitio,
+    # limitada a las filas con coeficiente distinto de cero en la columna pivote
+    factores = tabla[:, col_pivote].copy()
+    factores[fila_pivote] = 0
+    filas = np.flatnonzero(factores)
+    tabla[filas] -= np.outer(factores[filas], tabla[fila_pivote, :])
+
+class Traza:
+    """ Historial de pasos con memoria acotada.
+    off: solo la tabla final; summary: [[entrante, saliente, objetivo]] por pivote;
+    full: todas las tablas en un arreglo float64 contiguo (k, filas, columnas) """
+
+    MODOS = ("off", "summary", "full")
+
+    def __init__(self, modo="full"):
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo de traza no válido: {modo}")
+        self.modo = modo
+        self._buffer = None
+        self._num_pasos = 0
+
+    def _agregar(self, tabla):
+        # Arreglo que duplica su capacidad al llenarse (costo amortizado constante)
+        if self._buffer is None:
+            self._buffer = np.empty((4,) + np.shape(tabla))
+        elif self._num_pasos == len(self._buffer):
+            self._buffer = np.concatenate([self._buffer, np.empty_like(self._buffer)])
+        self._buffer[self._num_pasos] = tabla
+        self._num_pasos += 1
+
+    def tabla(self, tabla):
+        """ Registra la tabla al inicio de cada iteración """
+        if self.modo == "full":
+            self._agregar(tabla)
+
+    def pivote(self, entrante, saliente, objetivo):
+        """ Registra las variables (1-indexadas) que entran y salen de la base y el objetivo """
+        if self.modo == "summary":
+            self._agregar([[entrante + 1, saliente + 1, objetivo]])
+
+    def final(self, tabla):
+        """ Registra la tabla final """
+        if self.modo != "summary":
+            self._agregar(tabla)
+
+    @property
+    def pasos(self):
+        """ Los pasos registrados. Se leen al terminar la resolución: el buffer se recorta entonces a su
+        tamaño justo, para que el resultado guardado no retenga la capacidad sobrante """
+        if self._buffer is None:
+            return np.empty((0, 0, 0))
+        if len(self._buffer) > self._num_pasos:
+            self._buffer = self._buffer[:self._num_pasos].copy()
+        return self._buffer
+
+class Pricing:
+    """ Regla de selección de la variable entrante, con límite de iteraciones y paso a la regla de
+    Bland cuando se encadenan pivotes degenerados (anti-ciclado).
+    dantzig: costo reducido más negativo; steepest: mayor descenso por norma de la columna;
+    devex: pesos de referencia aproximados; parcial: busca por segmentos de columnas; bland: menor índice """
+
+    REGLAS = ("dantzig", "steepest", "devex", "parcial", "bland")
+    SEGMENTOS = 8  # Número de segmentos del pricing parcial
+    LIMITE_DEGENERADOS = 10  # Pivotes degenerados seguidos antes de usar Bland
+
+    def __init__(self, regla="dantzig", max_iteraciones=None):
+        if regla not in self.REGLAS:
+            raise ValueError(f"Regla de pricing no válida: {regla}")
+        self.regla = regla
+        self.max_iteraciones = max_iteraciones
+        self.iteraciones = 0
+        self.pivotes_bland = 0
+        self.degenerados = 0
+        self._pesos = None
+        self._inicio_segmento = 0
+
+    @property
+    def usa_bland(self):
+        return self.regla == "bland" or self.degenerados >= self.LIMITE_DEGENERADOS
+
+    @property
+    def necesita_fila_pivote(self):
+        return self.regla in ("steepest", "devex")
+
+    def agotado(self):
+        return self.max_iteraciones is not None and self.iteraciones >= self.max_iteraciones
+
+    def elegir(self, reducidos, tabla=None):
+        """ Devuelve la columna entrante o None si ningún costo reducido es negativo.
+        steepest necesita la tabla; sin ella (Simplex Revisado) se usa devex """
+        candidatas = reducidos < -TOLERANCIA
+        if not candidatas.any():
+            return None
+        if self.usa_bland:
+            return np.flatnonzero(candidatas)[0]
+
+        if self.regla == "steepest" and tabla is not None:
+            normas = np.sqrt(1 + np.einsum('ij,ij->j', tabla[:-1, :-1], tabla[:-1, :-1]))
+            return np.argmin(np.where(candidatas, reducidos / normas, np.inf))
+        if self.regla in ("steepest", "devex"):
+            if self._pesos is None or len(self._pesos) != len(reducidos):
+                self._pesos = np.ones(len(reducidos))
+            return np.argmax(np.where(candidatas, reducidos ** 2 / self._pesos, -np.inf))
+        if self.regla == "parcial":
+            tamano = -(-len(reducidos) // self.SEGMENTOS)
+            for k in range(self.SEGMENTOS):
+                inicio = (self._inicio_segmento + k * tamano) % len(reducidos)
+                segmento = reducidos[inicio:inicio + tamano]
+                if np.any(segmento < -TOLERANCIA):
+                    self._inicio_segmento = inicio + tamano
+                    return inicio + np.argmin(segmento)
+        return np.argmin(reducidos)
+
+    def registrar(self, theta, fila_normalizada=None, entrante=None, saliente=None):
+        """ Cuenta el pivote, sigue la degeneración y actualiza los pesos devex con la fila pivote
+        ya dividida por el elemento pivote """
+        self.iteraciones += 1
+        if self.usa_bland:
+            self.pivotes_bland += 1
+        self.degenerados = self.degenerados + 1 if theta <= TOLERANCIA else 0
+
+        if self._pesos is not None and fila_normalizada is not None:
+            peso_entrante = self._pesos[entrante]
+            np.maximum(self._pesos, fila_normalizada ** 2 * peso_entrante, out=self._pesos)
+            self._pesos[saliente] = max(peso_entrante * fila_normalizada[saliente] ** 2, 1)
+            self._pesos[entrante] = 1
+
+    def resumen(self):
+        return {"regla": self.regla, "iteraciones": self.iteraciones, "pivotes_bland": self.pivotes_bland}
+
+def costos_reducidos(tabla, num_objetivos=1):
+    """ Costos reducidos para el pricing. Con dos filas de Z [real; parte M] la comparación es
+    lexicográfica: primero se mejora la parte M y luego la real sin empeorar la parte M """
+    if num_objetivos == 1:
+        return tabla[-1, :-1]
+    parte_m = tabla[-1, :-1]
+    if np.any(parte_m < -TOLERANCIA):
+        return parte_m
+    return np.where(parte_m > TOLERANCIA, 0, tabla[-2, :-1])
+
+def iterar_tabla(tabla, traza, base, signo=1, pricing=None, num_objetivos=1):
+    """ Pivotea la tabla hasta la optimalidad actualizando la base (variable básica por fila).
+    Devuelve None al llegar al óptimo o el mensaje de error (no acotada o límite de iteraciones) """
+    pricing = pricing or Pricing()
+    fila_z = len(tabla) - num_objetivos
     while True:
-        pasos.append(tabla.copy().tolist())  # Guardamos copia de la tabla
+        traza.tabla(tabla)
 
-        # Buscar la columna pivote (menor coeficiente en la fila de Z)
-        col_pivote = np.argmin(tabla[-1, :-1])
-        if tabla[-1, col_pivote] >= 0:
+        # Buscar la columna pivote según la regla de pricing
+        col_pivote = pricing.elegir(costos_reducidos(tabla, num_objetivos), tabla[:fila_z + 1])
+        if col_pivote is None:
             break  # No hay más mejoras
-
-        # Buscar la fila pivote (mínima razón positiva)
-        ratios = []
-        for i in range(num_restricciones):
-            if tabla[i, col_pivote] > 0:
-                ratios.append(tabla[i, -1] / tabla[i, col_pivote])
-            else:
-                ratios.append(np.inf)
-
-        fila_pivote = np.argmin(ratios)
-        if ratios[fila_pivote] == np.inf:
-            return "Solución no acotada", None, None, None
-
-        # Normalizar la fila pivote
-        tabla[fila_pivote, :] /= tabla[fila_pivote, col_pivote]
-
-        # Hacer ceros en la columna pivote
-        for i in range(num_restricciones + 1):
-            if i != fila_pivote:
-                tabla[i, :] -= tabla[i, col_pivote] * tabla[fila_pivote, :]
-
-    pasos.append(tabla.copy().tolist())  # Guardamos la última tabla
-
-    # Extraer la solución
+        if pricing.agotado():
+            return LIMITE_ITERACIONES
+
+        fila_pivote = pivotear(tabla, col_pivote, base if pricing.usa_bland else None, num_objetivos)
+        if fila_pivote is None:
+            return "Solución no acotada"
+
+        saliente = base[fila_pivote]
+        pricing.registrar(tabla[fila_pivote, -1], tabla[fila_pivote, :-1], col_pivote, saliente)
+        traza.pivote(col_pivote, saliente, signo * tabla[fila_z, -1])
+        reportar_progreso(pivotes=pricing.iteraciones, objetivo=float(signo * tabla[fila_z, -1]))
+        base[fila_pivote] = col_pivote
+
+    traza.final(tabla)
+    return None
+
+def iterar_dual(tabla, traza, base, signo=1, pricing=None):
+    """ Simplex Dual: parte de una tabla con costos reducidos no negativos y b posiblemente negativo.
+    Devuelve None al llegar a una base factible o el mensaje de error """
+    pricing = pricing or Pricing()
+    while True:
+        traza.tabla(tabla)
+
+        # Fila pivote: variable básica más negativa
+        fila_pivote = np.argmin(tabla[:-1, -1])
+        if tabla[fila_pivote, -1] >= -TOLERANCIA:
+            break  # La base ya es factible
+        if pricing.agotado():
+            return LIMITE_ITERACIONES
+
+        # Columna pivote: mínima razón |d_j / a_rj| entre los coeficientes negativos de la fila
+        fila = tabla[fila_pivote, :-1]
+        negativos = fila < -TOLERANCIA
+        if not negativos.any():
+            return "No existe solución factible"
+        ratios = np.full(len(fila), np.inf)
+        np.divide(tabla[-1, :-1], -fila, out=ratios, where=negativos)
+        col_pivote = np.argmin(ratios)
+
+        eliminar(tabla, fila_pivote, col_pivote)
+        pricing.registrar(ratios[col_pivote])
+        traza.pivote(col_pivote, base[fila_pivote], signo * tabla[-1, -1])
+        reportar_progreso(pivotes=pricing.iteraciones, objetivo=float(signo * tabla[-1, -1]))
+        base[fila_pivote] = col_pivote
+
+    traza.final(tabla)
+    return None
+
+def extraer_solucion(tabla, num_vars, num_restricciones, base=None):
+    """ Lee los valores de las variables y holguras básicas de la tabla final.
+    Si se conoce la base (variable básica por fila) se usa directamente """
     solucion = [0] * num_vars
     holguras = [0] * num_restricciones
 
+    if base is not None:
+        for fila, j in enumerate(base):
+            if j < num_vars:
+                solucion[j] = tabla[fila, -1]
+            elif j < num_vars + num_restricciones:
+                holguras[j - num_vars] = tabla[fila, -1]
+        return solucion, holguras
+
     for i in range(num_vars):
         col = tabla[:-1, i]
         if sum(col == 1) == 1 and sum(col == 0) == num_restricciones - 1:
@@ -73,19 +272,25 @@ def simplex(c, A, b, tipo):
             fila = np.where(col == 1)[0][0]
             holguras[i] = tabla[fila, -1]
 
-    valor_optimo = round(tabla[-1, -1] if tipo == "max" else -tabla[-1, -1], 2)
-    
-    return valor_optimo, solucion, holguras, pasos
+    return solucion, holguras
+
+def expresar_objetivo(tabla, costos, base):
+    """ Escribe en la fila de Z los costos dados, con costo reducido cero en las columnas básicas """
+    tabla[-1, :] = 0
+    tabla[-1, :len(costos)] = costos
+    for i, j in enumerate(base):
+        if tabla[-1, j] != 0:
+            tabla[-1, :] -= tabla[-1, j] * tabla[i, :]
 
-def gran_m(c, A, b, tipo):
-    """ Resuelve el problema de programación lineal usando el método de la Gran M """
+def simplex(c, A, b, tipo, traza="full", pricing=None):
+    """ Resuelve el problema de programación lineal usando el método Simplex """
     num_vars = len(c)
     num_restricciones = len(A)
 
     if tipo == "max":
         c = [-x for x in c]  # Convertimos a problema de minimización
 
-    # Crear la tabla del método Simplex con variables artificiales
+    # Crear la tabla del método Simplex
     tabla = np.zeros((num_restricciones + 1, num_vars + num_restricciones + 1))
     
     # Llenar la tabla con restricciones
@@ -94,143 +299,912 @@ def gran_m(c, A, b, tipo):
         tabla[i, num_vars + i] = 1  # Variables de holgura
         tabla[i, -1] = b[i]
 
-    # Agregar la función objetivo con penalización M
-    M = 1000000  # Valor grande para M
+    # Agregar la función objetivo
     tabla[-1, :num_vars] = c
-    for i in range(num_restricciones):
-        if b[i] < 0:
-            tabla[-1, num_vars + i] = M
+    traza = Traza(traza)
+    base = list(range(num_vars, num_vars + num_restricciones))
 
-    pasos = []
+    error = iterar_tabla(tabla, traza, base, 1 if tipo == "max" else -1, pricing)
+    if error:
+        return error, None, None, traza.pasos
 
-    while True:
-        pasos.append(tabla.copy().tolist())  # Guardamos copia de la tabla
+    # Extraer la solución
+    solucion, holguras = extraer_solucion(tabla, num_vars, num_restricciones, base)
 
-        # Buscar la columna pivote (menor coeficiente en la fila de Z)
-        col_pivote = np.argmin(tabla[-1, :-1])
-        if tabla[-1, col_pivote] >= 0:
-            break  # No hay más mejoras
+    valor_optimo = round(tabla[-1, -1] if tipo == "max" else -tabla[-1, -1], 2)
+    
+    return valor_optimo, solucion, holguras, traza.pasos
 
-        # Buscar la fila pivote (mínima razón positiva)
-        ratios = []
-        for i in range(num_restricciones):
-            if tabla[i, col_pivote] > 0:
-                ratios.append(tabla[i, -1] / tabla[i, col_pivote])
-            else:
-                ratios.append(np.inf)
+def gran_m(c, A, b, tipo, traza="full", pricing=None):
+    """ Resuelve el problema de programación lineal usando el método de la Gran M.
+    M no toma un valor numérico: la tabla lleva dos filas de Z, la parte real y la parte que
+    multiplica a M, y los costos reducidos se comparan lexicográficamente (primero la parte M) """
+    num_vars = len(c)
+    num_restricciones = len(A)
 
-        fila_pivote = np.argmin(ratios)
-        if ratios[fila_pivote] == np.inf:
-            return "Solución no acotada", None, None, None
+    if tipo == "max":
+        c = [-x for x in c]  # Convertimos a problema de minimización
 
-        # Normalizar la fila pivote
-        tabla[fila_pivote, :] /= tabla[fila_pivote, col_pivote]
+    # Crear la tabla con una variable artificial por cada fila con b negativo
+    filas_artificiales = [i for i in range(num_restricciones) if b[i] < 0]
+    inicio_artificiales = num_vars + num_restricciones
+    tabla = np.zeros((num_restricciones + 2, inicio_artificiales + len(filas_artificiales) + 1))
+    base = list(range(num_vars, inicio_artificiales))
 
-        # Hacer ceros en la columna pivote
-        for i in range(num_restricciones + 1):
-            if i != fila_pivote:
-                tabla[i, :] -= tabla[i, col_pivote] * tabla[fila_pivote, :]
+    # Llenar la tabla con restricciones
+    for i in range(num_restricciones):
+        tabla[i, :num_vars] = A[i]
+        tabla[i, num_vars + i] = 1  # Variables de holgura
+        tabla[i, -1] = b[i]
 
-    pasos.append(tabla.copy().tolist())  # Guardamos la última tabla
+    # Fila real con los costos originales y fila M con costo 1 (por M) en cada artificial,
+    # expresada en la base inicial
+    tabla[-2, :num_vars] = c
+    tabla[-1, inicio_artificiales:-1] = 1
+    for k, i in enumerate(filas_artificiales):
+        tabla[i, :] *= -1
+        tabla[i, inicio_artificiales + k] = 1
+        base[i] = inicio_artificiales + k
+        tabla[-1, :] -= tabla[i, :]
 
-    # Extraer la solución
-    solucion = [0] * num_vars
-    holguras = [0] * num_restricciones
+    traza = Traza(traza)
 
-    for i in range(num_vars):
-        col = tabla[:-1, i]
-        if sum(col == 1) == 1 and sum(col == 0) == num_restricciones - 1:
-            fila = np.where(col == 1)[0][0]
-            solucion[i] = tabla[fila, -1]
+    error = iterar_tabla(tabla, traza, base, 1 if tipo == "max" else -1, pricing, num_objetivos=2)
 
-    for i in range(num_restricciones):
-        col = tabla[:-1, num_vars + i]
-        if sum(col == 1) == 1 and sum(col == 0) == num_restricciones - 1:
-            fila = np.where(col == 1)[0][0]
-            holguras[i] = tabla[fila, -1]
+    # Si alguna artificial quedó positiva la parte M no es cero: el problema es infactible
+    # (aunque la parte real parezca no acotada)
+    if error != LIMITE_ITERACIONES and -tabla[-1, -1] > TOLERANCIA:
+        return "No existe solución factible", None, None, traza.pasos
+    if error:
+        return error, None, None, traza.pasos
 
-    valor_optimo = round(tabla[-1, -1] if tipo == "max" else -tabla[-1, -1], 2)
+    # Extraer la solución
+    solucion, holguras = extraer_solucion(tabla, num_vars, num_restricciones, base)
+
+    valor_optimo = round(tabla[-2, -1] if tipo == "max" else -tabla[-2, -1], 2)
     
-    return valor_optimo, solucion, holguras, pasos
+    return valor_optimo, solucion, holguras, traza.pasos
 
-def dos_fases(c, A, b, tipo):
-    """ Resuelve el problema de programación lineal usando el método de Dos Fases """
+def dos_fases(c, A, b, tipo, traza="full", pricing=None):
+    """ Resuelve el problema de programación lineal usando el método de Dos Fases.
+    La fase 2 continúa desde la base factible que encontró la fase 1 """
     num_vars = len(c)
     num_restricciones = len(A)
 
     if tipo == "max":
         c = [-x for x in c]  # Convertimos a problema de minimización
 
-    # Fase 1: Minimizar la suma de variables artificiales
-    c_fase1 = [0] * num_vars + [1] * num_restricciones
-    A_fase1 = [fila + [1 if i == j else 0 for j in range(num_restricciones)] for i, fila in enumerate(A)]
-    b_fase1 = b
-
-    valor_optimo_fase1, solucion_fase1, holguras_fase1, pasos_fase1 = simplex(c_fase1, A_fase1, b_fase1, "min")
+    # Fase 1: las filas con b negativo se multiplican por -1 y reciben una variable artificial
+    filas_artificiales = [i for i in range(num_restricciones) if b[i] < 0]
+    inicio_artificiales = num_vars + num_restricciones
+    tabla = np.zeros((num_restricciones + 1, inicio_artificiales + len(filas_artificiales) + 1))
+    base = list(range(num_vars, inicio_artificiales))
 
-    if valor_optimo_fase1 != 0:
-        return "No existe solución factible", None, None, None
-
-    # Fase 2: Resolver el problema original sin variables artificiales
-    tabla_fase2 = np.zeros((num_restricciones + 1, num_vars + num_restricciones + 1))
-    
     for i in range(num_restricciones):
-        tabla_fase2[i, :num_vars] = A[i]
-        tabla_fase2[i, num_vars + i] = 1  # Variables de holgura
-        tabla_fase2[i, -1] = b[i]
+        tabla[i, :num_vars] = A[i]
+        tabla[i, num_vars + i] = 1  # Variables de holgura
+        tabla[i, -1] = b[i]
 
-    tabla_fase2[-1, :num_vars] = c
-    pasos_fase2 = []
+    # Minimizar la suma de artificiales, con la fila de Z expresada en la base inicial
+    tabla[-1, inicio_artificiales:-1] = 1
+    for k, i in enumerate(filas_artificiales):
+        tabla[i, :] *= -1
+        tabla[i, inicio_artificiales + k] = 1
+        base[i] = inicio_artificiales + k
+        tabla[-1, :] -= tabla[i, :]
+
+    traza = Traza(traza)
+    traza_fase1 = traza if traza.modo == "summary" else Traza("off")
+    error = iterar_tabla(tabla, traza_fase1, base, -1, pricing)
+    if error:
+        return error, None, None, traza.pasos
+
+    if -tabla[-1, -1] > TOLERANCIA:
+        return "No existe solución factible", None, None, traza.pasos
+
+    # Sacar de la base las artificiales que quedaron en nivel cero; si su fila no tiene
+    # coeficientes reales la restricción es redundante y se elimina
+    redundantes = []
+    for i in range(num_restricciones):
+        if base[i] >= inicio_artificiales:
+            candidatas = np.flatnonzero(np.abs(tabla[i, :inicio_artificiales]) > TOLERANCIA)
+            if len(candidatas):
+                eliminar(tabla, i, candidatas[0])
+                base[i] = candidatas[0]
+            else:
+                redundantes.append(i)
 
-    while True:
-        pasos_fase2.append(tabla_fase2.copy().tolist())  # Guardamos copia de la tabla
+    # Fase 2: sin columnas artificiales y con el objetivo original expresado en la base de la fase 1
+    tabla = np.delete(tabla, redundantes, axis=0)
+    tabla = np.delete(tabla, np.arange(inicio_artificiales, tabla.shape[1] - 1), axis=1)
+    base = [j for i, j in enumerate(base) if i not in redundantes]
 
-        # Buscar la columna pivote (menor coeficiente en la fila de Z)
-        col_pivote = np.argmin(tabla_fase2[-1, :-1])
-        if tabla_fase2[-1, col_pivote] >= 0:
-            break  # No hay más mejoras
+    expresar_objetivo(tabla, c, base)
 
-        # Buscar la fila pivote (mínima razón positiva)
-        ratios = []
-        for i in range(num_restricciones):
-            if tabla_fase2[i, col_pivote] > 0:
-                ratios.append(tabla_fase2[i, -1] / tabla_fase2[i, col_pivote])
-            else:
-                ratios.append(np.inf)
+    error = iterar_tabla(tabla, traza, base, 1 if tipo == "max" else -1, pricing)
+    if error:
+        return error, None, None, traza.pasos
 
-        fila_pivote = np.argmin(ratios)
-        if ratios[fila_pivote] == np.inf:
-            return "Solución no acotada", None, None, None
+    # Extraer la solución
+    solucion, holguras = extraer_solucion(tabla, num_vars, num_restricciones, base)
 
-        # Normalizar la fila pivote
-        tabla_fase2[fila_pivote, :] /= tabla_fase2[fila_pivote, col_pivote]
+    valor_optimo = round(tabla[-1, -1] if tipo == "max" else -tabla[-1, -1], 2)
+    
+    return valor_optimo, solucion, holguras, traza.pasos
+
+class BaseFactorizada:
+    """ Base B del Simplex Revisado: factorización LU dispersa más actualizaciones eta """
+
+    def __init__(self, matriz, columnas_basicas):
+        self.matriz = matriz
+        self.refactorizar(columnas_basicas)
+
+    def refactorizar(self, columnas_basicas):
+        self.lu = splu(self.matriz[:, columnas_basicas].tocsc())
+        self.etas = []
+
+    def ftran(self, a):
+        """ Resuelve B x = a """
+        x = self.lu.solve(np.asarray(a, dtype=float))
+        for r, d in self.etas:
+            x_r = x[r] / d[r]
+            x -= d * x_r
+            x[r] = x_r
+        return x
+
+    def btran(self, c):
+        """ Resuelve y^T B = c^T """
+        y = np.array(c, dtype=float)
+        for r, d in reversed(self.etas):
+            y[r] -= (d @ y - y[r]) / d[r]
+        return self.lu.solve(y, trans='T')
+
+    def btran_unitario(self, r):
+        """ Fila r de B^-1 (btran del vector unitario e_r) sin formar la identidad """
+        e = np.zeros(self.lu.shape[0])
+        e[r] = 1.0
+        return self.btran(e)
+
+    def actualizar(self, r, d):
+        """ Registra el pivote en la fila r con la columna transformada d = B^-1 a_q """
+        self.etas.append((r, d.copy()))
+
+
+def _columna(matriz, j):
+    """ Devuelve la columna j de una matriz CSC como vector denso """
+    a = np.zeros(matriz.shape[0])
+    ini, fin = matriz.indptr[j], matriz.indptr[j + 1]
+    a[matriz.indices[ini:fin]] = matriz.data[ini:fin]
+    return a
+
+
+def _iterar_revisado(matriz, rhs, costos, base, permitidas, traza, signo, pricing):
+    """ Itera el Simplex Revisado desde la base dada; devuelve (estado, x_B, factorizacion) con
+    estado "optima", "no_acotada" o "limite" """
+    factorizacion = BaseFactorizada(matriz, base)
+    x_B = factorizacion.ftran(rhs)
 
-        # Hacer ceros en la columna pivote
-        for i in range(num_restricciones + 1):
-            if i != fila_pivote:
-                tabla_fase2[i, :] -= tabla_fase2[i, col_pivote] * tabla_fase2[fila_pivote, :]
+    while True:
+        # Precios duales y costos reducidos de todas las columnas
+        y = factorizacion.btran(costos[base])
+        reducidos = costos - matriz.T @ y
+        reducidos[base] = 0
+        reducidos[~permitidas] = 0
+
+        col_pivote = pricing.elegir(reducidos)
+        if col_pivote is None:
+            return "optima", x_B, factorizacion
+        if pricing.agotado():
+            return "limite", x_B, factorizacion
+
+        # Columna transformada y prueba de la razón mínima
+        alfa = factorizacion.ftran(_columna(matriz, col_pivote))
+        positivos = alfa > TOLERANCIA
+        if not np.any(positivos):
+            return "no_acotada", x_B, factorizacion
+        ratios = np.full(len(alfa), np.inf)
+        ratios[positivos] = x_B[positivos] / alfa[positivos]
+        fila_pivote = np.argmin(ratios)
+        if pricing.usa_bland:
+            empates = np.flatnonzero(ratios <= ratios[fila_pivote] + TOLERANCIA)
+            fila_pivote = empates[np.argmin(base[empates])]
+        theta = ratios[fila_pivote]
+
+        # La fila pivote de B^-1 A solo se calcula para las reglas que actualizan pesos
+        fila_normalizada = None
+        if pricing.necesita_fila_pivote:
+            fila_normalizada = factorizacion.btran_unitario(fila_pivote) @ matriz / alfa[fila_pivote]
+        saliente = base[fila_pivote]
+        pricing.registrar(theta, fila_normalizada, col_pivote, saliente)
+
+        x_B -= theta * alfa
+        x_B[fila_pivote] = theta
+        base[fila_pivote] = col_pivote
+        objetivo = signo * float(costos[base] @ x_B)
+        traza.pivote(col_pivote, saliente, objetivo)
+        reportar_progreso(pivotes=pricing.iteraciones, objetivo=objetivo)
+        factorizacion.actualizar(fila_pivote, alfa)
+
+        if len(factorizacion.etas) >= REFACTORIZAR_CADA:
+            factorizacion.refactorizar(base)
+            x_B = factorizacion.ftran(rhs)
+
+
+def simplex_revisado(c, A, b, tipo, traza="summary", pricing=None):
+    """ Resuelve el problema con el Simplex Revisado: A dispersa y base LU refactorizada periódicamente.
+    No existe tabla completa: la traza "full" se registra como "summary" y "off" no guarda pasos """
+    A = sparse.csr_matrix(A, dtype=float)
+    num_restricciones, num_vars = A.shape
+    b = np.asarray(b, dtype=float)
+    c = np.asarray(c, dtype=float)
 
-    pasos_fase2.append(tabla_fase2.copy().tolist())  # Guardamos la última tabla
+    if tipo == "max":
+        c = -c  # Convertimos a problema de minimización
+
+    # Las filas con b negativo se multiplican por -1 y reciben una variable artificial
+    signos = np.where(b < 0, -1.0, 1.0)
+    filas_artificiales = np.flatnonzero(b < 0)
+    num_artificiales = len(filas_artificiales)
+    artificiales = sparse.csc_matrix(
+        (np.ones(num_artificiales), (filas_artificiales, np.arange(num_artificiales))),
+        shape=(num_restricciones, num_artificiales))
+    matriz = sparse.hstack([sparse.diags(signos) @ A, sparse.diags(signos), artificiales]).tocsc()
+    rhs = np.abs(b)
+
+    num_columnas = num_vars + num_restricciones + num_artificiales
+    base = np.arange(num_vars, num_vars + num_restricciones)
+    base[filas_artificiales] = num_vars + num_restricciones + np.arange(num_artificiales)
+    es_artificial = np.zeros(num_columnas, dtype=bool)
+    es_artificial[num_vars + num_restricciones:] = True
+    traza = Traza("summary" if traza == "full" else traza)
+    pricing = pricing or Pricing()
+
+    # Fase 1: minimizar la suma de artificiales (solo si hay filas con b negativo)
+    if num_artificiales:
+        costos_fase1 = es_artificial.astype(float)
+        estado, x_B, factorizacion = _iterar_revisado(matriz, rhs, costos_fase1, base,
+                                                      np.ones(num_columnas, dtype=bool), traza, 1, pricing)
+        if estado == "limite":
+            return LIMITE_ITERACIONES, None, None, traza.pasos
+        if costos_fase1[base] @ x_B > TOLERANCIA:
+            return "No existe solución factible", None, None, traza.pasos
+
+        # Sacar de la base las artificiales que quedaron en nivel cero
+        for fila in np.flatnonzero(es_artificial[base]):
+            fila_transformada = factorizacion.btran_unitario(fila) @ matriz
+            candidatas = np.flatnonzero((np.abs(fila_transformada) > TOLERANCIA) & ~es_artificial)
+            candidatas = np.setdiff1d(candidatas, base)
+            if len(candidatas):
+                alfa = factorizacion.ftran(_columna(matriz, candidatas[0]))
+                base[fila] = candidatas[0]
+                factorizacion.actualizar(fila, alfa)
+
+    # Fase 2: costos originales, artificiales fuera de la selección
+    costos = np.concatenate([c, np.zeros(num_restricciones + num_artificiales)])
+    estado, x_B, factorizacion = _iterar_revisado(matriz, rhs, costos, base, ~es_artificial, traza,
+                                                  -1 if tipo == "max" else 1, pricing)
+    if estado == "no_acotada":
+        return "Solución no acotada", None, None, traza.pasos
+    if estado == "limite":
+        return LIMITE_ITERACIONES, None, None, traza.pasos
+
+    x = np.zeros(num_columnas)
+    x[base] = x_B
+    solucion = x[:num_vars].tolist()
+    holguras = x[num_vars:num_vars + num_restricciones].tolist()
+
+    valor_optimo = round(float(-(c @ x[:num_vars]) if tipo == "max" else c @ x[:num_vars]), 2)
+
+    return valor_optimo, solucion, holguras, traza.pasos
+
+def _rango(valores, divisores):
+    """ Mínimo de valores / divisores sobre los divisores positivos (None si no hay límite) """
+    positivos = divisores > TOLERANCIA
+    if not positivos.any():
+        return None
+    return float(np.min(valores[positivos] / divisores[positivos]))
+
+def analisis_sensibilidad(tabla, base, num_vars, num_restricciones, tipo):
+    """ Precios sombra y rangos de b y c (aumento/disminución permitidos) que conservan la base óptima.
+    Un límite None significa que no hay límite """
+    signo = 1 if tipo == "max" else -1
+    x_B = tabla[:-1, -1]
+    reducidos = tabla[-1, :-1]
+    no_basicas = np.ones(num_vars + num_restricciones, dtype=bool)
+    no_basicas[base] = False
+
+    # Lado derecho: x_B + delta * B^-1 e_i debe seguir siendo no negativo
+    precios_sombra = []
+    rangos_b = []
+    for i in range(num_restricciones):
+        columna = tabla[:-1, num_vars + i]
+        precios_sombra.append(float(signo * reducidos[num_vars + i]))
+        rangos_b.append({"aumento": _rango(x_B, -columna), "disminucion": _rango(x_B, columna)})
+
+    # Costos: las no básicas solo pueden mejorar hasta su costo reducido; las básicas mueven
+    # todos los costos reducidos de su fila
+    rangos_c = []
+    fila_de = {j: i for i, j in enumerate(base)}
+    for j in range(num_vars):
+        if j in fila_de:
+            fila = np.where(no_basicas, tabla[fila_de[j], :-1], 0)
+            sube, baja = _rango(reducidos, fila), _rango(reducidos, -fila)
+        else:
+            sube, baja = None, float(reducidos[j])
+        if tipo == "max":
+            sube, baja = baja, sube
+        rangos_c.append({"aumento": sube, "disminucion": baja})
 
-    # Extraer la solución
-    solucion = [0] * num_vars
-    holguras = [0] * num_restricciones
+    return {"precios_sombra": precios_sombra, "rangos_b": rangos_b, "rangos_c": rangos_c}
 
-    for i in range(num_vars):
-        col = tabla_fase2[:-1, i]
-        if sum(col == 1) == 1 and sum(col == 0) == num_restricciones - 1:
-            fila = np.where(col == 1)[0][0]
-            solucion[i] = tabla_fase2[fila, -1]
+def reoptimizar(c, A, b, tipo, base=None, traza="summary", pricing=None):
+    """ Re-optimiza partiendo de una base previa (índices de columna de [A | I], uno por restricción).
+    Con la base aún dual factible (cambió b) se usa el Simplex Dual; si sigue siendo primal factible
+    (cambió c) el Simplex primal. Devuelve (valor_optimo, solucion, holguras, pasos, base, sensibilidad) """
+    num_vars = len(c)
+    num_restricciones = len(A)
+    costos = np.concatenate([np.asarray(c, dtype=float), np.zeros(num_restricciones)])
+    if tipo == "max":
+        costos = -costos  # Convertimos a problema de minimización
+    signo = 1 if tipo == "max" else -1
 
-    for i in range(num_restricciones):
-        col = tabla_fase2[:-1, num_vars + i]
-        if sum(col == 1) == 1 and sum(col == 0) == num_restricciones - 1:
-            fila = np.where(col == 1)[0][0]
-            holguras[i] = tabla_fase2[fila, -1]
+    matriz = np.hstack([np.asarray(A, dtype=float), np.eye(num_restricciones)])
+    if base is None:
+        base = list(range(num_vars, num_vars + num_restricciones))
+    base = [int(j) for j in base]
+    if len(base) != num_restricciones or len(set(base)) != num_restricciones:
+        raise ValueError("La base debe tener una columna distinta por restricción")
 
-    valor_optimo = round(tabla_fase2[-1, -1] if tipo == "max" else -tabla_fase2[-1, -1], 2)
-    
-    return valor_optimo, solucion, holguras, pasos_fase2
+    # Tabla expresada en la base dada: B^-1 [A | I | b]
+    tabla = np.zeros((num_restricciones + 1, num_vars + num_restricciones + 1))
+    try:
+        tabla[:-1, :] = np.linalg.solve(matriz[:, base], np.column_stack([matriz, b]))
+    except np.linalg.LinAlgError:
+        raise ValueError("La base dada es singular")
+    expresar_objetivo(tabla, costos, base)
+
+    traza = Traza(traza)
+    primal_factible = np.all(tabla[:-1, -1] >= -TOLERANCIA)
+    dual_factible = np.all(tabla[-1, :-1] >= -TOLERANCIA)
+
+    if not primal_factible:
+        if not dual_factible:
+            # Ninguna factible: se anulan temporalmente los costos reducidos negativos para que el
+            # Simplex Dual encuentre una base factible, y luego se vuelven a poner los costos reales
+            np.maximum(tabla[-1, :-1], 0, out=tabla[-1, :-1])
+        error = iterar_dual(tabla, traza, base, signo, pricing)
+        if error:
+            return error, None, None, traza.pasos, base, None
+        expresar_objetivo(tabla, costos, base)
+
+    error = iterar_tabla(tabla, traza, base, signo, pricing)
+    if error:
+        return error, None, None, traza.pasos, base, None
+
+    solucion, holguras = extraer_solucion(tabla, num_vars, num_restricciones, base)
+    valor_optimo = round(tabla[-1, -1] if tipo == "max" else -tabla[-1, -1], 2)
+    sensibilidad = analisis_sensibilidad(tabla, base, num_vars, num_restricciones, tipo)
+
+    return valor_optimo, solucion, holguras, traza.pasos, base, sensibilidad
+
+def _potencia_de_dos(factores):
+    """ Redondea factores de escala a potencias de 2 para que escalar no introduzca redondeo """
+    return np.exp2(np.round(np.log2(factores)))
+
+class Presolve:
+    """ Reduce (c, A, b) antes de construir la tabla: quita filas y columnas vacías, convierte las filas
+    con una sola variable en cotas, elimina restricciones duplicadas o dominadas y aplica escalado
+    geométrico. Las cotas inferiores desaparecen con un cambio de variable, pero los solucionadores no
+    manejan cotas superiores: cada variable acotada vuelve con una sola fila x <= u (la más ajustada),
+    así que las filas singleton solo reducen el modelo cuando son cotas inferiores o se repiten.
+    postsolve() devuelve la solución a las variables y holguras originales """
+
+    PASADAS_ESCALADO = 4
+
+    def __init__(self, c, A, b, tipo):
+        self.c_original = np.asarray(c, dtype=float)
+        self.b_original = np.asarray(b, dtype=float)
+        A = A.toarray() if sparse.issparse(A) else A  # El presolve trabaja sobre la matriz densa
+        self.A_original = np.asarray(A, dtype=float).reshape(len(self.b_original), len(self.c_original))
+        self.tipo = tipo
+        self.estado = None
+        self.resumen = {"filas_vacias": 0, "columnas_vacias": 0, "filas_singleton": 0,
+                        "variables_fijas": 0, "filas_duplicadas": 0, "cotas_superiores": 0}
+        self._reducir()
+
+    def _reducir(self):
+        A = self.A_original.copy()
+        b = self.b_original.copy()
+        num_restricciones, num_vars = A.shape
+        c_min = -self.c_original if self.tipo == "max" else self.c_original
+
+        filas = np.ones(num_restricciones, dtype=bool)
+        columnas = np.ones(num_vars, dtype=bool)
+        inferior = np.zeros(num_vars)
+        superior = np.full(num_vars, np.inf)
+        self.fijas = np.zeros(num_vars)
+        self.no_acotada = False
+
+        def fijar(j, valor):
+            b[:] -= A[:, j] * valor
+            self.fijas[j] = valor
+            columnas[j] = False
+
+        cambio = True
+        while cambio:
+            cambio = False
+            no_nulos = (A != 0) & filas[:, None] & columnas[None, :]
+            por_fila = no_nulos.sum(axis=1)
+
+            # Filas vacías: 0 <= b_i
+            vacias = filas & (por_fila == 0)
+            if np.any(b[vacias] < -TOLERANCIA):
+                self.estado = "No existe solución factible"
+                return
+            self.resumen["filas_vacias"] += int(vacias.sum())
+            filas &= ~vacias
+
+            # Filas con una sola variable: a x_j <= b_i es una cota de x_j
+            for i in np.flatnonzero(filas & (por_fila == 1)):
+                j = np.flatnonzero(no_nulos[i])[0]
+                if A[i, j] > 0:
+                    superior[j] = min(superior[j], b[i] / A[i, j])
+                else:
+                    inferior[j] = max(inferior[j], b[i] / A[i, j])
+                filas[i] = False
+                self.resumen["filas_singleton"] += 1
+                cambio = True
+            if np.any(superior < inferior - TOLERANCIA):
+                self.estado = "No existe solución factible"
+                return
+
+            # Variables con cotas iguales quedan fijas
+            for j in np.flatnonzero(columnas & (superior - inferior <= TOLERANCIA)):
+                fijar(j, inferior[j])
+                self.resumen["variables_fijas"] += 1
+                cambio = True
+
+            # Columnas vacías: la variable va a la cota que más favorece al objetivo. Si esa cota es
+            # infinita el problema es no acotado siempre que el resto sea factible
+            no_nulos = (A != 0) & filas[:, None] & columnas[None, :]
+            for j in np.flatnonzero(columnas & ~no_nulos.any(axis=0)):
+                if c_min[j] < 0 and np.isfinite(superior[j]):
+                    fijar(j, superior[j])
+                else:
+                    self.no_acotada |= c_min[j] < 0
+                    fijar(j, inferior[j])
+                self.resumen["columnas_vacias"] += 1
+                cambio = True
+
+        self.columnas = np.flatnonzero(columnas)
+        self.inferior = inferior[self.columnas]
+
+        # Las cotas inferiores se desplazan (x = x' + l) y las superiores vuelven como filas x' <= u - l
+        A_red = A[np.ix_(filas, self.columnas)]
+        b_red = b[filas] - A_red @ self.inferior
+        acotadas = np.flatnonzero(np.isfinite(superior[self.columnas]))
+        self.resumen["cotas_superiores"] = len(acotadas)
+        filas_cotas = np.zeros((len(acotadas), len(self.columnas)))
+        filas_cotas[np.arange(len(acotadas)), acotadas] = 1
+        A_red = np.vstack([A_red, filas_cotas])
+        b_red = np.concatenate([b_red, superior[self.columnas][acotadas] - self.inferior[acotadas]])
+
+        # Restricciones duplicadas o dominadas: misma fila normalizada, se conserva el menor b
+        if len(A_red):
+            escala = np.max(np.abs(A_red), axis=1)
+            normalizadas = np.round(A_red / escala[:, None], 12) + 0.0
+            mejor = {}
+            for i in range(len(A_red)):
+                clave = normalizadas[i].tobytes()
+                if clave not in mejor or b_red[i] / escala[i] < b_red[mejor[clave]] / escala[mejor[clave]]:
+                    mejor[clave] = i
+            conservar = np.sort(list(mejor.values()))
+            self.resumen["filas_duplicadas"] = len(A_red) - len(conservar)
+            A_red, b_red = A_red[conservar], b_red[conservar]
+
+        # Escalado geométrico de filas y columnas (factores en potencias de 2)
+        escala_filas = np.ones(len(A_red))
+        self.escala_columnas = np.ones(len(self.columnas))
+        absolutos = np.abs(A_red)
+        if absolutos.size:
+            for _ in range(self.PASADAS_ESCALADO):
+                escalada = absolutos * escala_filas[:, None] * self.escala_columnas[None, :]
+                minimos = np.min(np.where(escalada > 0, escalada, np.inf), axis=1)
+                escala_filas /= _potencia_de_dos(np.sqrt(np.max(escalada, axis=1) * minimos))
+                escalada = absolutos * escala_filas[:, None] * self.escala_columnas[None, :]
+                minimos = np.min(np.where(escalada > 0, escalada, np.inf), axis=0)
+                self.escala_columnas /= _potencia_de_dos(np.sqrt(np.max(escalada, axis=0) * minimos))
+
+        self.A = A_red * escala_filas[:, None] * self.escala_columnas[None, :]
+        self.b = b_red * escala_filas
+        self.c = self.c_original[self.columnas] * self.escala_columnas
+
+    def postsolve(self, solucion_reducida):
+        """ Devuelve (valor_optimo, solucion, holguras) en las variables y restricciones originales """
+        x = self.fijas.copy()
+        x[self.columnas] = self.escala_columnas * np.asarray(solucion_reducida, dtype=float) + self.inferior
+        holguras = self.b_original - self.A_original @ x
+        valor_optimo = round(float(self.c_original @ x), 2)
+        return valor_optimo, x.tolist(), holguras.tolist()
+
+    def resolver(self, metodo, traza="full", pricing=None):
+        """ Resuelve el problema reducido con el método dado y aplica el postsolve """
+        if self.estado:
+            return self.estado, None, None, np.empty((0, 0, 0))
+        if len(self.columnas) == 0:
+            resultado, solucion, pasos = 0, [], np.empty((0, 0, 0))
+        else:
+            resultado, solucion, holguras, pasos = metodo(self.c.tolist(), self.A.tolist(), self.b.tolist(),
+                                                          self.tipo, traza, pricing)
+        if isinstance(resultado, str):
+            return resultado, None, None, pasos
+        if self.no_acotada:
+            return "Solución no acotada", None, None, pasos
+        valor_optimo, solucion, holguras = self.postsolve(solucion)
+        return valor_optimo, solucion, holguras, pasos
+
+cache_resultados = CacheLRU(TAMANO_CACHE_RESULTADOS)
+
+def clave_canonica(c, A, b, tipo, metodo, escalar=True):
+    """ Hash del problema ya en forma <=. Cada fila (A_i, b_i) y el vector c se escalan por su máximo
+    valor absoluto, de modo que los problemas escalados positivamente comparten la misma clave.
+    Con escalar=False la clave es la de los datos exactos (las tablas de la traza dependen de la escala).
+    A se recorre en CSR, así que densa o dispersa da la misma clave sin formar la matriz densa """
+    b = np.asarray(b, dtype=float)
+    c = np.asarray(c, dtype=float)
+    A = sparse.csr_matrix(A if sparse.issparse(A) else np.asarray(A, dtype=float).reshape(len(b), len(c)), dtype=float)
+    A.sum_duplicates()
+    A.eliminate_zeros()
+
+    maximos = np.zeros(A.shape[0])
+    if A.nnz:
+        maximos = np.maximum.reduceat(np.abs(A.data), A.indptr[:-1]) * (np.diff(A.indptr) > 0)
+    escala_filas = np.maximum(maximos, np.abs(b))
+    escala_filas[escala_filas == 0] = 1
+    escala_c = np.max(np.abs(c), initial=0) or 1
+    if not escalar:
+        escala_filas[:], escala_c = 1, 1
+
+    datos = A.data / np.repeat(escala_filas, np.diff(A.indptr))
+    clave = hashlib.sha256(f"{tipo}|{metodo}|{A.shape}".encode())
+    clave.update(A.indptr.astype(np.int64).tobytes())
+    clave.update(A.indices.astype(np.int64).tobytes())
+    for parte in (datos, b / escala_filas, c / escala_c):
+        clave.update((np.round(parte, 12) + 0.0).tobytes())  # + 0.0 unifica -0.0 y 0.0
+    return clave.hexdigest()
+
+def resultado_desde_cache(entrada, c, A, b, tipo):
+    """ Reconstruye (valor_optimo, solucion, holguras, pasos) a partir de la solución guardada.
+    El objetivo y las holguras se recalculan con los datos originales (pueden estar escalados) """
+    if isinstance(entrada, str):
+        return entrada, None, None, np.empty((0, 0, 0))
+    solucion = entrada.tolist()
+    A = A if sparse.issparse(A) else np.asarray(A, dtype=float)
+    holguras = (np.asarray(b, dtype=float) - A @ entrada).tolist()
+    valor_optimo = round(float(np.dot(c, entrada)), 2)
+    return valor_optimo, solucion, holguras, np.empty((0, 0, 0))
+
+class EstadisticasPricing:
+    """ Iteraciones acumuladas por clase de problema y regla de pricing, para comparar reglas """
+
+    def __init__(self):
+        self._datos = {}
+        self._candado = threading.Lock()
+
+    def registrar(self, clase, pricing):
+        with self._candado:
+            datos = self._datos.setdefault((clase, pricing.regla), {"resoluciones": 0, "iteraciones": 0})
+            datos["resoluciones"] += 1
+            datos["iteraciones"] += pricing.iteraciones
+
+    def resumen(self):
+        with self._candado:
+            resumen = {}
+            for (clase, regla), datos in self._datos.items():
+                resumen.setdefault(clase, {})[regla] = dict(
+                    datos, promedio=datos["iteraciones"] / datos["resoluciones"])
+            return resumen
+
+estadisticas_pricing = EstadisticasPricing()
+almacen_resultados = AlmacenResultados()
+
+class ModeloDisperso:
+    """ Acumula un modelo leído por flujo en tripletas (fila, columna, valor) sin formar la matriz densa.
+    construir() lo devuelve en forma <= para los solucionadores: las filas >= se niegan, las = se
+    duplican y las cotas de las variables (x >= 0 implícito) se agregan como filas """
+
+    def __init__(self, tipo="min"):
+        self.tipo = tipo
+        self.variables = {}
+        self.restricciones = {}
+        self.sentidos = []
+        self.filas, self.columnas, self.valores = [], [], []
+        self.costos = {}
+        self.rhs = {}
+        self.inferior = {}
+        self.superior = {}
+
+    def variable(self, nombre):
+        if nombre not in self.variables:
+            self.variables[nombre] = len(self.variables)
+        return self.variables[nombre]
+
+    def restriccion(self, nombre, sentido):
+        if sentido not in ("<=", ">=", "="):
+            raise ValueError(f"Sentido de restricción no válido: {sentido}")
+        if nombre in self.restricciones:
+            raise ValueError(f"Restricción repetida: {nombre}")
+        self.restricciones[nombre] = len(self.sentidos)
+        self.sentidos.append(sentido)
+        return self.restricciones[nombre]
+
+    def coeficiente(self, fila, columna, valor):
+        self.filas.append(fila)
+        self.columnas.append(columna)
+        self.valores.append(valor)
+
+    def cota(self, columna, tipo_cota, valor):
+        """ Cotas al estilo MPS: UP, LO, FX o PL. Las variables negativas o libres no están soportadas """
+        if tipo_cota in ("LO", "FX"):
+            if valor < 0:
+                raise ValueError("Cotas inferiores negativas no soportadas (las variables son x >= 0)")
+            self.inferior[columna] = valor
+        if tipo_cota == "UP" and valor == np.inf:
+            tipo_cota = "PL"
+        elif tipo_cota in ("UP", "FX"):
+            if valor < 0:
+                raise ValueError("Cotas superiores negativas no soportadas (las variables son x >= 0)")
+            self.superior[columna] = valor
+        if tipo_cota == "PL":
+            self.superior.pop(columna, None)
+        elif tipo_cota not in ("LO", "UP", "FX"):
+            raise ValueError(f"Tipo de cota no soportado: {tipo_cota}")
+
+    def construir(self):
+        """ Devuelve (c, A, b, tipo) con A en formato CSR """
+        num_vars = len(self.variables)
+        sentidos = np.array(self.sentidos, dtype=object)
+        signos = np.where(sentidos == ">=", -1.0, 1.0)
+
+        filas = np.array(self.filas, dtype=np.int64)
+        valores = np.array(self.valores, dtype=float) * signos[filas] if len(filas) else np.zeros(0)
+        columnas = np.array(self.columnas, dtype=np.int64)
+        b = np.zeros(len(self.sentidos))
+        for fila, valor in self.rhs.items():
+            b[fila] = valor
+        b *= signos
+
+        # Las igualdades se agregan otra vez como >= (fila negada)
+        iguales = np.flatnonzero(sentidos == "=")
+        nuevas = len(self.sentidos) + np.arange(len(iguales))
+        en_iguales = np.isin(filas, iguales)
+        mapa = np.zeros(len(self.sentidos), dtype=np.int64)
+        mapa[iguales] = nuevas
+        filas = np.concatenate([filas, mapa[filas[en_iguales]]])
+        columnas = np.concatenate([columnas, columnas[en_iguales]])
+        valores = np.concatenate([valores, -valores[en_iguales]])
+        b = np.concatenate([b, -b[iguales]])
+
+        # Cotas como filas x_j <= u y -x_j <= -l
+        cotas = [(j, 1.0, u) for j, u in self.superior.items()]
+        cotas += [(j, -1.0, -l) for j, l in self.inferior.items() if l > 0]
+        if cotas:
+            primera = len(b)
+            filas = np.concatenate([filas, primera + np.arange(len(cotas))])
+            columnas = np.concatenate([columnas, [j for j, _, _ in cotas]])
+            valores = np.concatenate([valores, [signo for _, signo, _ in cotas]])
+            b = np.concatenate([b, [valor for _, _, valor in cotas]])
+
+        A = sparse.coo_matrix((valores, (filas, columnas)), shape=(len(b), num_vars)).tocsr()
+        A.sum_duplicates()
+        A.eliminate_zeros()
+        c = np.zeros(num_vars)
+        for j, valor in self.costos.items():
+            c[j] = valor
+        return c, A, b, self.tipo
+
+def _leer_mps(lineas, tipo):
+    """ Lee un archivo MPS (fijo o libre, separado por espacios). La primera fila N es el objetivo """
+    modelo = ModeloDisperso(tipo)
+    seccion = None
+    objetivo = None
+    sentidos = {"L": "<=", "G": ">=", "E": "="}
+    for linea in lineas:
+        if not linea.strip() or linea.startswith("*"):
+            continue
+        campos = linea.split()
+        if not linea[0].isspace():
+            seccion = campos[0].upper()
+            if seccion == "OBJSENSE" and len(campos) > 1:
+                modelo.tipo = "max" if campos[1].upper().startswith("MAX") else "min"
+            elif seccion == "ENDATA":
+                break
+            elif seccion in ("RANGES", "SOS", "QUADOBJ"):
+                raise ValueError(f"Sección MPS no soportada: {seccion}")
+            continue
+
+        if seccion == "OBJSENSE":
+            modelo.tipo = "max" if campos[0].upper().startswith("MAX") else "min"
+        elif seccion == "ROWS":
+            if campos[0].upper() == "N":
+                objetivo = objetivo or campos[1]
+            else:
+                modelo.restriccion(campos[1], sentidos[campos[0].upper()])
+        elif seccion == "COLUMNS":
+            if "'MARKER'" in campos:
+                raise ValueError("Variables enteras no soportadas")
+            j = modelo.variable(campos[0])
+            for nombre, valor in zip(campos[1::2], campos[2::2]):
+                if nombre == objetivo:
+                    modelo.costos[j] = float(valor)
+                elif nombre in modelo.restricciones:
+                    modelo.coeficiente(modelo.restricciones[nombre], j, float(valor))
+        elif seccion == "RHS":
+            pares = campos[1:] if len(campos) % 2 else campos
+            for nombre, valor in zip(pares[::2], pares[1::2]):
+                if nombre in modelo.restricciones:
+                    modelo.rhs[modelo.restricciones[nombre]] = float(valor)
+        elif seccion == "BOUNDS":
+            modelo.cota(modelo.variable(campos[2]), campos[0].upper(), float(campos[3]) if len(campos) > 3 else 0.0)
+    return modelo
+
+_TOKEN_LP = re.compile(r"\s*(<=|>=|=<|=>|<|>|=|[+-]|:|"
+                       r"(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|[A-Za-z_][\w.\[\]]*)")
+_SECCIONES_LP = {"maximize": "max", "maximise": "max", "maximum": "max", "max": "max",
+                 "minimize": "min", "minimise": "min", "minimum": "min", "min": "min",
+                 "subject to": "st", "such that": "st", "st": "st", "s.t.": "st",
+                 "bounds": "bounds", "bound": "bounds", "end": "end"}
+
+def _tokens_lp(texto):
+    tokens = []
+    posicion = 0
+    texto = texto.rstrip()
+    while posicion < len(texto):
+        encontrado = _TOKEN_LP.match(texto, posicion)
+        if not encontrado:
+            raise ValueError(f"No se pudo interpretar: {texto[posicion:]}")
+        tokens.append(encontrado.group(1).replace("=<", "<=").replace("=>", ">="))
+        posicion = encontrado.end()
+    return tokens
+
+def _expresion_lp(tokens):
+    """ Convierte [etiqueta:] ±coef var ± ... en pares (variable, coeficiente) """
+    if ":" in tokens:
+        tokens = tokens[tokens.index(":") + 1:]
+    terminos = []
+    signo, coeficiente = 1.0, None
+    for token in tokens:
+        if token in "+-":
+            signo = signo * (-1.0 if token == "-" else 1.0)
+        elif _es_numero(token):
+            coeficiente = float(token)
+        else:
+            terminos.append((token, signo * (1.0 if coeficiente is None else coeficiente)))
+            signo, coeficiente = 1.0, None
+    return terminos
+
+def _leer_lp(lineas, tipo):
+    """ Lee el formato CPLEX LP: objetivo, Subject To y Bounds; las expresiones pueden ocupar varias líneas """
+    modelo = ModeloDisperso(tipo)
+    seccion = None
+    pendientes = []
+
+    def cerrar_restriccion(tokens):
+        operador = next(i for i, token in enumerate(tokens) if token in ("<=", ">=", "=", "<", ">"))
+        nombre = tokens[0] if len(tokens) > 1 and tokens[1] == ":" else f"R{len(modelo.sentidos) + 1}"
+        rhs = float("".join(tokens[operador + 1:]))
+        fila = modelo.restriccion(nombre, {"<": "<=", ">": ">="}.get(tokens[operador], tokens[operador]))
+        modelo.rhs[fila] = rhs
+        for variable, valor in _expresion_lp(tokens[:operador]):
+            modelo.coeficiente(fila, modelo.variable(variable), valor)
+
+    def leer_cota(tokens):
+        tokens = _unir_signos([{"<": "<=", ">": ">="}.get(token, token) for token in tokens])
+        if len(tokens) == 2 and tokens[1].lower() == "free":
+            raise ValueError("Variables libres no soportadas (las variables son x >= 0)")
+        if len(tokens) == 5:
+            j = modelo.variable(tokens[2])
+            modelo.cota(j, "LO", float(tokens[0]))
+            modelo.cota(j, "UP", float(tokens[4]))
+        elif _es_numero(tokens[0]):
+            modelo.cota(modelo.variable(tokens[2]), {"<=": "LO", ">=": "UP", "=": "FX"}[tokens[1]], float(tokens[0]))
+        else:
+            modelo.cota(modelo.variable(tokens[0]), {"<=": "UP", ">=": "LO", "=": "FX"}[tokens[1]], float(tokens[2]))
+
+    for linea in lineas:
+        linea = linea.split("\\", 1)[0]
+        clave = linea.strip().lower()
+        if not clave:
+            continue
+        if clave in _SECCIONES_LP or clave in ("generals", "general", "binaries", "binary"):
+            if seccion in ("max", "min"):
+                for variable, valor in _expresion_lp(pendientes):
+                    j = modelo.variable(variable)
+                    modelo.costos[j] = modelo.costos.get(j, 0) + valor
+            pendientes = []
+            seccion = _SECCIONES_LP.get(clave)
+            if seccion is None:
+                raise ValueError("Variables enteras no soportadas")
+            if seccion in ("max", "min"):
+                modelo.tipo = seccion
+            elif seccion == "end":
+                break
+            continue
+
+        pendientes += _tokens_lp(linea)
+        if seccion == "st":
+            # La restricción termina cuando después del operador hay un número completo
+            operadores = [i for i, token in enumerate(pendientes) if token in ("<=", ">=", "=", "<", ">")]
+            if operadores and any(_es_numero(token) for token in pendientes[operadores[0]:]):
+                cerrar_restriccion(pendientes)
+                pendientes = []
+        elif seccion == "bounds":
+            leer_cota(pendientes)
+            pendientes = []
+    return modelo
+
+def _es_numero(token):
+    return token.lstrip("+-")[:1].isdigit() or token.lstrip("+-")[:1] == "." or token.lstrip("+-").lower() in ("inf", "infinity")
+
+def _unir_signos(tokens):
+    """ Une el signo con el número que le sigue: ["-", "3"] -> ["-3"] """
+    unidos = []
+    for token in tokens:
+        if unidos and unidos[-1] in ("+", "-") and _es_numero(token):
+            token = unidos.pop() + token
+        unidos.append(token)
+    return unidos
+
+def _leer_csv(lineas, tipo):
+    """ Lee tripletas fila,columna,valor (índices desde 0). La fila "c" es el objetivo, la columna "b"
+    el lado derecho y la columna "des" el sentido (<=, >= o =; por defecto <=) """
+    modelo = ModeloDisperso(tipo)
+    sentidos = {}
+    num_vars = 0
+    for campos in csv.reader(lineas):
+        if not campos or campos[0].strip().startswith("#"):
+            continue
+        fila, columna, valor = (campo.strip() for campo in campos[:3])
+        if fila == "c":
+            modelo.costos[int(columna)] = float(valor)
+            num_vars = max(num_vars, int(columna) + 1)
+        elif columna == "b":
+            modelo.rhs[int(fila)] = float(valor)
+        elif columna == "des":
+            sentidos[int(fila)] = valor
+        elif fila.isdigit():
+            modelo.coeficiente(int(fila), int(columna), float(valor))
+            num_vars = max(num_vars, int(columna) + 1)
+
+    # Los índices son directos: se registran todas las filas y columnas hasta la mayor usada
+    for i in range(1 + max([*modelo.filas, *modelo.rhs, *sentidos], default=-1)):
+        modelo.restriccion(i, sentidos.get(i, "<="))
+    modelo.variables = {j: j for j in range(num_vars)}
+    return modelo
+
+LECTORES_MODELO = {"mps": _leer_mps, "lp": _leer_lp, "csv": _leer_csv}
+
+def leer_modelo(archivo, formato, tipo="min"):
+    """ Lee el modelo línea a línea desde un archivo binario y devuelve (c, A dispersa, b, tipo).
+    tipo solo se usa para CSV: MPS y LP minimizan salvo que OBJSENSE o la cabecera digan lo contrario """
+    if formato not in LECTORES_MODELO:
+        raise ValueError(f"Formato no soportado: {formato}")
+    lineas = io.TextIOWrapper(archivo, encoding="utf-8", errors="replace", newline="")
+    return LECTORES_MODELO[formato](lineas, tipo if formato == "csv" else "min").construir()
+
+def metodo_modelo(metodo, b):
+    """ El Simplex simple necesita b >= 0 (solo filas <=); los modelos cargados con filas >= o = pasan
+    a Dos Fases """
+    if metodo == "simplex" and np.any(np.asarray(b) < 0):
+        return "dos_fases"
+    return metodo
+
+METODOS = {
+    "simplex": simplex,
+    "dos_fases": dos_fases,
+    "gran_m": gran_m,
+    "revisado": simplex_revisado,
+}
 
 @app.route('/')
 def index():
@@ -243,6 +1217,11 @@ def resolver():
         num_variables = int(request.form['num_variables'])
         num_restricciones = int(request.form['num_restricciones'])
         metodo = request.form['metodo']
+        traza = request.form.get('traza', 'full')
+        usar_presolve = request.form.get('presolve', 'off') == 'on'
+        max_iteraciones = request.form.get('max_iteraciones')
+        pricing = Pricing(request.form.get('pricing', 'dantzig'), int(max_iteraciones) if max_iteraciones else None)
+        clase = request.form.get('clase') or "general"
 
         c = [float(request.form[f'c{i}']) for i in range(num_variables)]
         A = []
@@ -260,84 +1239,280 @@ def resolver():
             A.append(restriccion)
             b.append(b_valor)
 
-        if metodo == "simplex":
-            resultado, solucion, holguras, pasos = simplex(c, A, b, tipo)
-        elif metodo == "dos_fases":
-            resultado, solucion, holguras, pasos = dos_fases(c, A, b, tipo)
-        elif metodo == "gran_m":
-            resultado, solucion, holguras, pasos = gran_m(c, A, b, tipo)
-        else:
+        if metodo not in METODOS:
             return "Método no válido", 400
 
-        return render_template('resultado.html', resultado=resultado, solucion=solucion, holguras=holguras, pasos=pasos, num_variables=num_variables, num_restricciones=num_restricciones)
+        return resolver_problema(c, A, b, tipo, metodo, traza, usar_presolve, pricing, clase)
 
     except Exception as e:
         return f"Error en la resolución: {e}"
 
-@app.route('/descargar', methods=['POST'])
-def descargar():
+@app.route('/cargar', methods=['POST'])
+def cargar():
+    """ Resuelve un modelo subido como archivo MPS, LP o CSV de tripletas. El archivo se lee por flujo
+    a una matriz dispersa; el Simplex Revisado la usa tal cual y los métodos de tabla la densifican """
     try:
-        tipo_archivo = request.form['tipo_archivo']
-        resultado = request.form['resultado']
-        solucion = request.form.getlist('solucion[]')
-        holguras = request.form.getlist('holguras[]')
-        pasos = request.form.getlist('pasos[]')
-        num_variables = int(request.form['num_variables'])
-        num_restricciones = int(request.form['num_restricciones'])
-
-        if tipo_archivo == 'pdf':
-            # Crear un archivo PDF en memoria
-            buffer = io.BytesIO()
-            p = canvas.Canvas(buffer, pagesize=letter)
-            p.drawString(100, 750, "Resultado del Método Simplex")
-            p.drawString(100, 730, f"Valor Óptimo: {resultado}")
+        archivo = request.files['modelo']
+        formato = request.form.get('formato') or os.path.splitext(archivo.filename)[1].lstrip('.').lower()
+        metodo = request.form.get('metodo', 'revisado')
+        traza = request.form.get('traza', 'summary')
+        usar_presolve = request.form.get('presolve', 'off') == 'on'
+        max_iteraciones = request.form.get('max_iteraciones')
+        pricing = Pricing(request.form.get('pricing', 'dantzig'), int(max_iteraciones) if max_iteraciones else None)
+        clase = request.form.get('clase') or "general"
+
+        if metodo not in METODOS:
+            return "Método no válido", 400
 
-            y = 710
-            for i in range(num_variables):
-                p.drawString(100, y, f"X{i+1} = {solucion[i]}")
-                y -= 20
+        c, A, b, tipo = leer_modelo(archivo.stream, formato, request.form.get('tipo', 'min'))
+        metodo = metodo_modelo(metodo, b)
+        if metodo != "revisado":
+            A = A.toarray()
 
-            for i in range(num_restricciones):
-                p.drawString(100, y, f"S{i+1} = {holguras[i]}")
-                y -= 20
+        return resolver_problema(c.tolist(), A, b.tolist(), tipo, metodo, traza, usar_presolve, pricing, clase)
 
-            p.drawString(100, y, "Pasos:")
-            y -= 20
+    except Exception as e:
+        return f"Error en la resolución: {e}"
 
-            for i, paso in enumerate(pasos):
-                p.drawString(100, y, f"Iteración {i+1}: {paso}")
-                y -= 20
+def resolver_metodo(c, A, b, tipo, metodo, traza, usar_presolve, pricing):
+    """ Resuelve con el método dado, con presolve opcional. Devuelve (resultado, solucion, holguras,
+    pasos, presolve o None) """
+    if usar_presolve:
+        reduccion = Presolve(c, A, b, tipo)
+        return (*reduccion.resolver(METODOS[metodo], traza, pricing), reduccion)
+    return (*METODOS[metodo](c, A, b, tipo, traza, pricing), None)
+
+def guardar_resultado(resultado, solucion, holguras, pasos, traza, num_variables, num_restricciones):
+    """ Guarda el resultado para /descargar y /pasos; devuelve su id """
+    return almacen_resultados.guardar({"resultado": resultado, "solucion": solucion, "holguras": holguras, "pasos": pasos, "traza": traza,
+                                       "num_variables": num_variables, "num_restricciones": num_restricciones})
+
+def resolver_problema(c, A, b, tipo, metodo, traza, usar_presolve, pricing, clase):
+    """ Resuelve (con caché y presolve opcional) el problema en forma <= y muestra el resultado """
+    num_restricciones, num_variables = len(b), len(c)
+    # La caché guarda la solución, los contadores de pricing, el resumen del presolve y, con traza, los
+    # pasos. Sin traza la clave es la canónica (comparten entrada los problemas escalados) y no se
+    # muestran tablas; con traza la clave es la de los datos exactos y el modo de traza
+    opciones = f"{metodo}{'+presolve' if usar_presolve else ''}|{pricing.regla}|{pricing.max_iteraciones}|{traza}"
+    clave = clave_canonica(c, A, b, tipo, opciones, escalar=traza == "off")
+    en_cache = cache_resultados.obtener(clave)
+    presolve = None
+    if en_cache is not None:
+        entrada, pricing.iteraciones, pricing.pivotes_bland, presolve, pasos = en_cache
+        resultado, solucion, holguras, _ = resultado_desde_cache(entrada, c, A, b, tipo)
+        if traza == "off":
+            traza = "cache"
+    else:
+        resultado, solucion, holguras, pasos, reduccion = resolver_metodo(c, A, b, tipo, metodo, traza, usar_presolve, pricing)
+        presolve = reduccion.resumen if reduccion else None
+        if resultado != LIMITE_ITERACIONES and (traza == "off" or pasos.nbytes <= BYTES_TRAZA_CACHE):
+            entrada = resultado if isinstance(resultado, str) else np.asarray(solucion, dtype=float)
+            cache_resultados.guardar(clave, (entrada, pricing.iteraciones, pricing.pivotes_bland, presolve,
+                                             pasos if traza != "off" else np.empty((0, 0, 0))))
+    estadisticas_pricing.registrar(clase, pricing)
+
+    if metodo == "revisado" and traza == "full":
+        traza = "summary"
+
+    id_resultado = guardar_resultado(resultado, solucion, holguras, pasos, traza, num_variables, num_restricciones)
+
+    # Sin solución (no acotada, infactible o límite de iteraciones) solo se muestra el mensaje
+    if solucion is None:
+        return render_template('resultado.html', resultado=resultado, solucion=None, presolve=None, pricing=None, id_resultado=id_resultado)
+
+    # Con traza completa solo se muestra la tabla final; las iteraciones se piden por páginas a /pasos
+    tabla_final = pasos[-1] if traza in ("full", "off") and len(pasos) else None
+
+    return render_template('resultado.html', resultado=resultado, solucion=solucion, holguras=holguras, pasos=pasos if traza == "summary" else [], total_pasos=len(pasos), tabla_final=tabla_final, traza=traza, presolve=presolve, pricing=pricing.resumen(), desde_cache=en_cache is not None, num_variables=num_variables, num_restricciones=num_restricciones, id_resultado=id_resultado, tamano_pagina=TAMANO_PAGINA_PASOS)
+
+@app.route('/pasos/<id_resultado>')
+def pasos_resultado(id_resultado):
+    """ Pasos [desde, hasta) de la traza guardada en JSON: tablas completas o, en modo summary,
+    [columna entrante, columna saliente, Z] por pivote. Como máximo TAMANO_PAGINA_PASOS por consulta """
+    guardado = almacen_resultados.obtener(id_resultado)
+    if guardado is None:
+        return jsonify(error="El resultado ya no está disponible; vuelve a resolver el problema"), 404
+
+    pasos = guardado['pasos']
+    try:
+        desde = max(int(request.args.get('desde', 0)), 0)
+        hasta = min(int(request.args.get('hasta', desde + TAMANO_PAGINA_PASOS)), desde + TAMANO_PAGINA_PASOS, len(pasos))
+    except ValueError:
+        return jsonify(error="desde y hasta deben ser enteros"), 400
+
+    pagina = [np.asarray(pasos[k]).tolist() for k in range(desde, hasta)]
+    if guardado['traza'] == "summary":
+        pagina = [paso[0] for paso in pagina]
+    return jsonify(traza=guardado['traza'], total=len(pasos), desde=desde, hasta=max(hasta, desde), pasos=pagina)
+
+@app.route('/cache')
+def estadisticas_cache():
+    return jsonify(cache_resultados.estadisticas())
+
+@app.route('/pricing')
+def resumen_pricing():
+    return jsonify(estadisticas_pricing.resumen())
+
+@app.route('/reoptimizar', methods=['POST'])
+def reoptimizar_api():
+    """ Re-optimización en JSON: {tipo, c, A, b, desigualdades?, base?}. La respuesta incluye la base
+    óptima para la siguiente llamada y el análisis de sensibilidad """
+    try:
+        datos = request.get_json(force=True)
+        tipo = datos['tipo']
+        c = [float(x) for x in datos['c']]
+        A = [[float(x) for x in fila] for fila in datos['A']]
+        b = [float(x) for x in datos['b']]
 
-            p.showPage()
-            p.save()
+        for i, desigualdad in enumerate(datos.get('desigualdades', [])):
+            if desigualdad == ">=":
+                A[i] = [-x for x in A[i]]
+                b[i] = -b[i]
 
-            buffer.seek(0)
-            return send_file(buffer, as_attachment=True, download_name='resultado.pdf', mimetype='application/pdf')
+        resultado, solucion, holguras, pasos, base, sensibilidad = reoptimizar(c, A, b, tipo, datos.get('base'))
 
-        elif tipo_archivo == 'txt':
-            # Crear un archivo TXT en memoria
-            output = io.StringIO()
-            output.write("Resultado del Método Simplex\n")
-            output.write(f"Valor Óptimo: {resultado}\n")
+        return jsonify(resultado=resultado, solucion=solucion, holguras=holguras, base=[int(j) for j in base],
+                       pivotes=len(pasos), pasos=pasos.tolist(), sensibilidad=sensibilidad)
 
-            for i in range(num_variables):
-                output.write(f"X{i+1} = {solucion[i]}\n")
+    except Exception as e:
+        return jsonify(error=f"Error en la resolución: {e}"), 400
 
-            for i in range(num_restricciones):
-                output.write(f"S{i+1} = {holguras[i]}\n")
+cola_trabajos = ColaTrabajos()
 
-            output.write("Pasos:\n")
-            for i, paso in enumerate(pasos):
-                output.write(f"Iteración {i+1}: {paso}\n")
+def trabajo_resolver(c, A, b, tipo, metodo, traza, usar_presolve, pricing):
+    """ Se ejecuta en un proceso del pool de trabajos; el progreso (pivotes y objetivo) lo reportan los
+    ciclos del simplex """
+    resultado, solucion, holguras, pasos, reduccion = resolver_metodo(c, A, b, tipo, metodo, traza, usar_presolve, pricing)
+    return resultado, solucion, holguras, pasos, reduccion.resumen if reduccion else None, pricing
 
-            buffer = io.BytesIO()
-            buffer.write(output.getvalue().encode('utf-8'))
-            buffer.seek(0)
-            return send_file(buffer, as_attachment=True, download_name='resultado.txt', mimetype='text/plain')
+@app.route('/trabajos', methods=['POST'])
+def enviar_trabajo():
+    """ Resuelve en segundo plano un archivo `modelo` (mismos campos que /cargar) o un JSON
+    {tipo, c, A, b, desigualdades?, metodo?, traza?, presolve?, pricing?, max_iteraciones?}.
+    `plazo` opcional en segundos. Responde 202 con el id del trabajo o 503 si la cola está llena """
+    try:
+        if 'modelo' in request.files:
+            datos = request.form
+            archivo = request.files['modelo']
+            formato = datos.get('formato') or os.path.splitext(archivo.filename)[1].lstrip('.').lower()
+            c, A, b, tipo = leer_modelo(archivo.stream, formato, datos.get('tipo', 'min'))
+            c, b = c.tolist(), b.tolist()
+        else:
+            datos = request.get_json(force=True)
+            tipo = datos['tipo']
+            c = [float(x) for x in datos['c']]
+            A = [[float(x) for x in fila] for fila in datos['A']]
+            b = [float(x) for x in datos['b']]
+            for i, desigualdad in enumerate(datos.get('desigualdades', [])):
+                if desigualdad == ">=":
+                    A[i] = [-x for x in A[i]]
+                    b[i] = -b[i]
+
+        metodo = datos.get('metodo', 'revisado')
+        traza = datos.get('traza', 'summary')
+        if metodo not in METODOS:
+            return jsonify(error="Método no válido"), 400
+        if 'modelo' in request.files:
+            metodo = metodo_modelo(metodo, b)
+        if traza not in Traza.MODOS:
+            return jsonify(error=f"Modo de traza no válido: {traza}"), 400
+        if metodo != "revisado" and sparse.issparse(A):
+            A = A.toarray()
+        usar_presolve = datos.get('presolve', 'off') in ('on', True)
+        max_iteraciones = datos.get('max_iteraciones')
+        pricing = Pricing(datos.get('pricing', 'dantzig'), int(max_iteraciones) if max_iteraciones else None)
+        clase = datos.get('clase') or "general"
+        plazo = float(datos['plazo']) if datos.get('plazo') else None
 
     except Exception as e:
-        return f"Error al generar el archivo: {e}"
+        return jsonify(error=f"Error en los datos: {e}"), 400
+
+    def al_terminar(salida):
+        resultado, solucion, holguras, pasos, presolve, pricing_final = salida
+        estadisticas_pricing.registrar(clase, pricing_final)
+        id_resultado = guardar_resultado(resultado, solucion, holguras, pasos,
+                                         "summary" if metodo == "revisado" and traza == "full" else traza, len(c), len(b))
+        return {"resultado": resultado if isinstance(resultado, str) else float(resultado),
+                "solucion": None if solucion is None else np.asarray(solucion, dtype=float).tolist(),
+                "holguras": None if holguras is None else np.asarray(holguras, dtype=float).tolist(),
+                "pricing": pricing_final.resumen(), "presolve": presolve,
+                "id_resultado": id_resultado, "total_pasos": len(pasos)}
+
+    trabajo = cola_trabajos.enviar(trabajo_resolver, (c, A, b, tipo, metodo, traza, usar_presolve, pricing), plazo, al_terminar)
+    if trabajo is None:
+        return jsonify(error="La cola de trabajos está llena; intenta más tarde"), 503
+    return jsonify(trabajo.resumen()), 202
+
+@app.route('/trabajos')
+def estadisticas_trabajos():
+    return jsonify(cola_trabajos.estadisticas())
+
+@app.route('/trabajos/<id_trabajo>')
+def estado_trabajo(id_trabajo):
+    """ Estado y progreso: pivotes realizados y valor actual del objetivo """
+    cuerpo, codigo = respuesta_estado(cola_trabajos.obtener(id_trabajo))
+    return jsonify(cuerpo), codigo
+
+@app.route('/trabajos/<id_trabajo>/resultado')
+def resultado_trabajo(id_trabajo):
+    """ Resultado en JSON; id_resultado sirve para /pasos y /descargar """
+    cuerpo, codigo = respuesta_resultado(cola_trabajos.obtener(id_trabajo))
+    return jsonify(cuerpo), codigo
+
+@app.route('/trabajos/<id_trabajo>', methods=['DELETE'])
+def cancelar_trabajo(id_trabajo):
+    cuerpo, codigo = respuesta_estado(cola_trabajos.cancelar(id_trabajo))
+    return jsonify(cuerpo), codigo
+
+def lineas_resultado(guardado):
+    """ Reporte de texto de un resultado guardado, línea por línea: cada fila de tabla es una línea """
+    yield "Resultado del Método Simplex"
+    yield f"Valor Óptimo: {guardado['resultado']}"
+    if guardado['solucion'] is not None:
+        for i in range(guardado['num_variables']):
+            yield f"X{i+1} = {guardado['solucion'][i]:.6g}"
+        for i in range(guardado['num_restricciones']):
+            yield f"S{i+1} = {guardado['holguras'][i]:.6g}"
+
+    yield "Pasos:"
+    if guardado['traza'] == "cache":
+        yield "Resultado recuperado de la caché: no se registraron pasos."
+    for i, paso in enumerate(guardado['pasos']):
+        if guardado['traza'] == "summary":
+            yield f"Pivote {i+1}: entra Col {int(paso[0][0])}, sale Col {int(paso[0][1])}, Z = {paso[0][2]:.6g}"
+        else:
+            yield "Tabla final:" if guardado['traza'] == "off" else f"Iteración {i+1}:"
+            for fila in paso:
+                yield "  ".join(f"{valor:10.4f}" for valor in fila)
+
+def filas_resultado(guardado):
+    """ Reporte CSV: (seccion, paso, fila, valores...) """
+    yield ["seccion", "paso", "fila", "valores"]
+    yield ["valor_optimo", "", "", guardado['resultado']]
+    if guardado['solucion'] is not None:
+        for i in range(guardado['num_variables']):
+            yield [f"X{i+1}", "", "", guardado['solucion'][i]]
+        for i in range(guardado['num_restricciones']):
+            yield [f"S{i+1}", "", "", guardado['holguras'][i]]
+    for i, paso in enumerate(guardado['pasos']):
+        if guardado['traza'] == "summary":
+            yield ["pivote", i+1, "", int(paso[0][0]), int(paso[0][1]), paso[0][2]]
+        else:
+            for k, fila in enumerate(paso):
+                yield ["tabla", i+1, k+1, *fila]
+
+@app.route('/descargar', methods=['POST'])
+def descargar():
+    """ Descarga el resultado guardado en el servidor; el archivo se genera por flujo a partir de la traza """
+    tipo_archivo = request.form.get('tipo_archivo', 'pdf')
+    if tipo_archivo not in FORMATOS_DESCARGA:
+        return "Tipo de archivo no válido", 400
+
+    guardado = almacen_resultados.obtener(request.form.get('id_resultado', ''))
+    if guardado is None:
+        return "El resultado ya no está disponible; vuelve a resolver el problema", 404
 
+    return descarga(tipo_archivo, lineas_resultado(guardado), filas_resultado(guardado))
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -1,18 +1,37 @@
-from flask import Flask, render_template, request, send_file
+from flask import Flask, render_template, request, jsonify
 import numpy as np
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from scipy import sparse
+from scipy.optimize import linprog, linear_sum_assignment
+from contextlib import contextmanager
+import multiprocessing
+from multiprocessing.connection import wait
 import io
+import os
+import tempfile
+import threading
+import time
+from reportes import AlmacenResultados, FORMATOS_DESCARGA, descarga, sin_html
+from trabajos import ColaTrabajos, reportar_progreso, respuesta_estado, respuesta_resultado
 
 app = Flask(__name__)
 
+TOLERANCIA = 1e-9  # Tolerancia relativa para los costos reducidos
+MAX_ITERACIONES_MODI = 100000  # Pivotes máximos del simplex de transporte
+LIMITE_ITERACIONES_MODI = "El método MODI alcanzó el límite de iteraciones sin llegar a la solución óptima."
+UMBRAL_MMAP = 16 * 1024 * 1024  # Los .npy más grandes que esto se leen con memoria mapeada
+PLAZO_HEURISTICAS = float(os.environ.get("PLAZO_HEURISTICAS", "10"))  # Segundos para la carrera de heurísticas
+TAMANO_PAGINA_ASIGNACIONES = 100  # Asignaciones por página en los resultados dispersos
+
 def esquina_noroeste(supply, demand, cost_matrix):
     rows, cols = len(supply), len(demand)
     allocation = np.zeros((rows, cols))
     i, j = 0, 0
+    asignadas = 0
     while i < rows and j < cols:
         qty = min(supply[i], demand[j])
         allocation[i, j] = qty
+        asignadas += 1
+        reportar_progreso(asignaciones=asignadas)
         supply[i] -= qty
         demand[j] -= qty
         if supply[i] == 0:
@@ -22,70 +41,123 @@ def esquina_noroeste(supply, demand, cost_matrix):
     return allocation
 
 def menor_costo(supply, demand, cost_matrix):
-    supply = supply.copy()
-    demand = demand.copy()
+    """ Recorre las celdas una sola vez en orden de costo, saltando filas y columnas agotadas.
+    El orden estable sobre la matriz aplanada desempata igual que argmin (primera celda por filas) """
+    oferta = supply.tolist()
+    demanda = demand.tolist()
     allocation = np.zeros_like(cost_matrix)
-    
-    while np.any(supply > 0) and np.any(demand > 0):
-        min_cost_index = np.unravel_index(np.argmin(np.where((supply[:, None] > 0) & (demand > 0), cost_matrix, np.inf)), cost_matrix.shape)
-        i, j = min_cost_index
-        qty = min(supply[i], demand[j])
-        allocation[i, j] = qty
-        supply[i] -= qty
-        demand[j] -= qty
-    
+    filas_activas = sum(1 for x in oferta if x > 0)
+    columnas_activas = sum(1 for x in demanda if x > 0)
+    columnas = cost_matrix.shape[1]
+    asignadas = 0
+
+    for celda in np.argsort(cost_matrix, axis=None, kind="stable").tolist():
+        if not (filas_activas and columnas_activas):
+            break
+        i, j = divmod(celda, columnas)
+        if oferta[i] > 0 and demanda[j] > 0:
+            qty = min(oferta[i], demanda[j])
+            allocation[i, j] = qty
+            asignadas += 1
+            reportar_progreso(asignaciones=asignadas)
+            oferta[i] -= qty
+            demanda[j] -= qty
+            filas_activas -= oferta[i] <= 0
+            columnas_activas -= demanda[j] <= 0
+
     return allocation
 
+class PenalizacionesVogel:
+    """ Penalizaciones de Vogel de las filas de `costos` (para las columnas se usa la traspuesta).
+    Cada fila se ordena una sola vez (orden estable, así el primer mínimo es el de menor índice) y
+    guarda punteros a sus dos celdas más baratas entre las columnas activas. Al agotarse una columna
+    solo se actualizan las filas que la usaban, y los punteros solo avanzan """
+
+    def __init__(self, costos, activas):
+        self.costos = costos
+        self.orden = np.argsort(costos, axis=1, kind="stable")
+        self.activas = activas
+        self.primero = np.zeros(len(costos), dtype=np.int64)
+        self.segundo = np.ones(len(costos), dtype=np.int64)
+        self.penalizacion = np.full(len(costos), -1.0)
+
+    def enlazar(self, otras):
+        """ Las columnas activas son las líneas activas de las penalizaciones de la traspuesta """
+        self.otras = otras.activas
+        self._avanzar(np.arange(len(self.costos)))
+
+    def _saltar(self, punteros, lineas):
+        """ Avanza los punteros de las líneas dadas hasta la siguiente columna activa """
+        n = self.orden.shape[1]
+        while len(lineas):
+            lineas = lineas[punteros[lineas] < n]
+            lineas = lineas[~self.otras[self.orden[lineas, punteros[lineas]]]]
+            punteros[lineas] += 1
+
+    def _avanzar(self, lineas):
+        n = self.orden.shape[1]
+        self._saltar(self.primero, lineas)
+        self.segundo[lineas] = np.maximum(self.segundo[lineas], self.primero[lineas] + 1)
+        self._saltar(self.segundo, lineas)
+
+        # Con menos de dos columnas activas la penalización es 0, como en el cálculo original
+        primero = np.minimum(self.primero[lineas], n - 1)
+        segundo = np.minimum(self.segundo[lineas], n - 1)
+        diferencia = (self.costos[lineas, self.orden[lineas, segundo]]
+                      - self.costos[lineas, self.orden[lineas, primero]])
+        self.penalizacion[lineas] = np.where(self.segundo[lineas] < n, diferencia, 0)
+        self.penalizacion[lineas[~self.activas[lineas]]] = -1
+
+    def minimo(self, linea):
+        """ Columna activa de menor costo de la línea (la de menor índice en caso de empate) """
+        return self.orden[linea, self.primero[linea]]
+
+    def desactivar(self, linea):
+        self.activas[linea] = False
+        self.penalizacion[linea] = -1
+
+    def otra_agotada(self, columna):
+        """ Recalcula solo las filas activas cuyas dos celdas más baratas incluían la columna agotada """
+        n = self.orden.shape[1]
+        lineas = np.flatnonzero(self.activas)
+        usadas = ((self.orden[lineas, np.minimum(self.primero[lineas], n - 1)] == columna)
+                  | (self.orden[lineas, np.minimum(self.segundo[lineas], n - 1)] == columna))
+        self._avanzar(lineas[usadas])
+
 def aproximacion_vogel(supply, demand, cost_matrix):
     supply = supply.copy()
     demand = demand.copy()
     allocation = np.zeros_like(cost_matrix)
-    
-    while np.any(supply > 0) and np.any(demand > 0):
-        penalty_rows = []
-        penalty_cols = []
-        
-        # Cálculo de penalizaciones por fila
-        for i in range(len(supply)):
-            if supply[i] > 0:
-                row = cost_matrix[i, :]
-                row_valid = row[demand > 0]
-                if len(row_valid) > 1:
-                    sorted_row = np.sort(row_valid)
-                    penalty_rows.append(sorted_row[1] - sorted_row[0])
-                else:
-                    penalty_rows.append(0)
-            else:
-                penalty_rows.append(-1)
-
-        # Cálculo de penalizaciones por columna
-        for j in range(len(demand)):
-            if demand[j] > 0:
-                col = cost_matrix[:, j]
-                col_valid = col[supply > 0]
-                if len(col_valid) > 1:
-                    sorted_col = np.sort(col_valid)
-                    penalty_cols.append(sorted_col[1] - sorted_col[0])
-                else:
-                    penalty_cols.append(0)
-            else:
-                penalty_cols.append(-1)
-        
-        # Determinar si la penalización más alta está en fila o columna
-        max_penalty_row = np.max(penalty_rows)
-        max_penalty_col = np.max(penalty_cols)
 
-        if max_penalty_row >= max_penalty_col:
-            i = np.argmax(penalty_rows)
-            j = np.argmin(np.where(demand > 0, cost_matrix[i, :], np.inf))
+    # Penalizaciones por fila y por columna, mantenidas de forma incremental
+    filas = PenalizacionesVogel(cost_matrix, supply > 0)
+    columnas = PenalizacionesVogel(cost_matrix.T, demand > 0)
+    filas.enlazar(columnas)
+    columnas.enlazar(filas)
+    asignadas = 0
+
+    while filas.activas.any() and columnas.activas.any():
+        # Determinar si la penalización más alta está en fila o columna
+        if np.max(filas.penalizacion) >= np.max(columnas.penalizacion):
+            i = np.argmax(filas.penalizacion)
+            j = filas.minimo(i)
         else:
-            j = np.argmax(penalty_cols)
-            i = np.argmin(np.where(supply > 0, cost_matrix[:, j], np.inf))
+            j = np.argmax(columnas.penalizacion)
+            i = columnas.minimo(j)
 
         qty = min(supply[i], demand[j])
         allocation[i, j] = qty
         supply[i] -= qty
         demand[j] -= qty
+        asignadas += 1
+        reportar_progreso(asignaciones=asignadas)
+
+        if supply[i] == 0:
+            filas.desactivar(i)
+            columnas.otra_agotada(i)
+        if demand[j] == 0:
+            columnas.desactivar(j)
+            filas.otra_agotada(j)
 
     return allocation
 
@@ -93,7 +165,7 @@ def calcular_costo_total(allocation, cost_matrix):
     return np.sum(allocation * cost_matrix)
 
 def es_solucion_degenerada(allocation, filas, columnas):
-    celdas_asignadas = np.count_nonzero(allocation)
+    celdas_asignadas = allocation.count_nonzero() if sparse.issparse(allocation) else np.count_nonzero(allocation)
     celdas_requeridas = filas + columnas - 1
     
     explicacion = f"🔎 <strong>Cálculo de degeneración:</strong><br>"
@@ -108,101 +180,421 @@ def es_solucion_degenerada(allocation, filas, columnas):
         return False, explicacion
     
     
-def metodo_modi(allocation, cost_matrix):
-    rows, cols = allocation.shape
-    u = np.zeros(rows)
-    v = np.zeros(cols)
-    u[0] = 0  # Asignamos un valor inicial a u[0]
-
-    # Calcular u y v
-    for i in range(rows):
-        for j in range(cols):
-            if allocation[i, j] > 0:
-                if u[i] != np.inf and v[j] == np.inf:
-                    v[j] = cost_matrix[i, j] - u[i]
-                elif v[j] != np.inf and u[i] == np.inf:
-                    u[i] = cost_matrix[i, j] - v[j]
-
-    # Calcular los costos reducidos
-    costos_reducidos = np.zeros_like(cost_matrix)
-    for i in range(rows):
-        for j in range(cols):
-            costos_reducidos[i, j] = cost_matrix[i, j] - (u[i] + v[j])
-
-    # Verificar si la solución es óptima
-    if np.all(costos_reducidos >= 0):
-        return True, allocation  # La solución es óptima
-
-    # Si no es óptima, encontrar la celda con el costo reducido más negativo
-    i, j = np.unravel_index(np.argmin(costos_reducidos), costos_reducidos.shape)
-
-    # Encontrar el ciclo y ajustar la asignación
-    # (Aquí se necesita una implementación más completa para encontrar el ciclo)
-    # Por simplicidad, asumimos que encontramos el ciclo y ajustamos la asignación
-    # Esto es un placeholder para la lógica completa del ciclo
-
-    return False, allocation  # La solución no es óptima, pero se ajustó
+class ArbolBase:
+    """ Celdas básicas del problema de transporte como árbol generador del grafo bipartito
+    (nodos 0..m-1 para las filas y m..m+n-1 para las columnas). Los potenciales y el ciclo de
+    cada pivote salen de recorrer el árbol, sin buscar el ciclo celda por celda """
+
+    def __init__(self, allocation, cost_matrix):
+        self.rows, self.cols = cost_matrix.shape
+        self.vecinos = [set() for _ in range(self.rows + self.cols)]
+        componente = list(range(self.rows + self.cols))
+
+        def raiz(k):
+            while componente[k] != k:
+                componente[k] = componente[componente[k]]
+                k = componente[k]
+            return k
+
+        def unir(i, j):
+            a, b = raiz(i), raiz(self.rows + j)
+            if a == b:
+                return False
+            componente[a] = b
+            self.agregar(i, j)
+            return True
+
+        for i, j in zip(*np.nonzero(allocation > 0)):
+            if not unir(i, j):
+                raise ValueError("La asignación inicial contiene un ciclo: no es una solución básica")
+
+        # Degeneración: se completan m + n - 1 celdas con celdas épsilon (asignación 0) de menor costo
+        faltantes = self.rows + self.cols - 1 - sum(len(v) for v in self.vecinos) // 2
+        if faltantes:
+            for celda in np.argsort(cost_matrix, axis=None, kind="stable"):
+                if unir(*divmod(int(celda), self.cols)):
+                    faltantes -= 1
+                    if not faltantes:
+                        break
+
+    def agregar(self, i, j):
+        self.vecinos[i].add(self.rows + j)
+        self.vecinos[self.rows + j].add(i)
+
+    def quitar(self, i, j):
+        self.vecinos[i].discard(self.rows + j)
+        self.vecinos[self.rows + j].discard(i)
+
+    def recorrer(self, cost_matrix):
+        """ Recorre el árbol desde la fila 0 y devuelve los potenciales (u, v), el padre y la profundidad """
+        total = self.rows + self.cols
+        potencial = np.zeros(total)
+        padre = np.full(total, -1)
+        profundidad = np.zeros(total, dtype=int)
+        pendientes = [0]
+        visitado = np.zeros(total, dtype=bool)
+        visitado[0] = True
+        while pendientes:
+            k = pendientes.pop()
+            for h in self.vecinos[k]:
+                if not visitado[h]:
+                    visitado[h] = True
+                    padre[h] = k
+                    profundidad[h] = profundidad[k] + 1
+                    # u_i + v_j = c_ij en cada celda básica
+                    costo = cost_matrix[k, h - self.rows] if k < self.rows else cost_matrix[h, k - self.rows]
+                    potencial[h] = costo - potencial[k]
+                    pendientes.append(h)
+        return potencial[:self.rows], potencial[self.rows:], padre, profundidad
+
+    def ciclo(self, i, j, padre, profundidad):
+        """ Celdas del camino del árbol de la columna j a la fila i, en orden desde la columna j """
+        a, b = i, self.rows + j
+        desde_b, desde_a = [], []
+        while a != b:
+            if profundidad[b] >= profundidad[a]:
+                desde_b.append(self._celda(b, padre[b]))
+                b = padre[b]
+            else:
+                desde_a.append(self._celda(a, padre[a]))
+                a = padre[a]
+        return desde_b + desde_a[::-1]
+
+    def _celda(self, k, h):
+        return (k, h - self.rows) if k < self.rows else (h, k - self.rows)
+
+def transporte_simplex(allocation, cost_matrix, max_iteraciones=MAX_ITERACIONES_MODI):
+    """ Método MODI (simplex de transporte) hasta la optimalidad a partir de una solución básica.
+    Devuelve la asignación óptima y el número de pivotes realizados, o LIMITE_ITERACIONES_MODI en lugar
+    de la asignación si se agotan los pivotes """
+    allocation = np.array(allocation, dtype=float)
+    arbol = ArbolBase(allocation, cost_matrix)
+    escala = max(1.0, float(np.max(np.abs(cost_matrix), initial=0)))
+
+    for iteracion in range(max_iteraciones):
+        u, v, padre, profundidad = arbol.recorrer(cost_matrix)
+        costos_reducidos = cost_matrix - u[:, None] - v[None, :]
+        i, j = np.unravel_index(np.argmin(costos_reducidos), costos_reducidos.shape)
+        if costos_reducidos[i, j] >= -TOLERANCIA * escala:
+            return allocation, iteracion
+
+        # Ciclo: (i, j) entra con +, las celdas del camino alternan -, +, -, ... desde la columna j
+        camino = arbol.ciclo(i, j, padre, profundidad)
+        restan = camino[0::2]
+        suman = camino[1::2]
+        valores = [allocation[celda] for celda in restan]
+        saliente = restan[int(np.argmin(valores))]
+        theta = min(valores)
+
+        for celda in restan:
+            allocation[celda] -= theta
+        for celda in suman:
+            allocation[celda] += theta
+        allocation[i, j] += theta
+        allocation[saliente] = 0
+        arbol.quitar(*saliente)
+        arbol.agregar(i, j)
+        reportar_progreso(pivotes_modi=iteracion + 1)
+
+    return LIMITE_ITERACIONES_MODI, max_iteraciones
+
+HEURISTICAS = {
+    "Esquina Noroeste": esquina_noroeste,
+    "Menor Costo": menor_costo,
+    "Aproximación de Vogel": aproximacion_vogel,
+}
+
+class TrabajadorHeuristicas:
+    """ Proceso propio (spawn: no hereda los hilos ni los candados del servidor) que ejecuta heurísticas
+    una tras otra; recibe los datos y devuelve el resultado por un Pipe """
+
+    def __init__(self, contexto):
+        self.conexion, extremo = contexto.Pipe()
+        self.proceso = contexto.Process(target=_atender_heuristicas, args=(extremo,), daemon=True)
+        self.proceso.start()
+        extremo.close()
+
+    def terminar(self):
+        self.proceso.terminate()
+        self.proceso.join()
+        self.conexion.close()
+
+class PoolHeuristicas:
+    """ Trabajadores libres, creados bajo demanda. Cada carrera toma los suyos en exclusiva, así que
+    puede terminar los que se pasan de plazo sin afectar a otras carreras; los que terminan a tiempo
+    vuelven al pool ya arrancados """
+
+    def __init__(self):
+        self._contexto = multiprocessing.get_context("spawn")
+        self._libres = []
+        self._candado = threading.Lock()
+
+    def tomar(self):
+        with self._candado:
+            while self._libres:
+                trabajador = self._libres.pop()
+                if trabajador.proceso.is_alive():
+                    return trabajador
+                trabajador.conexion.close()
+        return TrabajadorHeuristicas(self._contexto)
+
+    def devolver(self, trabajador):
+        with self._candado:
+            self._libres.append(trabajador)
+
+pool_heuristicas = PoolHeuristicas()
+
+def _ejecutar_heuristica(nombre, supply, demand, cost_matrix):
+    """ Devuelve la solución inicial y su tiempo """
+    inicio = time.perf_counter()
+    allocation = HEURISTICAS[nombre](supply.copy(), demand.copy(), cost_matrix)
+    return allocation, time.perf_counter() - inicio
+
+def _atender_heuristicas(conexion):
+    """ Bucle del proceso trabajador: termina cuando el servidor cierra su extremo del Pipe """
+    while True:
+        try:
+            nombre, supply, demand, cost_matrix = conexion.recv()
+        except EOFError:
+            return
+        try:
+            conexion.send(("ok", _ejecutar_heuristica(nombre, supply, demand, cost_matrix)))
+        except Exception as e:
+            conexion.send(("error", str(e)))
+
+def carrera_heuristicas(supply, demand, cost_matrix, plazo=PLAZO_HEURISTICAS):
+    """ Ejecuta las tres heurísticas en paralelo y se queda con la de menor costo entre las que terminan
+    dentro del plazo. Al vencer el plazo se terminan los procesos de esta carrera que siguen ocupados; si
+    ninguna heurística terminó, la esquina noroeste (lineal en filas + columnas) se calcula aquí para
+    tener siempre una solución factible. Devuelve (nombre, solución, resultados por heurística) """
+    limite = time.monotonic() + plazo
+    resultados = {}
+    soluciones = {}
+    ocupados = {}
+    for nombre in HEURISTICAS:
+        trabajador = pool_heuristicas.tomar()
+        try:
+            trabajador.conexion.send((nombre, supply, demand, cost_matrix))
+            ocupados[trabajador.conexion] = (nombre, trabajador)
+        except OSError as e:
+            trabajador.terminar()
+            resultados[nombre] = {"estado": f"error: {e}", "tiempo": None, "costo": None}
+
+    while ocupados:
+        listas = wait(list(ocupados), timeout=max(0.0, limite - time.monotonic()))
+        if not listas:
+            break
+        for conexion in listas:
+            nombre, trabajador = ocupados.pop(conexion)
+            try:
+                estado, salida = conexion.recv()
+            except EOFError:
+                trabajador.terminar()
+                resultados[nombre] = {"estado": "error: el proceso terminó inesperadamente", "tiempo": None, "costo": None}
+                continue
+            pool_heuristicas.devolver(trabajador)
+            if estado != "ok":
+                resultados[nombre] = {"estado": f"error: {salida}", "tiempo": None, "costo": None}
+                continue
+            allocation, tiempo = salida
+            soluciones[nombre] = allocation
+            resultados[nombre] = {"estado": "ok", "tiempo": tiempo, "costo": float(calcular_costo_total(allocation, cost_matrix))}
+
+    for nombre, trabajador in ocupados.values():
+        trabajador.terminar()
+        resultados[nombre] = {"estado": "fuera de plazo", "tiempo": None, "costo": None}
+
+    if not soluciones:
+        nombre = "Esquina Noroeste"
+        allocation, tiempo = _ejecutar_heuristica(nombre, supply, demand, cost_matrix)
+        soluciones[nombre] = allocation
+        resultados[nombre] = {"estado": "ok", "tiempo": tiempo, "costo": float(calcular_costo_total(allocation, cost_matrix))}
+    mejor = min(soluciones, key=lambda nombre: resultados[nombre]["costo"])
+    return mejor, soluciones[mejor], {nombre: resultados[nombre] for nombre in HEURISTICAS}
+
+def carrera_secuencial(supply, demand, cost_matrix):
+    """ La carrera para los trabajos en segundo plano: el trabajo ya ocupa un proceso del pool de
+    trabajos, así que las heurísticas se ejecutan una tras otra en él sin abrir otro pool """
+    resultados = {}
+    soluciones = {}
+    for nombre in HEURISTICAS:
+        reportar_progreso(heuristica=nombre, asignaciones=0)
+        allocation, tiempo = _ejecutar_heuristica(nombre, supply, demand, cost_matrix)
+        soluciones[nombre] = allocation
+        resultados[nombre] = {"estado": "ok", "tiempo": tiempo, "costo": float(calcular_costo_total(allocation, cost_matrix))}
+    mejor = min(soluciones, key=lambda nombre: resultados[nombre]["costo"])
+    return mejor, soluciones[mejor], resultados
+
+class EstadisticasHeuristicas:
+    """ Acumulado por heurística: ejecuciones, tiempo, veces que dio el mejor inicio en la carrera y
+    pivotes MODI necesarios desde su solución, para ver qué inicio ahorra más iteraciones """
+
+    def __init__(self):
+        self._datos = {}
+        self._candado = threading.Lock()
+
+    def _entrada(self, nombre):
+        return self._datos.setdefault(nombre, {"ejecuciones": 0, "tiempo": 0.0, "elegida": 0,
+                                               "optimizaciones": 0, "pivotes_modi": 0})
+
+    def registrar_carrera(self, resultados, elegida):
+        with self._candado:
+            for nombre, resultado in resultados.items():
+                if resultado["estado"] == "ok":
+                    datos = self._entrada(nombre)
+                    datos["ejecuciones"] += 1
+                    datos["tiempo"] += resultado["tiempo"]
+            self._entrada(elegida)["elegida"] += 1
+
+    def registrar_modi(self, nombre, pivotes):
+        with self._candado:
+            datos = self._entrada(nombre)
+            datos["optimizaciones"] += 1
+            datos["pivotes_modi"] += pivotes
+
+    def resumen(self):
+        with self._candado:
+            return {nombre: dict(datos, promedio_pivotes_modi=datos["pivotes_modi"] / datos["optimizaciones"]
+                                 if datos["optimizaciones"] else None)
+                    for nombre, datos in self._datos.items()}
+
+estadisticas_heuristicas = EstadisticasHeuristicas()
+
+def balanceado(supply, demand):
+    """ Oferta y demanda totales iguales salvo el error de redondeo de los datos decimales """
+    return bool(np.isclose(np.sum(supply), np.sum(demand), rtol=1e-9, atol=TOLERANCIA))
+
+def es_problema_asignacion(supply, demand):
+    """ Cuadrado y con toda oferta y demanda igual a 1: es un problema de asignación """
+    return len(supply) == len(demand) and np.all(supply == 1) and np.all(demand == 1)
+
+def resolver_asignacion(cost_matrix):
+    """ Problema de asignación en O(n³) con linear_sum_assignment (Jonker-Volgenant), sin pasar por
+    la solución inicial ni por MODI, que son muy degenerados en este caso """
+    filas, columnas = linear_sum_assignment(cost_matrix)
+    allocation = np.zeros_like(cost_matrix)
+    allocation[filas, columnas] = 1
+    return allocation
+
+def flujo_costo_minimo(supply, demand, origenes, destinos, costos):
+    """ Transporte sobre una lista dispersa de carriles permitidos (origen, destino, costo) como flujo
+    de costo mínimo: la matriz de incidencia nodo-carril se resuelve con el simplex dual de HiGHS, cuya
+    solución básica es entera si los datos lo son. Si la oferta y la demanda no coinciden se agrega un
+    nodo ficticio unido a todos con costo 0. Todo escala con el número de carriles, no con m x n.
+    Devuelve (asignación CSR m x n, costo total, cantidad ficticia) o un mensaje de error """
+    supply = np.asarray(supply, dtype=float)
+    demand = np.asarray(demand, dtype=float)
+    origenes = np.asarray(origenes, dtype=np.int64)
+    destinos = np.asarray(destinos, dtype=np.int64)
+    costos = np.asarray(costos, dtype=float)
+    rows, cols = len(supply), len(demand)
+    if len(origenes) and (origenes.min() < 0 or origenes.max() >= rows or destinos.min() < 0 or destinos.max() >= cols):
+        raise ValueError("Hay carriles con orígenes o destinos fuera de rango")
+
+    # Nodo ficticio: demanda extra (recibe de todos los orígenes) u oferta extra (envía a todos los destinos)
+    ficticia = 0.0 if balanceado(supply, demand) else supply.sum() - demand.sum()
+    nodos_origen, nodos_destino = origenes, rows + destinos
+    if ficticia > 0:
+        nodos_origen = np.concatenate([nodos_origen, np.arange(rows)])
+        nodos_destino = np.concatenate([nodos_destino, np.full(rows, rows + cols)])
+        b = np.concatenate([supply, demand, [ficticia]])
+    elif ficticia < 0:
+        nodos_origen = np.concatenate([nodos_origen, np.full(cols, rows + cols)])
+        nodos_destino = np.concatenate([nodos_destino, rows + np.arange(cols)])
+        b = np.concatenate([supply, demand, [-ficticia]])
+    else:
+        b = np.concatenate([supply, demand])
+    num_carriles = len(nodos_origen)
+    c = np.concatenate([costos, np.zeros(num_carriles - len(costos))])
+
+    incidencia = sparse.csr_matrix(
+        (np.ones(2 * num_carriles), (np.concatenate([nodos_origen, nodos_destino]), np.tile(np.arange(num_carriles), 2))),
+        shape=(len(b), num_carriles))
+    resultado = linprog(c, A_eq=incidencia, b_eq=b, bounds=(0, None), method="highs-ds")
+    if resultado.status == 2:
+        return "No existe una asignación factible con los carriles permitidos.", None, None
+    if resultado.status != 0:
+        return f"Error en el flujo de costo mínimo: {resultado.message}", None, None
+
+    flujo = resultado.x[:len(costos)]
+    flujo[flujo < TOLERANCIA] = 0
+    allocation = sparse.csr_matrix((flujo, (origenes, destinos)), shape=(rows, cols))
+    allocation.sum_duplicates()
+    allocation.eliminate_zeros()
+    return allocation, float(costos @ flujo), abs(ficticia)
+
+def costos_asignados(solucion, origenes, destinos, costos):
+    """ Costo unitario de cada celda asignada de la solución CSR, en el orden de solucion.data. Si un
+    carril se repite se toma el más barato, que es el que usa el flujo de costo mínimo """
+    cols = solucion.shape[1]
+    claves = np.asarray(origenes, dtype=np.int64) * cols + np.asarray(destinos, dtype=np.int64)
+    orden = np.lexsort((costos, claves))
+    claves, costos = claves[orden], np.asarray(costos, dtype=float)[orden]
+    primeros = np.concatenate([[True], claves[1:] != claves[:-1]])
+    claves, costos = claves[primeros], costos[primeros]
+    filas = np.repeat(np.arange(solucion.shape[0], dtype=np.int64), np.diff(solucion.indptr))
+    return costos[np.searchsorted(claves, filas * cols + solucion.indices)]
+
+def pagina_asignaciones(solucion, costos, desde, hasta):
+    """ [origen, destino, cantidad, costo] (origen y destino desde 1) de las asignaciones [desde, hasta)
+    de la solución CSR; solo se recorren las celdas de la página """
+    k = np.arange(desde, hasta)
+    filas = np.searchsorted(solucion.indptr, k, side="right") - 1
+    return [[int(i) + 1, int(j) + 1, float(cantidad), float(costo)]
+            for i, j, cantidad, costo in zip(filas, solucion.indices[k], solucion.data[k], costos[k])]
+
+def leer_vector(texto):
+    """ Números separados por comas o espacios """
+    return np.array(texto.replace(",", " ").split(), dtype=float)
+
+almacen_resultados = AlmacenResultados()
+
+def guardar_resultado(solucion, metodo, costo_total, degenerada, optimalidad, costos=None):
+    """ Guarda el resultado para descargarlo después; la solución puede ser densa o CSR. costos es el
+    costo unitario de cada asignación de una solución CSR (ver costos_asignados) """
+    return almacen_resultados.guardar({"solucion": solucion, "metodo": metodo, "costo_total": costo_total, "costos": costos,
+                                       "degenerada": sin_html(degenerada), "optimalidad": sin_html(optimalidad)})
+
+def asignaciones(solucion, costos=None):
+    """ (origen, destino, cantidad, costo o None) de las celdas con asignación, por filas """
+    if sparse.issparse(solucion):
+        coo = solucion.tocoo()
+        return zip(coo.row.tolist(), coo.col.tolist(), coo.data.tolist(),
+                   costos.tolist() if costos is not None else [None] * coo.nnz)
+    solucion = np.asarray(solucion)
+    filas, columnas = np.nonzero(solucion)
+    return zip(filas.tolist(), columnas.tolist(), solucion[filas, columnas].tolist(), [None] * len(filas))
+
+def lineas_resultado(guardado):
+    yield "Resultado del Método de Transporte"
+    yield f"Método: {guardado['metodo']}"
+    yield f"Costo Total: {guardado['costo_total']}"
+    yield ""
+    yield "Asignaciones (celdas distintas de cero):"
+    for i, j, cantidad, costo in asignaciones(guardado['solucion'], guardado['costos']):
+        yield f"Celda [{i+1}, {j+1}]: {cantidad:g}" + (f" (costo unitario {costo:g})" if costo is not None else "")
+    yield ""
+    yield guardado['degenerada']
+    yield guardado['optimalidad']
+
+def filas_resultado(guardado):
+    con_costos = guardado['costos'] is not None
+    yield ["origen", "destino", "cantidad"] + (["costo"] if con_costos else [])
+    for i, j, cantidad, costo in asignaciones(guardado['solucion'], guardado['costos']):
+        yield [i+1, j+1, cantidad] + ([costo] if con_costos else [])
 
 @app.route('/descargar', methods=['POST'])
 def descargar():
-    try:
-        tipo_archivo = request.form['tipo_archivo']
-        solucion = request.form.getlist('solucion[]')
-        costo_total = request.form['costo_total']
-        degenerada = request.form['degenerada']
-        optimalidad = request.form['optimalidad']
-        filas = int(request.form['filas'])
-        columnas = int(request.form['columnas'])
-
-        if tipo_archivo == 'pdf':
-            # Crear un archivo PDF en memoria
-            buffer = io.BytesIO()
-            p = canvas.Canvas(buffer, pagesize=letter)
-            p.drawString(100, 750, "Resultado del Método de Transporte")
-            p.drawString(100, 730, f"Costo Total: {costo_total}")
-
-            y = 710
-            p.drawString(100, y, "Asignaciones:")
-            y -= 20
-
-            for i in range(filas - 1):
-                for j in range(columnas - 1):
-                    p.drawString(100, y, f"Celda [{i+1}, {j+1}]: {solucion[i * (columnas - 1) + j]}")
-                    y -= 20
-
-            p.drawString(100, y, degenerada)
-            y -= 20
-            p.drawString(100, y, optimalidad)
-
-            p.showPage()
-            p.save()
-
-            buffer.seek(0)
-            return send_file(buffer, as_attachment=True, download_name='resultado.pdf', mimetype='application/pdf')
-
-        elif tipo_archivo == 'txt':
-            # Crear un archivo TXT en memoria
-            output = io.StringIO()
-            output.write("Resultado del Método de Transporte\n")
-            output.write(f"Costo Total: {costo_total}\n\n")
-            output.write("Asignaciones:\n")
-
-            for i in range(filas - 1):
-                for j in range(columnas - 1):
-                    output.write(f"Celda [{i+1}, {j+1}]: {solucion[i * (columnas - 1) + j]}\n")
-
-            output.write(f"\n{degenerada}\n")
-            output.write(f"\n{optimalidad}\n")
-
-            buffer = io.BytesIO()
-            buffer.write(output.getvalue().encode('utf-8'))
-            buffer.seek(0)
-            return send_file(buffer, as_attachment=True, download_name='resultado.txt', mimetype='text/plain')
-
-    except Exception as e:
-        return f"Error al generar el archivo: {e}"
+    """ Descarga el resultado guardado en el servidor; solo se escriben las asignaciones distintas de cero """
+    tipo_archivo = request.form.get('tipo_archivo', 'pdf')
+    if tipo_archivo not in FORMATOS_DESCARGA:
+        return "Tipo de archivo no válido", 400
 
+    guardado = almacen_resultados.obtener(request.form.get('id_resultado', ''))
+    if guardado is None:
+        return "El resultado ya no está disponible; vuelve a resolver el problema", 404
 
+    return descarga(tipo_archivo, lineas_resultado(guardado), filas_resultado(guardado))
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -228,23 +620,120 @@ def resolver():
 
     for i in range(filas - 1):
         for j in range(columnas - 1):
-            cost_matrix[i, j] = int(request.form.get(f"cost_{i}_{j}", 0))
+            cost_matrix[i, j] = float(request.form.get(f"cost_{i}_{j}", 0))
 
     for i in range(filas - 1):
-        supply[i] = int(request.form.get(f"supply_{i}", 0))
+        supply[i] = float(request.form.get(f"supply_{i}", 0))
 
     for j in range(columnas - 1):
-        demand[j] = int(request.form.get(f"demand_{j}", 0))
+        demand[j] = float(request.form.get(f"demand_{j}", 0))
+
+    return resolver_transporte(supply, demand, cost_matrix, metodo)
 
-    if sum(supply) != sum(demand):
+@app.route("/cargar", methods=["POST"])
+def cargar():
+    """ Matriz de costos desde un archivo CSV, .npy o .npz (que puede traer también la oferta y la
+    demanda); si no, la oferta y la demanda llegan como listas separadas por comas """
+    try:
+        with leer_arreglos(request.files["costos"]) as datos:
+            return resolver_cargado(datos)
+
+    except Exception as e:
+        return f"Error en la resolución: {e}"
+
+def resolver_cargado(datos):
+    """ Resuelve los arreglos de /cargar. Es una función aparte para que al volver no quede ninguna
+    referencia a la matriz mapeada y leer_arreglos pueda borrar el archivo temporal """
+    cost_matrix = np.asarray(datos["costos"], dtype=float)
+    supply = np.asarray(datos["oferta"], dtype=float) if "oferta" in datos else leer_vector(request.form["oferta"])
+    demand = np.asarray(datos["demanda"], dtype=float) if "demanda" in datos else leer_vector(request.form["demanda"])
+
+    if cost_matrix.shape != (len(supply), len(demand)):
+        return f"Error: la matriz de costos es {cost_matrix.shape[0]} x {cost_matrix.shape[1]} pero hay {len(supply)} ofertas y {len(demand)} demandas."
+
+    return resolver_transporte(supply, demand, cost_matrix, request.form.get("metodo", ""), disperso=True)
+
+def _archivo_temporal(temporales):
+    """ Ruta de un .npy temporal nuevo; queda en temporales para borrarlo al terminar """
+    descriptor, ruta = tempfile.mkstemp(suffix=".npy")
+    os.close(descriptor)
+    temporales.append(ruta)
+    return ruta
+
+def _a_float64(origen, ruta):
+    """ Copia un arreglo mapeado de otro tipo a un .npy float64 también mapeado, por bloques de filas:
+    astype formaría la matriz completa en memoria """
+    if origen.ndim != 2:
+        raise ValueError("La matriz de costos del .npy debe ser bidimensional")
+    destino = np.lib.format.open_memmap(ruta, mode="w+", dtype=np.float64, shape=origen.shape)
+    filas_bloque = max(1, UMBRAL_MMAP // max(1, origen.shape[1] * 8))
+    for inicio in range(0, origen.shape[0], filas_bloque):
+        destino[inicio:inicio + filas_bloque] = origen[inicio:inicio + filas_bloque]
+    destino.flush()
+    return destino
+
+@contextmanager
+def leer_arreglos(archivo):
+    """ Con with, da {"costos": ..., ["oferta": ..., "demanda": ...]} desde CSV, .npy o .npz. Los .npy
+    grandes se guardan en un archivo temporal y se abren con memoria mapeada en lugar de leerse completos
+    (si no son float64 se convierten por bloques a otro archivo mapeado). Los temporales se borran al
+    salir del with, así que los arreglos solo valen dentro y no deben guardarse (Windows no deja borrar
+    un archivo mientras siga mapeado) """
+    extension = os.path.splitext(archivo.filename)[1].lower()
+    datos = {}
+    temporales = []
+    try:
+        if extension == ".csv":
+            lineas = io.TextIOWrapper(archivo.stream, encoding="utf-8")
+            datos["costos"] = np.loadtxt(lineas, delimiter=",", comments="#", ndmin=2)
+        elif extension == ".npz":
+            with np.load(archivo.stream) as contenido:
+                if "costos" not in contenido:
+                    raise ValueError("El archivo .npz debe incluir el arreglo 'costos'")
+                datos.update((nombre, contenido[nombre]) for nombre in ("costos", "oferta", "demanda") if nombre in contenido)
+        elif extension == ".npy":
+            archivo.stream.seek(0, os.SEEK_END)
+            tamano = archivo.stream.tell()
+            archivo.stream.seek(0)
+            if tamano <= UMBRAL_MMAP:
+                datos["costos"] = np.load(archivo.stream)
+            else:
+                ruta = _archivo_temporal(temporales)
+                archivo.save(ruta)
+                datos["costos"] = np.load(ruta, mmap_mode="r")
+                if datos["costos"].dtype != np.float64:
+                    datos["costos"] = _a_float64(datos["costos"], _archivo_temporal(temporales))
+        else:
+            raise ValueError(f"Formato no soportado: {extension}")
+        yield datos
+    finally:
+        datos.clear()  # Suelta los mapeos antes de borrar los archivos
+        for ruta in temporales:
+            os.unlink(ruta)
+
+def calcular_transporte(supply, demand, cost_matrix, metodo, carrera=carrera_heuristicas):
+    """ Solución inicial con la heurística elegida (o la carrera automática) y MODI. Devuelve el mensaje
+    de error o un diccionario con la solución, los mensajes y los datos para las estadísticas """
+    filas, columnas = len(supply) + 1, len(demand) + 1
+
+    if not balanceado(supply, demand):
         return "El problema está desbalanceado. Se requiere agregar una variable ficticia."
 
-    if metodo == "Esquina Noroeste":
-        solucion = esquina_noroeste(supply.copy(), demand.copy(), cost_matrix)
-    elif metodo == "Menor Costo":
-        solucion = menor_costo(supply.copy(), demand.copy(), cost_matrix)
-    elif metodo == "Aproximación de Vogel":
-        solucion = aproximacion_vogel(supply.copy(), demand.copy(), cost_matrix)
+    if es_problema_asignacion(supply, demand):
+        solucion = resolver_asignacion(cost_matrix)
+        degenerada, mensaje_degenerada = es_solucion_degenerada(solucion, filas - 1, columnas - 1)
+        mensaje_optimalidad = "<span style='color:green; font-weight:bold;'>✅ La solución es óptima. Se detectó un problema de asignación (oferta y demanda iguales a 1) y se resolvió con el método húngaro (Jonker-Volgenant).</span>"
+        return {"solucion": solucion, "metodo": "Problema de Asignación", "costo_total": calcular_costo_total(solucion, cost_matrix),
+                "degenerada": mensaje_degenerada, "optimalidad": mensaje_optimalidad, "heuristicas": None, "heuristica": None}
+
+    heuristicas = None
+    if metodo == "Automático":
+        # Carrera de las tres heurísticas; la de menor costo inicial pasa al optimizador
+        heuristica, solucion, heuristicas = carrera(supply, demand, cost_matrix)
+        metodo = f"Automático ({heuristica})"
+    elif metodo in HEURISTICAS:
+        heuristica = metodo
+        solucion = HEURISTICAS[metodo](supply.copy(), demand.copy(), cost_matrix)
     else:
         return "Método no implementado."
 
@@ -252,16 +741,177 @@ def resolver():
     degenerada, mensaje_degenerada = es_solucion_degenerada(solucion, filas - 1, columnas - 1)
 
     # Verificar si la solución es óptima usando el Método de Modi
-    es_optima, solucion_optima = metodo_modi(solucion, cost_matrix)
+    solucion_optima, pivotes_modi = transporte_simplex(solucion, cost_matrix)
+    if isinstance(solucion_optima, str):
+        return solucion_optima
+    es_optima = pivotes_modi == 0
 
     if es_optima:
         mensaje_optimalidad = "<span style='color:green; font-weight:bold;'>✅ La solución es óptima.</span>"
     else:
-        mensaje_optimalidad = "<span style='color:orange; font-weight:bold;'>⚠️ La solución no es óptima. Se aplicó el Método de Modi para encontrar una solución óptima.</span>"
+        mensaje_optimalidad = f"<span style='color:orange; font-weight:bold;'>⚠️ La solución no es óptima. Se aplicó el Método de Modi para encontrar una solución óptima ({pivotes_modi} pivotes).</span>"
         costo_total = calcular_costo_total(solucion_optima, cost_matrix)
         solucion = solucion_optima
 
-    return render_template("resultado2.html", solucion=solucion, metodo=metodo, costo_total=costo_total, degenerada=mensaje_degenerada, optimalidad=mensaje_optimalidad)
+    return {"solucion": solucion, "metodo": metodo, "costo_total": costo_total, "degenerada": mensaje_degenerada,
+            "optimalidad": mensaje_optimalidad, "heuristicas": heuristicas, "heuristica": heuristica, "pivotes_modi": pivotes_modi}
+
+def registrar_estadisticas(datos):
+    if datos["heuristicas"]:
+        estadisticas_heuristicas.registrar_carrera(datos["heuristicas"], datos["heuristica"])
+    if datos["heuristica"]:
+        estadisticas_heuristicas.registrar_modi(datos["heuristica"], datos["pivotes_modi"])
+
+def resolver_transporte(supply, demand, cost_matrix, metodo, disperso=False):
+    """ Resuelve en la petición y muestra el resultado. Con disperso (archivos subidos) solo se muestran
+    las asignaciones distintas de cero, por páginas, en lugar de la matriz m x n completa """
+    datos = calcular_transporte(supply, demand, cost_matrix, metodo)
+    if isinstance(datos, str):
+        return datos
+    registrar_estadisticas(datos)
+    if disperso:
+        solucion = sparse.csr_matrix(datos["solucion"])
+        filas = np.repeat(np.arange(solucion.shape[0]), np.diff(solucion.indptr))
+        costos = np.asarray(cost_matrix[filas, solucion.indices], dtype=float)
+        return mostrar_disperso(solucion, costos, datos["metodo"], datos["costo_total"], datos["degenerada"],
+                                datos["optimalidad"], datos["heuristicas"])
+    id_resultado = guardar_resultado(datos["solucion"], datos["metodo"], datos["costo_total"], datos["degenerada"], datos["optimalidad"])
+    return render_template("resultado2.html", solucion=datos["solucion"], metodo=datos["metodo"], costo_total=datos["costo_total"],
+                           degenerada=datos["degenerada"], optimalidad=datos["optimalidad"], heuristicas=datos["heuristicas"], id_resultado=id_resultado)
+
+def mostrar_disperso(solucion, costos, metodo, costo_total, degenerada, optimalidad, heuristicas=None):
+    """ Guarda y muestra una solución CSR: solo la primera página de asignaciones distintas de cero; las
+    siguientes se piden a /asignaciones """
+    id_resultado = guardar_resultado(solucion, metodo, costo_total, degenerada, optimalidad, costos)
+    return render_template("resultado2.html", asignaciones=pagina_asignaciones(solucion, costos, 0, min(solucion.nnz, TAMANO_PAGINA_ASIGNACIONES)),
+                           total_asignaciones=solucion.nnz, tamano_pagina=TAMANO_PAGINA_ASIGNACIONES, metodo=metodo,
+                           costo_total=costo_total, degenerada=degenerada, optimalidad=optimalidad, heuristicas=heuristicas,
+                           id_resultado=id_resultado)
+
+@app.route("/asignaciones/<id_resultado>")
+def asignaciones_resultado(id_resultado):
+    """ Asignaciones [desde, hasta) de un resultado disperso guardado, como máximo TAMANO_PAGINA_ASIGNACIONES
+    por consulta: [origen, destino, cantidad, costo] """
+    guardado = almacen_resultados.obtener(id_resultado)
+    if guardado is None or guardado['costos'] is None:
+        return jsonify(error="El resultado ya no está disponible; vuelve a resolver el problema"), 404
+
+    solucion = guardado['solucion']
+    try:
+        desde = min(max(int(request.args.get('desde', 0)), 0), solucion.nnz)
+        hasta = min(int(request.args.get('hasta', desde + TAMANO_PAGINA_ASIGNACIONES)), desde + TAMANO_PAGINA_ASIGNACIONES, solucion.nnz)
+    except ValueError:
+        return jsonify(error="desde y hasta deben ser enteros"), 400
+
+    hasta = max(hasta, desde)
+    return jsonify(total=solucion.nnz, desde=desde, hasta=hasta,
+                   asignaciones=pagina_asignaciones(solucion, guardado['costos'], desde, hasta))
+
+@app.route("/heuristicas")
+def resumen_heuristicas():
+    return jsonify(estadisticas_heuristicas.resumen())
+
+@app.route("/resolver_red", methods=["POST"])
+def resolver_red():
+    """ Flujo de costo mínimo sobre carriles permitidos: archivo CSV origen,destino,costo (índices desde 0)
+    más la oferta y la demanda como listas; los problemas desbalanceados reciben un nodo ficticio """
+    try:
+        supply = leer_vector(request.form["oferta"])
+        demand = leer_vector(request.form["demanda"])
+        carriles = np.loadtxt(io.TextIOWrapper(request.files["carriles"].stream, encoding="utf-8"),
+                              delimiter=",", comments="#", ndmin=2)
+        if carriles.size == 0:
+            carriles = np.zeros((0, 3))
+
+        solucion, costo_total, ficticia = flujo_costo_minimo(
+            supply, demand, carriles[:, 0], carriles[:, 1], carriles[:, 2])
+        if isinstance(solucion, str):
+            return solucion
+
+        _, mensaje_degenerada = es_solucion_degenerada(solucion, len(supply), len(demand))
+        mensaje_optimalidad = "<span style='color:green; font-weight:bold;'>✅ La solución es óptima (flujo de costo mínimo).</span>"
+        if ficticia:
+            destino = "una demanda ficticia" if supply.sum() > demand.sum() else "una oferta ficticia"
+            mensaje_optimalidad += f"<br>El problema estaba desbalanceado: se agregó {destino} de {ficticia:g} unidades con costo 0."
+
+        costos = costos_asignados(solucion, carriles[:, 0], carriles[:, 1], carriles[:, 2])
+        return mostrar_disperso(solucion, costos, "Flujo de Costo Mínimo", costo_total, mensaje_degenerada, mensaje_optimalidad)
+
+    except Exception as e:
+        return f"Error en la resolución: {e}"
+
+cola_trabajos = ColaTrabajos()
+
+def trabajo_transporte(supply, demand, cost_matrix, metodo):
+    """ Se ejecuta en un proceso del pool de trabajos; las heurísticas reportan las asignaciones hechas
+    y MODI los pivotes """
+    return calcular_transporte(supply, demand, cost_matrix, metodo, carrera_secuencial)
+
+@app.route("/trabajos", methods=["POST"])
+def enviar_trabajo():
+    """ Resuelve en segundo plano un JSON {oferta, demanda, costos, metodo} o un archivo `costos` con los
+    mismos campos que /cargar. `plazo` opcional en segundos. Responde 202 con el id del trabajo o 503
+    si la cola está llena """
+    try:
+        if "costos" in request.files:
+            datos = request.form
+            # El trabajo va a otro proceso: los arreglos se copian a memoria y el archivo temporal se borra
+            with leer_arreglos(request.files["costos"]) as subidos:
+                arreglos = {nombre: np.array(valor) for nombre, valor in subidos.items()}
+        else:
+            datos = request.get_json(force=True)
+            arreglos = datos
+        cost_matrix = np.asarray(arreglos["costos"], dtype=float)
+        supply = np.asarray(arreglos["oferta"], dtype=float) if "oferta" in arreglos else leer_vector(datos["oferta"])
+        demand = np.asarray(arreglos["demanda"], dtype=float) if "demanda" in arreglos else leer_vector(datos["demanda"])
+        metodo = datos.get("metodo", "Automático")
+        plazo = float(datos["plazo"]) if datos.get("plazo") else None
+
+        if cost_matrix.shape != (len(supply), len(demand)):
+            return jsonify(error=f"La matriz de costos es {cost_matrix.shape[0]} x {cost_matrix.shape[1]} pero hay {len(supply)} ofertas y {len(demand)} demandas."), 400
+        if metodo != "Automático" and metodo not in HEURISTICAS:
+            return jsonify(error="Método no implementado."), 400
+
+    except Exception as e:
+        return jsonify(error=f"Error en los datos: {e}"), 400
+
+    def al_terminar(salida):
+        """ Sin solución, el mensaje del resolvedor (desbalanceado, límite de MODI) es el error del trabajo """
+        if isinstance(salida, dict):
+            registrar_estadisticas(salida)
+            id_resultado = guardar_resultado(salida["solucion"], salida["metodo"], salida["costo_total"], salida["degenerada"], salida["optimalidad"])
+            return {"metodo": salida["metodo"], "costo_total": float(salida["costo_total"]),
+                    "asignaciones": [[i, j, cantidad] for i, j, cantidad, _ in asignaciones(salida["solucion"])],
+                    "degenerada": sin_html(salida["degenerada"]), "optimalidad": sin_html(salida["optimalidad"]),
+                    "heuristicas": salida["heuristicas"], "id_resultado": id_resultado}
+        raise ValueError(salida)
+
+    trabajo = cola_trabajos.enviar(trabajo_transporte, (supply, demand, cost_matrix, metodo), plazo, al_terminar)
+    if trabajo is None:
+        return jsonify(error="La cola de trabajos está llena; intenta más tarde"), 503
+    return jsonify(trabajo.resumen()), 202
+
+@app.route("/trabajos")
+def estadisticas_trabajos():
+    return jsonify(cola_trabajos.estadisticas())
+
+@app.route("/trabajos/<id_trabajo>")
+def estado_trabajo(id_trabajo):
+    """ Estado y progreso: heurística en curso, asignaciones hechas y pivotes MODI """
+    cuerpo, codigo = respuesta_estado(cola_trabajos.obtener(id_trabajo))
+    return jsonify(cuerpo), codigo
+
+@app.route("/trabajos/<id_trabajo>/resultado")
+def resultado_trabajo(id_trabajo):
+    """ Resultado en JSON con las asignaciones distintas de cero (origen, destino, cantidad desde 0);
+    id_resultado sirve para /descargar """
+    cuerpo, codigo = respuesta_resultado(cola_trabajos.obtener(id_trabajo))
+    return jsonify(cuerpo), codigo
+
+@app.route("/trabajos/<id_trabajo>", methods=["DELETE"])
+def cancelar_trabajo(id_trabajo):
+    cuerpo, codigo = respuesta_estado(cola_trabajos.cancelar(id_trabajo))
+    return jsonify(cuerpo), codigo
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -1,13 +1,40 @@
-from flask import Flask, render_template, request, redirect, url_for, send_file
+from flask import Flask, render_template, request, redirect, url_for, jsonify
 import networkx as nx
-import matplotlib.pyplot as plt
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import pairwise
 import io
 import base64
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+import hashlib
+import heapq
+import os
+import secrets
+import threading
+import time
+from cache_lru import CacheLRU
+from reportes import AlmacenResultados, FORMATOS_DESCARGA, descarga
+from trabajos import ColaTrabajos, reportar_progreso, respuesta_estado, respuesta_resultado
 
 app = Flask(__name__)
 
+TAMANO_CACHE_LAYOUTS = int(os.environ.get("TAMANO_CACHE_LAYOUTS", "64"))  # 0 desactiva la caché
+SEMILLA_LAYOUT = 42  # Semilla fija: el mismo grafo siempre tiene las mismas posiciones
+UMBRAL_LAYOUT_RAPIDO = 500  # Desde este número de nodos se usa el layout espectral
+TRABAJADORES_RENDER = int(os.environ.get("TRABAJADORES_RENDER", "4"))  # Hilos que dibujan imágenes
+FORMATOS_IMAGEN = ("png", "svg", "json")
+TAMANO_ALMACEN_REDES = int(os.environ.get("TAMANO_ALMACEN_REDES", "128"))  # Redes guardadas como máximo
+TTL_REDES = float(os.environ.get("TTL_REDES", "3600"))  # Segundos sin uso antes de descartar una red
+TAMANO_CACHE_ARBOLES = 64  # Árboles de caminos mínimos guardados por red (uno por origen)
+NUM_REFERENCIAS = 4  # Nodos de referencia (landmarks) para la heurística de A*
+MAX_NODOS_TODOS_PARES = 2000  # Límite de nodos para la matriz de distancias de todos los pares
+ALGORITMOS_RUTA = ("dijkstra", "bidireccional", "astar")
+TAMANO_ARBOLES_DINAMICOS = 8  # Árboles dinámicos (por origen) mantenidos por red
+
 def generar_grafo(nodos, conexiones):
     G = nx.Graph()
     G.add_nodes_from(nodos)
@@ -16,80 +43,561 @@ def generar_grafo(nodos, conexiones):
         G.add_edge(nodo1, nodo2, weight=costo)
     return G
 
+class MotorRutas:
+    """ Caminos mínimos sobre la red convertida una sola vez a CSR (matriz simétrica, grafo no dirigido).
+    Dijkstra de scipy da costo y predecesores en una pasada y el árbol de cada origen se guarda para
+    consultas uno a muchos; para un solo par también hay Dijkstra bidireccional y A* con cotas por
+    nodos de referencia (ALT), que no necesita coordenadas """
+
+    def __init__(self, nodos, indices, aristas):
+        self.nodos = list(nodos)
+        self.indices = dict(indices)
+        n = len(self.nodos)
+        pares = np.array(list(aristas.keys()), dtype=np.int64).reshape(-1, 2)
+        costos = np.fromiter(aristas.values(), dtype=float, count=len(aristas))
+        self.matriz = sparse.csr_matrix(
+            (np.concatenate([costos, costos]), (np.concatenate([pares[:, 0], pares[:, 1]]),
+                                                np.concatenate([pares[:, 1], pares[:, 0]]))), shape=(n, n))
+        self._listas = None
+        self._referencias = None
+        self._arboles = OrderedDict()
+        self._candado = threading.Lock()
+
+    def _indice(self, nodo):
+        if nodo not in self.indices:
+            raise KeyError(f"No existe el nodo {nodo}")
+        return self.indices[nodo]
+
+    def arbol(self, origen):
+        """ (distancias, predecesores) desde el índice origen, guardado con desalojo LRU """
+        with self._candado:
+            if origen in self._arboles:
+                self._arboles.move_to_end(origen)
+                return self._arboles[origen]
+        arbol = csgraph.dijkstra(self.matriz, indices=origen, return_predecessors=True)
+        with self._candado:
+            self._arboles[origen] = arbol
+            while len(self._arboles) > TAMANO_CACHE_ARBOLES:
+                self._arboles.popitem(last=False)
+        return arbol
+
+    def _camino(self, predecesores, destino):
+        camino = [destino]
+        while predecesores[camino[-1]] >= 0:
+            camino.append(predecesores[camino[-1]])
+        return [self.nodos[k] for k in reversed(camino)]
+
+    def ruta(self, inicio, fin, algoritmo="dijkstra"):
+        """ (ruta, costo) o (None, None) si no hay camino """
+        s, t = self._indice(inicio), self._indice(fin)
+        if algoritmo == "bidireccional":
+            return self._bidireccional(s, t)
+        if algoritmo == "astar":
+            return self._astar(s, t)
+        if algoritmo != "dijkstra":
+            raise ValueError(f"Algoritmo no válido: {algoritmo}")
+        distancias, predecesores = self.arbol(s)
+        if np.isinf(distancias[t]):
+            return None, None
+        return self._camino(predecesores, t), float(distancias[t])
+
+    def uno_a_muchos(self, inicio, destinos=None):
+        """ {destino: (ruta, costo)} desde un mismo árbol; sin destinos, hacia todos los nodos """
+        s = self._indice(inicio)
+        distancias, predecesores = self.arbol(s)
+        resultado = {}
+        for destino in self.nodos if destinos is None else destinos:
+            t = self._indice(destino)
+            resultado[destino] = (None, None) if np.isinf(distancias[t]) else (self._camino(predecesores, t), float(distancias[t]))
+        return resultado
+
+    def todos_los_pares(self):
+        """ Matriz de costos mínimos entre todos los nodos (inf si no hay camino). Las filas de los
+        orígenes con árbol guardado se copian de la caché; Dijkstra solo corre desde los demás """
+        n = len(self.nodos)
+        if n > MAX_NODOS_TODOS_PARES:
+            raise ValueError(f"La red tiene más de {MAX_NODOS_TODOS_PARES} nodos para calcular todos los pares")
+        with self._candado:
+            guardadas = {origen: distancias for origen, (distancias, _) in self._arboles.items()}
+        distancias = np.empty((n, n))
+        for origen, fila in guardadas.items():
+            distancias[origen] = fila
+        faltantes = [origen for origen in range(n) if origen not in guardadas]
+        if faltantes:
+            distancias[faltantes] = csgraph.dijkstra(self.matriz, indices=faltantes)
+        return distancias
+
+    def _adyacencia(self):
+        if self._listas is None:
+            self._listas = (self.matriz.indptr.tolist(), self.matriz.indices.tolist(), self.matriz.data.tolist())
+        return self._listas
+
+    def _bidireccional(self, s, t):
+        if s == t:
+            return [self.nodos[s]], 0.0
+        indptr, indices, costos = self._adyacencia()
+        distancia = ({s: 0.0}, {t: 0.0})
+        previo = ({s: -1}, {t: -1})
+        frentes = ([(0.0, s)], [(0.0, t)])
+        cerrados = (set(), set())
+        mejor, encuentro = np.inf, None
+
+        # Se expande el frente con menor distancia; termina cuando ambos mínimos suman más que el mejor camino
+        while frentes[0] and frentes[1] and frentes[0][0][0] + frentes[1][0][0] < mejor:
+            lado = 0 if frentes[0][0][0] <= frentes[1][0][0] else 1
+            d, u = heapq.heappop(frentes[lado])
+            if u in cerrados[lado]:
+                continue
+            cerrados[lado].add(u)
+            for k in range(indptr[u], indptr[u + 1]):
+                v, nueva = indices[k], d + costos[k]
+                if nueva < distancia[lado].get(v, np.inf):
+                    distancia[lado][v] = nueva
+                    previo[lado][v] = u
+                    heapq.heappush(frentes[lado], (nueva, v))
+                if v in distancia[1 - lado] and distancia[lado][v] + distancia[1 - lado][v] < mejor:
+                    mejor, encuentro = distancia[lado][v] + distancia[1 - lado][v], v
+
+        if encuentro is None:
+            return None, None
+        # Camino de s al nodo de encuentro y de ahí a t, por los predecesores de cada lado
+        ida = [encuentro]
+        while previo[0][ida[-1]] >= 0:
+            ida.append(previo[0][ida[-1]])
+        vuelta = [encuentro]
+        while previo[1][vuelta[-1]] >= 0:
+            vuelta.append(previo[1][vuelta[-1]])
+        return [self.nodos[k] for k in ida[::-1] + vuelta[1:]], float(mejor)
+
+    def _cotas(self, t):
+        """ Cota inferior de la distancia a t desde cada nodo: max_L |d(L, t) - d(L, v)| """
+        if self._referencias is None:
+            # Referencias por punto más lejano, empezando por el nodo de mayor grado
+            referencias = [int(np.argmax(np.diff(self.matriz.indptr)))]
+            distancias = [csgraph.dijkstra(self.matriz, indices=referencias[0])]
+            while len(referencias) < min(NUM_REFERENCIAS, len(self.nodos)):
+                cercania = np.min(np.where(np.isinf(distancias), -1, distancias), axis=0)
+                cercania[referencias] = -1
+                referencias.append(int(np.argmax(cercania)))
+                distancias.append(csgraph.dijkstra(self.matriz, indices=referencias[-1]))
+            self._referencias = np.array(distancias)
+        with np.errstate(invalid="ignore"):
+            diferencias = np.abs(self._referencias[:, t][:, None] - self._referencias)
+        diferencias[~np.isfinite(diferencias)] = 0
+        return diferencias.max(axis=0).tolist()
+
+    def _astar(self, s, t):
+        indptr, indices, costos = self._adyacencia()
+        cota = self._cotas(t)
+        distancia = {s: 0.0}
+        previo = {s: -1}
+        frente = [(cota[s], 0.0, s)]
+        cerrados = set()
+        while frente:
+            _, d, u = heapq.heappop(frente)
+            if u == t:
+                camino = [t]
+                while previo[camino[-1]] >= 0:
+                    camino.append(previo[camino[-1]])
+                return [self.nodos[k] for k in reversed(camino)], float(d)
+            if u in cerrados:
+                continue
+            cerrados.add(u)
+            for k in range(indptr[u], indptr[u + 1]):
+                v, nueva = indices[k], d + costos[k]
+                if nueva < distancia.get(v, np.inf):
+                    distancia[v] = nueva
+                    previo[v] = u
+                    heapq.heappush(frente, (nueva + cota[v], nueva, v))
+        return None, None
+
+class ArbolDinamico:
+    """ Árbol de caminos mínimos desde un origen que se repara con cada cambio de arista, al estilo de
+    Ramalingam–Reps: si una arista baja de costo (o aparece) se propaga la mejora tipo Dijkstra desde
+    sus extremos; si sube (o desaparece) y era del árbol, solo se recalcula el subárbol que colgaba de
+    ella, sembrado con el mejor vecino fuera del subárbol. Las demás distancias no se tocan """
+
+    def __init__(self, origen, vecinos, distancias, predecesores):
+        self.origen = origen
+        self.vecinos = vecinos
+        self.distancia = distancias.tolist()
+        self.previo = np.where(predecesores < 0, -1, predecesores).tolist()
+        self.hijos = [set() for _ in self.previo]
+        for nodo, padre in enumerate(self.previo):
+            if padre >= 0:
+                self.hijos[padre].add(nodo)
+        self.reparados = 0  # Etiquetas (distancia y predecesor) cambiadas desde el último reinicio
+
+    def _asegurar(self, n):
+        while len(self.distancia) < n:
+            self.distancia.append(np.inf)
+            self.previo.append(-1)
+            self.hijos.append(set())
+
+    def _fijar(self, nodo, padre, distancia):
+        if self.previo[nodo] >= 0:
+            self.hijos[self.previo[nodo]].discard(nodo)
+        self.previo[nodo] = padre
+        self.distancia[nodo] = distancia
+        if padre >= 0:
+            self.hijos[padre].add(nodo)
+        self.reparados += 1
+
+    def cambio(self, u, v, anterior, nuevo):
+        """ Se llama después de cambiar la adyacencia. anterior es None si la arista es nueva y nuevo
+        es None si se quitó """
+        self._asegurar(len(self.vecinos))
+        if u == v:
+            return
+        if nuevo is not None and (anterior is None or nuevo < anterior):
+            self._disminuir(u, v, nuevo)
+        elif anterior is not None and (nuevo is None or nuevo > anterior):
+            self._aumentar(u, v)
+
+    def _disminuir(self, u, v, costo):
+        frente = []
+        for a, b in ((u, v), (v, u)):
+            if self.distancia[a] + costo < self.distancia[b]:
+                self._fijar(b, a, self.distancia[a] + costo)
+                heapq.heappush(frente, (self.distancia[b], b))
+        self._propagar(frente)
+
+    def _aumentar(self, u, v):
+        if self.previo[v] == u:
+            raiz = v
+        elif self.previo[u] == v:
+            raiz = u
+        else:
+            return  # No era una arista del árbol: ninguna distancia cambia
+
+        afectados = {raiz}
+        pendientes = [raiz]
+        while pendientes:
+            for hijo in self.hijos[pendientes.pop()]:
+                afectados.add(hijo)
+                pendientes.append(hijo)
+
+        # Cada nodo afectado parte del mejor vecino que no depende de la arista cambiada
+        frente = []
+        for nodo in afectados:
+            mejor, padre = np.inf, -1
+            for vecino, costo in self.vecinos[nodo].items():
+                if vecino not in afectados and self.distancia[vecino] + costo < mejor:
+                    mejor, padre = self.distancia[vecino] + costo, vecino
+            self._fijar(nodo, padre, mejor)
+            if padre >= 0:
+                heapq.heappush(frente, (mejor, nodo))
+        self._propagar(frente)
+
+    def _propagar(self, frente):
+        while frente:
+            distancia, nodo = heapq.heappop(frente)
+            if distancia > self.distancia[nodo]:
+                continue
+            for vecino, costo in self.vecinos[nodo].items():
+                if distancia + costo < self.distancia[vecino]:
+                    self._fijar(vecino, nodo, distancia + costo)
+                    heapq.heappush(frente, (distancia + costo, vecino))
+
+    def ruta(self, destino):
+        """ (índices de la ruta, costo) o (None, None) si no es alcanzable """
+        if destino >= len(self.distancia) or np.isinf(self.distancia[destino]):
+            return None, None
+        camino = [destino]
+        while self.previo[camino[-1]] >= 0:
+            camino.append(self.previo[camino[-1]])
+        return camino[::-1], self.distancia[destino]
+
+class Red:
+    """ Red guardada en el servidor en forma compacta: nombres de nodos en una lista y aristas en un
+    diccionario {(i, j): costo} con i < j. El nx.Graph para dibujar y buscar rutas se construye una
+    vez por versión y se reutiliza hasta la siguiente modificación """
+
+    def __init__(self, nodos, conexiones):
+        self.nodos = []
+        self.indices = {}
+        self.aristas = {}
+        self.version = 0
+        self._grafo = None
+        self._motor = None
+        self._vecinos = None
+        self._dinamicos = OrderedDict()
+        self.ultimo_uso = time.monotonic()
+        for nodo in nodos:
+            self._indice(nodo)
+        for nodo1, nodo2, costo in conexiones:
+            self.aristas[self._clave(nodo1, nodo2)] = float(costo)
+
+    def _indice(self, nodo):
+        if nodo not in self.indices:
+            self.indices[nodo] = len(self.nodos)
+            self.nodos.append(nodo)
+        return self.indices[nodo]
+
+    def _clave(self, nodo1, nodo2, crear=True):
+        if not crear and (nodo1 not in self.indices or nodo2 not in self.indices):
+            raise KeyError(f"No existe la arista {nodo1}-{nodo2}")
+        i, j = self._indice(nodo1), self._indice(nodo2)
+        return (i, j) if i < j else (j, i)
+
+    def agregar(self, nodo1, nodo2, costo):
+        """ Agrega la arista (y los nodos nuevos); si ya existe reemplaza su costo """
+        clave = self._clave(nodo1, nodo2)
+        self._modificada(clave, self.aristas.get(clave), float(costo))
+
+    def actualizar(self, nodo1, nodo2, costo):
+        clave = self._clave(nodo1, nodo2, crear=False)
+        if clave not in self.aristas:
+            raise KeyError(f"No existe la arista {nodo1}-{nodo2}")
+        self._modificada(clave, self.aristas[clave], float(costo))
+
+    def quitar(self, nodo1, nodo2):
+        clave = self._clave(nodo1, nodo2, crear=False)
+        if clave not in self.aristas:
+            raise KeyError(f"No existe la arista {nodo1}-{nodo2}")
+        self._modificada(clave, self.aristas[clave], None)
+
+    def _modificada(self, clave, anterior, nuevo):
+        """ Aplica el cambio de costo (None = sin arista) a las aristas, a la adyacencia y a los árboles
+        dinámicos; lo demás se reconstruye en la siguiente consulta """
+        i, j = clave
+        if nuevo is None:
+            del self.aristas[clave]
+        else:
+            self.aristas[clave] = nuevo
+        if self._vecinos is not None:
+            while len(self._vecinos) < len(self.nodos):
+                self._vecinos.append({})
+            if nuevo is None:
+                self._vecinos[i].pop(j, None)
+                self._vecinos[j].pop(i, None)
+            else:
+                self._vecinos[i][j] = self._vecinos[j][i] = nuevo
+        for arbol in self._dinamicos.values():
+            arbol.cambio(i, j, anterior, nuevo)
+        self.version += 1
+        self._grafo = None
+        self._motor = None
+
+    def grafo(self):
+        if self._grafo is None:
+            self._grafo = generar_grafo(self.nodos, ((self.nodos[i], self.nodos[j], costo)
+                                                     for (i, j), costo in self.aristas.items()))
+        return self._grafo
+
+    def motor(self):
+        if self._motor is None:
+            self._motor = MotorRutas(self.nodos, self.indices, self.aristas)
+        return self._motor
+
+    def vecinos(self):
+        """ Adyacencia como lista de diccionarios {vecino: costo}, mantenida en cada cambio """
+        if self._vecinos is None:
+            self._vecinos = [{} for _ in self.nodos]
+            for (i, j), costo in self.aristas.items():
+                self._vecinos[i][j] = self._vecinos[j][i] = costo
+        return self._vecinos
+
+    def dinamico(self, origen):
+        """ Árbol dinámico desde el nodo origen; se crea con un Dijkstra completo la primera vez """
+        s = self.indices.get(origen)
+        if s is None:
+            raise KeyError(f"No existe el nodo {origen}")
+        if s not in self._dinamicos:
+            distancias, predecesores = self.motor().arbol(s)
+            self._dinamicos[s] = ArbolDinamico(s, self.vecinos(), distancias, predecesores)
+            while len(self._dinamicos) > TAMANO_ARBOLES_DINAMICOS:
+                self._dinamicos.popitem(last=False)
+        self._dinamicos.move_to_end(s)
+        return self._dinamicos[s]
+
+    def resumen(self):
+        return {"nodos": len(self.nodos), "aristas": len(self.aristas), "version": self.version}
+
+class AlmacenRedes:
+    """ Redes por id con desalojo LRU (por cantidad) y por tiempo sin uso """
+
+    def __init__(self, tamano, ttl):
+        self.tamano = tamano
+        self.ttl = ttl
+        self._redes = OrderedDict()
+        self.candado = threading.RLock()
+        self.desalojadas = 0
+
+    def crear(self, nodos, conexiones):
+        red = Red(nodos, conexiones)
+        with self.candado:
+            id_red = secrets.token_urlsafe(12)
+            self._redes[id_red] = red
+            self._desalojar()
+        return id_red
+
+    def obtener(self, id_red):
+        """ La red o None si no existe o ya fue desalojada """
+        with self.candado:
+            self._desalojar()
+            red = self._redes.get(id_red)
+            if red is not None:
+                self._redes.move_to_end(id_red)
+                red.ultimo_uso = time.monotonic()
+            return red
+
+    def eliminar(self, id_red):
+        with self.candado:
+            return self._redes.pop(id_red, None) is not None
+
+    def _desalojar(self):
+        limite = time.monotonic() - self.ttl
+        while self._redes and (len(self._redes) > self.tamano or next(iter(self._redes.values())).ultimo_uso < limite):
+            self._redes.popitem(last=False)
+            self.desalojadas += 1
+
+    def estadisticas(self):
+        with self.candado:
+            return {"tamano": self.tamano, "ttl": self.ttl, "redes": len(self._redes), "desalojadas": self.desalojadas}
+
+almacen_redes = AlmacenRedes(TAMANO_ALMACEN_REDES, TTL_REDES)
+
 def calcular_ruta_optima(G, inicio, fin):
     try:
-        ruta = nx.dijkstra_path(G, inicio, fin, weight='weight')
-        costo = nx.dijkstra_path_length(G, inicio, fin, weight='weight')
+        costo, ruta = nx.single_source_dijkstra(G, inicio, fin, weight='weight')
         return ruta, costo
     except nx.NetworkXNoPath:
         return None, None
 
-def graficar_red(G, ruta_optima=None):
-    pos = nx.spring_layout(G)
-    plt.figure(figsize=(10, 6))
-    
+cache_layouts = CacheLRU(TAMANO_CACHE_LAYOUTS)
+
+def grafo_canonico(G):
+    """ Copia del grafo con nodos y aristas en orden fijo y su hash. El orden de inserción no cambia
+    ni la clave ni el layout, que depende del orden de los nodos aunque la semilla sea fija """
+    nodos = sorted(G.nodes, key=str)
+    aristas = sorted((tuple(sorted((u, v), key=str)) + (d.get('weight', 1),) for u, v, d in G.edges(data=True)),
+                     key=lambda arista: (str(arista[0]), str(arista[1])))
+    clave = hashlib.sha256(repr((nodos, aristas)).encode()).hexdigest()
+    H = nx.Graph()
+    H.add_nodes_from(nodos)
+    H.add_weighted_edges_from(aristas)
+    return clave, H
+
+def calcular_layout(G):
+    """ Posiciones de los nodos, compartidas entre /ver_red y /resolver a través de la caché.
+    Los grafos grandes usan el layout espectral (una descomposición dispersa) en lugar de spring_layout,
+    que es O(n²) por iteración """
+    clave, H = grafo_canonico(G)
+    pos = cache_layouts.obtener(clave)
+    if pos is None:
+        if H.number_of_nodes() >= UMBRAL_LAYOUT_RAPIDO:
+            pos = nx.spectral_layout(H)
+        else:
+            pos = nx.spring_layout(H, seed=SEMILLA_LAYOUT)
+        cache_layouts.guardar(clave, pos)
+    return pos
+
+pool_render = ThreadPoolExecutor(max_workers=TRABAJADORES_RENDER)
+_figuras = threading.local()
+
+def _figura():
+    """ Figura y lienzo Agg propios de cada hilo del pool: se reutilizan limpiándolos entre dibujos,
+    sin pasar por el estado global de pyplot """
+    if not hasattr(_figuras, "figura"):
+        _figuras.figura = Figure(figsize=(10, 6))
+        _figuras.lienzo = FigureCanvasAgg(_figuras.figura)
+    _figuras.figura.clear()
+    return _figuras.figura
+
+def _dibujar(G, pos, ruta_optima, formato):
+    figura = _figura()
+    ax = figura.add_subplot()
+
     # Dibujar todos los nodos y aristas
-    nx.draw_networkx_nodes(G, pos, node_size=700, node_color='lightblue')
-    nx.draw_networkx_edges(G, pos, width=1.5, alpha=0.5)
-    
+    nx.draw_networkx_nodes(G, pos, node_size=700, node_color='lightblue', ax=ax)
+    nx.draw_networkx_edges(G, pos, width=1.5, alpha=0.5, ax=ax)
+
     # Resaltar la ruta óptima si existe
     if ruta_optima:
         edges = [(ruta_optima[i], ruta_optima[i + 1]) for i in range(len(ruta_optima) - 1)]
-        nx.draw_networkx_edges(G, pos, edgelist=edges, edge_color='red', width=2.5)
-        nx.draw_networkx_nodes(G, pos, nodelist=ruta_optima, node_color='red', node_size=700)
-    
+        nx.draw_networkx_edges(G, pos, edgelist=edges, edge_color='red', width=2.5, ax=ax)
+        nx.draw_networkx_nodes(G, pos, nodelist=ruta_optima, node_color='red', node_size=700, ax=ax)
+
     # Etiquetas
     labels = nx.get_edge_attributes(G, 'weight')
-    nx.draw_networkx_labels(G, pos, font_size=12, font_family='sans-serif')
-    nx.draw_networkx_edge_labels(G, pos, edge_labels=labels)
-    
+    nx.draw_networkx_labels(G, pos, font_size=12, font_family='sans-serif', ax=ax)
+    nx.draw_networkx_edge_labels(G, pos, edge_labels=labels, ax=ax)
+
     # Guardar la imagen en un buffer
     buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    buf.seek(0)
-    imagen = base64.b64encode(buf.read()).decode('utf-8')
-    plt.close()
-    return imagen
+    figura.savefig(buf, format=formato)
+    if formato == "svg":
+        return buf.getvalue().decode('utf-8')
+    return base64.b64encode(buf.getvalue()).decode('utf-8')
+
+def datos_red(G, pos, ruta_optima=None):
+    """ Nodos con posiciones y aristas con pesos para dibujar la red en el navegador """
+    en_ruta = set(pairwise(ruta_optima)) if ruta_optima else set()
+    nodos_ruta = set(ruta_optima or [])
+    return {
+        "nodos": [{"id": str(n), "x": float(pos[n][0]), "y": float(pos[n][1]), "en_ruta": n in nodos_ruta}
+                  for n in G.nodes],
+        "aristas": [{"origen": str(u), "destino": str(v), "peso": d.get('weight'),
+                     "en_ruta": (u, v) in en_ruta or (v, u) in en_ruta}
+                    for u, v, d in G.edges(data=True)],
+    }
+
+def graficar_red(G, ruta_optima=None, formato="png"):
+    """ PNG en base64 o SVG dibujados en el pool de hilos, o "json" con los datos para dibujar en el
+    cliente sin rasterizar en el servidor """
+    if formato not in FORMATOS_IMAGEN:
+        raise ValueError(f"Formato de imagen no válido: {formato}")
+    pos = calcular_layout(G)
+    if formato == "json":
+        return datos_red(G, pos, ruta_optima)
+    return pool_render.submit(_dibujar, G, pos, ruta_optima, formato).result()
+
+def formato_imagen(valor, G):
+    """ Formato pedido; sin preferencia, los grafos grandes se envían como JSON """
+    if valor in FORMATOS_IMAGEN:
+        return valor
+    return "json" if G.number_of_nodes() >= UMBRAL_LAYOUT_RAPIDO else "png"
+
+almacen_resultados = AlmacenResultados()
+
+def tramos_ruta(G, ruta_optima):
+    """ [(origen, destino, costo)] de cada arista de la ruta """
+    return [(u, v, G[u][v]['weight']) for u, v in pairwise(ruta_optima)] if ruta_optima else []
+
+def lineas_resultado(guardado):
+    yield "Resultado de la Ruta Óptima en la Red"
+    if guardado['ruta_optima'] is None:
+        yield "No existe una ruta entre los nodos indicados."
+        return
+    yield f"Ruta Óptima: {' -> '.join(map(str, guardado['ruta_optima']))}"
+    yield f"Costo Total: {guardado['costo']}"
+    yield ""
+    yield "Tramos:"
+    for k, (origen, destino, peso) in enumerate(guardado['tramos']):
+        yield f"{k+1}. {origen} -> {destino}: {peso}"
+
+def filas_resultado(guardado):
+    yield ["tramo", "origen", "destino", "costo"]
+    for k, (origen, destino, peso) in enumerate(guardado['tramos']):
+        yield [k+1, origen, destino, peso]
 
 @app.route('/descargar', methods=['POST'])
 def descargar():
-    try:
-        tipo_archivo = request.form['tipo_archivo']
-        ruta_optima = request.form.getlist('ruta_optima[]')
-        costo = request.form['costo']
-        imagen = request.form['imagen']
-
-        if tipo_archivo == 'pdf':
-            # Crear un archivo PDF en memoria
-            buffer = io.BytesIO()
-            p = canvas.Canvas(buffer, pagesize=letter)
-            p.drawString(100, 750, "Resultado de la Ruta Óptima en la Red")
-            p.drawString(100, 730, f"Ruta Óptima: {' -> '.join(ruta_optima)}")
-            p.drawString(100, 710, f"Costo Total: {costo}")
-
-
-            p.showPage()
-            p.save()
-
-            buffer.seek(0)
-            return send_file(buffer, as_attachment=True, download_name='resultado.pdf', mimetype='application/pdf')
-
-        elif tipo_archivo == 'txt':
-            # Crear un archivo TXT en memoria
-            output = io.StringIO()
-            output.write("Resultado de la Ruta Óptima en la Red\n")
-            output.write(f"Ruta Óptima: {' -> '.join(ruta_optima)}\n")
-            output.write(f"Costo Total: {costo}\n")
-
-            buffer = io.BytesIO()
-            buffer.write(output.getvalue().encode('utf-8'))
-            buffer.seek(0)
-            return send_file(buffer, as_attachment=True, download_name='resultado.txt', mimetype='text/plain')
+    """ Descarga la ruta guardada en el servidor, tramo por tramo """
+    tipo_archivo = request.form.get('tipo_archivo', 'pdf')
+    if tipo_archivo not in FORMATOS_DESCARGA:
+        return "Tipo de archivo no válido", 400
 
-    except Exception as e:
-        return f"Error al generar el archivo: {e}"
+    guardado = almacen_resultados.obtener(request.form.get('id_resultado', ''))
+    if guardado is None:
+        return "El resultado ya no está disponible; vuelve a calcular la ruta", 404
 
+    return descarga(tipo_archivo, lineas_resultado(guardado), filas_resultado(guardado))
 
+@app.route('/cache')
+def estadisticas_cache():
+    return jsonify(cache_layouts.estadisticas())
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -107,36 +615,223 @@ def index():
                     if costo and float(costo) > 0:
                         conexiones.append((nodos[i], nodos[j], float(costo)))
         
-        return redirect(url_for("ver_red", nodos=','.join(nodos), conexiones=';'.join([f"{a},{b},{c}" for a, b, c in conexiones]), inicio=inicio, fin=fin))
+        id_red = almacen_redes.crear(nodos, conexiones)
+        return redirect(url_for("ver_red", id=id_red, inicio=inicio, fin=fin, formato=request.form.get("formato", "auto")))
     return render_template("index3.html")
 
+RED_NO_ENCONTRADA = "La red no existe o expiró. Vuelva a ingresarla."
+
 @app.route("/ver_red")
 def ver_red():
-    nodos = request.args.get("nodos").split(',')
-    conexiones = [tuple(c.split(',')) for c in request.args.get("conexiones").split(';')]
-    conexiones = [(a, b, float(c)) for a, b, c in conexiones]
+    red = almacen_redes.obtener(request.args.get("id"))
+    if red is None:
+        return RED_NO_ENCONTRADA, 404
     inicio = request.args.get("inicio")
     fin = request.args.get("fin")
     
-    G = generar_grafo(nodos, conexiones)
-    imagen = graficar_red(G)
+    with almacen_redes.candado:
+        G = red.grafo()
+    formato = formato_imagen(request.args.get("formato"), G)
+    imagen = graficar_red(G, formato=formato)
     
-    return render_template("ver_red.html", imagen=imagen, nodos=nodos, inicio=inicio, fin=fin, conexiones=request.args.get("conexiones"))
+    return render_template("ver_red.html", imagen=imagen, formato=formato, id=request.args.get("id"), inicio=inicio, fin=fin)
 
 @app.route("/resolver", methods=["POST"])
 def resolver():
-    nodos = request.form.get("nodos").split(',')
-    conexiones = [tuple(c.split(',')) for c in request.form.get("conexiones").split(';')]
-    conexiones = [(a, b, float(c)) for a, b, c in conexiones]
+    red = almacen_redes.obtener(request.form.get("id"))
+    if red is None:
+        return RED_NO_ENCONTRADA, 404
     inicio = request.form.get("inicio")
     fin = request.form.get("fin")
     
-    G = generar_grafo(nodos, conexiones)
-    ruta_optima, costo = calcular_ruta_optima(G, inicio, fin)
+    with almacen_redes.candado:
+        G = red.grafo()
+        motor = red.motor()
+    try:
+        ruta_optima, costo = motor.ruta(inicio, fin, request.form.get("algoritmo", "dijkstra"))
+    except KeyError:
+        ruta_optima, costo = None, None
     
-    imagen = graficar_red(G, ruta_optima)
+    formato = formato_imagen(request.form.get("formato"), G)
+    imagen = graficar_red(G, ruta_optima, formato)
+    id_resultado = almacen_resultados.guardar({"ruta_optima": ruta_optima, "costo": costo, "tramos": tramos_ruta(G, ruta_optima)})
     
-    return render_template("resultado3.html", imagen=imagen, ruta_optima=ruta_optima, costo=costo)
+    return render_template("resultado3.html", imagen=imagen, formato=formato, ruta_optima=ruta_optima, costo=costo, id_resultado=id_resultado)
+
+@app.route("/redes", methods=["POST"])
+def crear_red():
+    """ Crea una red desde JSON {nodos: [...], conexiones: [[nodo1, nodo2, costo], ...]} y devuelve su id """
+    try:
+        datos = request.get_json(force=True)
+        id_red = almacen_redes.crear(datos.get("nodos", []), datos.get("conexiones", []))
+        return jsonify(id=id_red, **almacen_redes.obtener(id_red).resumen()), 201
+    except Exception as e:
+        return jsonify(error=f"Error al crear la red: {e}"), 400
+
+@app.route("/redes/<id_red>", methods=["GET", "DELETE"])
+def red_guardada(id_red):
+    if request.method == "DELETE":
+        if not almacen_redes.eliminar(id_red):
+            return jsonify(error=RED_NO_ENCONTRADA), 404
+        return jsonify(eliminada=id_red)
+    red = almacen_redes.obtener(id_red)
+    if red is None:
+        return jsonify(error=RED_NO_ENCONTRADA), 404
+    return jsonify(id=id_red, **red.resumen())
+
+@app.route("/redes/<id_red>/aristas", methods=["POST", "PATCH"])
+def modificar_aristas(id_red):
+    """ Cambios incrementales en JSON: {agregar: [[n1, n2, costo]], actualizar: [[n1, n2, costo]],
+    quitar: [[n1, n2]]}. Se aplican en ese orden; si uno falla, los anteriores quedan aplicados """
+    red = almacen_redes.obtener(id_red)
+    if red is None:
+        return jsonify(error=RED_NO_ENCONTRADA), 404
+    try:
+        datos = request.get_json(force=True)
+        with almacen_redes.candado:
+            aplicar_cambios(red, datos)
+        return jsonify(id=id_red, **red.resumen())
+    except KeyError as e:
+        return jsonify(error=str(e.args[0]), **red.resumen()), 404
+    except Exception as e:
+        return jsonify(error=f"Error al modificar la red: {e}", **red.resumen()), 400
+
+def aplicar_cambios(red, datos):
+    for nodo1, nodo2, costo in datos.get("agregar", []):
+        red.agregar(nodo1, nodo2, costo)
+    for nodo1, nodo2, costo in datos.get("actualizar", []):
+        red.actualizar(nodo1, nodo2, costo)
+    for nodo1, nodo2 in datos.get("quitar", []):
+        red.quitar(nodo1, nodo2)
+
+@app.route("/redes/<id_red>/dinamica", methods=["POST"])
+def ruta_dinamica(id_red):
+    """ Ruta con el árbol dinámico desde inicio, en JSON {inicio, fin, agregar?, actualizar?, quitar?}.
+    Los cambios se aplican a la red y el árbol solo repara los nodos afectados """
+    red = almacen_redes.obtener(id_red)
+    if red is None:
+        return jsonify(error=RED_NO_ENCONTRADA), 404
+    try:
+        datos = request.get_json(force=True)
+        with almacen_redes.candado:
+            arbol = red.dinamico(datos["inicio"])
+            arbol.reparados = 0
+            aplicar_cambios(red, datos)
+            if datos["fin"] not in red.indices:
+                raise KeyError(f"No existe el nodo {datos['fin']}")
+            camino, costo = arbol.ruta(red.indices[datos["fin"]])
+            ruta = [red.nodos[k] for k in camino] if camino else None
+        return jsonify(ruta=ruta, costo=costo, reparados=arbol.reparados, **red.resumen())
+    except KeyError as e:
+        return jsonify(error=str(e.args[0])), 404
+    except Exception as e:
+        return jsonify(error=f"Error al calcular la ruta: {e}"), 400
+
+@app.route("/redes/<id_red>/rutas", methods=["POST"])
+def rutas_uno_a_muchos(id_red):
+    """ Rutas desde un origen en JSON {origen, destinos?}; sin destinos, hacia todos los nodos.
+    Reutiliza el árbol de caminos mínimos guardado para ese origen """
+    red = almacen_redes.obtener(id_red)
+    if red is None:
+        return jsonify(error=RED_NO_ENCONTRADA), 404
+    try:
+        datos = request.get_json(force=True)
+        with almacen_redes.candado:
+            motor = red.motor()
+        rutas = motor.uno_a_muchos(datos["origen"], datos.get("destinos"))
+        return jsonify(origen=datos["origen"], rutas=[{"destino": destino, "ruta": ruta, "costo": costo}
+                                                      for destino, (ruta, costo) in rutas.items()])
+    except KeyError as e:
+        return jsonify(error=str(e.args[0])), 404
+    except Exception as e:
+        return jsonify(error=f"Error al calcular las rutas: {e}"), 400
+
+@app.route("/redes/<id_red>/distancias")
+def distancias_todos_los_pares(id_red):
+    """ Costos mínimos entre todos los pares de nodos (null si no hay camino) """
+    red = almacen_redes.obtener(id_red)
+    if red is None:
+        return jsonify(error=RED_NO_ENCONTRADA), 404
+    try:
+        with almacen_redes.candado:
+            motor = red.motor()
+        distancias = motor.todos_los_pares()
+        return jsonify(nodos=motor.nodos, distancias=np.where(np.isinf(distancias), None, distancias).tolist())
+    except Exception as e:
+        return jsonify(error=f"Error al calcular las distancias: {e}"), 400
+
+@app.route('/redes')
+def estadisticas_redes():
+    return jsonify(almacen_redes.estadisticas())
+
+cola_trabajos = ColaTrabajos()
+
+def trabajo_ruta(nodos, aristas, inicio, fin, algoritmo, formato):
+    """ Se ejecuta en un proceso del pool de trabajos: reconstruye la red desde su forma compacta, busca
+    la ruta y la dibuja. El progreso es la etapa en curso """
+    reportar_progreso(etapa="ruta")
+    motor = MotorRutas(nodos, {nodo: i for i, nodo in enumerate(nodos)}, aristas)
+    try:
+        ruta_optima, costo = motor.ruta(inicio, fin, algoritmo)
+    except KeyError:
+        ruta_optima, costo = None, None
+
+    reportar_progreso(etapa="dibujo")
+    G = generar_grafo(nodos, ((nodos[i], nodos[j], peso) for (i, j), peso in aristas.items()))
+    formato = formato_imagen(formato, G)
+    return {"ruta_optima": ruta_optima, "costo": costo, "tramos": tramos_ruta(G, ruta_optima),
+            "formato": formato, "imagen": graficar_red(G, ruta_optima, formato)}
+
+@app.route("/trabajos", methods=["POST"])
+def enviar_trabajo():
+    """ Ruta y dibujo en segundo plano para una red guardada: JSON o formulario {id, inicio, fin,
+    algoritmo?, formato?, plazo?}. Responde 202 con el id del trabajo o 503 si la cola está llena """
+    datos = request.get_json(silent=True) or request.form
+    red = almacen_redes.obtener(datos.get("id"))
+    if red is None:
+        return jsonify(error=RED_NO_ENCONTRADA), 404
+    algoritmo = datos.get("algoritmo", "dijkstra")
+    if algoritmo not in ALGORITMOS_RUTA:
+        return jsonify(error=f"Algoritmo no válido: {algoritmo}"), 400
+    try:
+        plazo = float(datos["plazo"]) if datos.get("plazo") else None
+    except ValueError:
+        return jsonify(error="El plazo debe ser un número de segundos"), 400
+
+    # Copia de la versión actual: los cambios posteriores a la red no afectan al trabajo
+    with almacen_redes.candado:
+        nodos, aristas = list(red.nodos), dict(red.aristas)
+
+    def al_terminar(salida):
+        salida["id_resultado"] = almacen_resultados.guardar({"ruta_optima": salida["ruta_optima"], "costo": salida["costo"],
+                                                             "tramos": salida["tramos"]})
+        return salida
+
+    trabajo = cola_trabajos.enviar(trabajo_ruta, (nodos, aristas, datos.get("inicio"), datos.get("fin"), algoritmo,
+                                                  datos.get("formato")), plazo, al_terminar)
+    if trabajo is None:
+        return jsonify(error="La cola de trabajos está llena; intenta más tarde"), 503
+    return jsonify(trabajo.resumen()), 202
+
+@app.route("/trabajos")
+def estadisticas_trabajos():
+    return jsonify(cola_trabajos.estadisticas())
+
+@app.route("/trabajos/<id_trabajo>")
+def estado_trabajo(id_trabajo):
+    cuerpo, codigo = respuesta_estado(cola_trabajos.obtener(id_trabajo))
+    return jsonify(cuerpo), codigo
+
+@app.route("/trabajos/<id_trabajo>/resultado")
+def resultado_trabajo(id_trabajo):
+    """ Ruta, costo, tramos y la imagen en el formato elegido; id_resultado sirve para /descargar """
+    cuerpo, codigo = respuesta_resultado(cola_trabajos.obtener(id_trabajo))
+    return jsonify(cuerpo), codigo
+
+@app.route("/trabajos/<id_trabajo>", methods=["DELETE"])
+def cancelar_trabajo(id_trabajo):
+    cuerpo, codigo = respuesta_estado(cola_trabajos.cancelar(id_trabajo))
+    return jsonify(cuerpo), codigo
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,39 @@
+""" Caché LRU acotada por número de entradas, con contadores de aciertos y fallos. La usan la caché de
+resultados de la calculadora de programación lineal y la de layouts de la calculadora de redes """
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """ Al pasar de `tamano` entradas se descarta la usada hace más tiempo; tamano 0 la desactiva """
+
+    def __init__(self, tamano):
+        self.tamano = tamano
+        self._entradas = OrderedDict()
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        """ El valor guardado o None """
+        with self._candado:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return self._entradas[clave]
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave, valor):
+        if self.tamano <= 0:
+            return
+        with self._candado:
+            self._entradas[clave] = valor
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.tamano:
+                self._entradas.popitem(last=False)
+
+    def estadisticas(self):
+        with self._candado:
+            return {"tamano": self.tamano, "entradas": len(self._entradas),
+                    "aciertos": self.aciertos, "fallos": self.fallos}
@@ -0,0 +1,145 @@
+""" Resultados guardados en el servidor con vencimiento y descargas generadas por flujo (PDF, TXT y CSV),
+compartidos por las tres calculadoras """
+import csv
+import io
+import os
+import re
+import secrets
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from flask import Response, stream_with_context
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+from scipy import sparse
+
+TTL_RESULTADOS = float(os.environ.get("TTL_RESULTADOS", "3600"))  # Segundos que se guarda cada resultado
+TAMANO_ALMACEN_RESULTADOS = int(os.environ.get("TAMANO_ALMACEN_RESULTADOS", "256"))  # Resultados como máximo
+BYTES_ALMACEN_RESULTADOS = int(os.environ.get("BYTES_ALMACEN_RESULTADOS", str(256 * 1024 * 1024)))  # Memoria de los arreglos guardados
+TAMANO_BLOQUE = 64 * 1024  # Bytes por fragmento de la respuesta
+MARGEN_PDF = 50
+FUENTE_PDF = "Helvetica"
+TAMANO_FUENTE_PDF = 9
+ALTO_LINEA_PDF = 12
+
+def tamano_en_bytes(valor):
+    """ Memoria aproximada de los arreglos de NumPy y matrices dispersas dentro de diccionarios, listas
+    y tuplas; el resto (números, textos) no se cuenta """
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if sparse.issparse(valor):
+        return sum(arreglo.nbytes for arreglo in (getattr(valor, nombre, None) for nombre in ("data", "indices", "indptr", "row", "col"))
+                   if arreglo is not None)
+    if isinstance(valor, dict):
+        return sum(tamano_en_bytes(elemento) for elemento in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sum(tamano_en_bytes(elemento) for elemento in valor)
+    return 0
+
+class AlmacenResultados:
+    """ Resultados por id: vencen TTL segundos después de guardarse y, si hay más de `tamano` o sus
+    arreglos pasan de `bytes_maximos`, se descartan los más antiguos. El último guardado se conserva
+    siempre, aunque por sí solo pase del límite """
+
+    def __init__(self, tamano=TAMANO_ALMACEN_RESULTADOS, ttl=TTL_RESULTADOS, bytes_maximos=BYTES_ALMACEN_RESULTADOS):
+        self.tamano = tamano
+        self.ttl = ttl
+        self.bytes_maximos = bytes_maximos
+        self.bytes = 0
+        self._resultados = OrderedDict()
+        self._candado = threading.Lock()
+
+    def guardar(self, resultado):
+        id_resultado = secrets.token_urlsafe(12)
+        tamano = tamano_en_bytes(resultado)
+        with self._candado:
+            self._resultados[id_resultado] = (time.monotonic(), tamano, resultado)
+            self.bytes += tamano
+            self._vencer()
+        return id_resultado
+
+    def obtener(self, id_resultado):
+        """ El resultado o None si no existe o ya venció """
+        with self._candado:
+            self._vencer()
+            entrada = self._resultados.get(id_resultado)
+            return entrada[2] if entrada else None
+
+    def _vencer(self):
+        limite = time.monotonic() - self.ttl
+        while self._resultados and (len(self._resultados) > self.tamano or next(iter(self._resultados.values()))[0] < limite
+                                    or (self.bytes > self.bytes_maximos and len(self._resultados) > 1)):
+            self.bytes -= self._resultados.popitem(last=False)[1][1]
+
+def sin_html(texto):
+    """ Quita las etiquetas de los mensajes con formato HTML; los saltos de línea quedan como espacios """
+    texto = re.sub(r"<br\s*/?>", " ", str(texto))
+    return re.sub(r"\s+", " ", re.sub(r"<[^>]+>", "", texto)).strip()
+
+def _en_bloques(partes):
+    """ Agrupa fragmentos de texto en bloques de bytes de tamaño TAMANO_BLOQUE """
+    bloque = io.StringIO()
+    for parte in partes:
+        bloque.write(parte)
+        if bloque.tell() >= TAMANO_BLOQUE:
+            yield bloque.getvalue().encode("utf-8")
+            bloque = io.StringIO()
+    if bloque.tell():
+        yield bloque.getvalue().encode("utf-8")
+
+def _txt(lineas):
+    return _en_bloques(linea + "\n" for linea in lineas)
+
+def _csv(filas):
+    def texto():
+        salida = io.StringIO()
+        escritor = csv.writer(salida)
+        for fila in filas:
+            escritor.writerow(fila)
+            yield salida.getvalue()
+            salida.seek(0)
+            salida.truncate()
+    return _en_bloques(texto())
+
+def _pdf(lineas):
+    """ PDF de varias páginas: las líneas largas se parten al ancho de la página y se agrega una página
+    nueva al llegar al margen inferior. Se escribe en un archivo temporal que luego se envía por partes """
+    ancho, alto = letter
+    with tempfile.TemporaryFile() as temporal:
+        p = canvas.Canvas(temporal, pagesize=letter)
+        p.setFont(FUENTE_PDF, TAMANO_FUENTE_PDF)
+        y = alto - MARGEN_PDF
+        for linea in lineas:
+            for parte in simpleSplit(linea, FUENTE_PDF, TAMANO_FUENTE_PDF, ancho - 2 * MARGEN_PDF) or [""]:
+                if y < MARGEN_PDF:
+                    p.showPage()
+                    p.setFont(FUENTE_PDF, TAMANO_FUENTE_PDF)
+                    y = alto - MARGEN_PDF
+                p.drawString(MARGEN_PDF, y, parte)
+                y -= ALTO_LINEA_PDF
+        p.showPage()
+        p.save()
+
+        temporal.seek(0)
+        while True:
+            bloque = temporal.read(TAMANO_BLOQUE)
+            if not bloque:
+                break
+            yield bloque
+
+FORMATOS_DESCARGA = {
+    "pdf": ("application/pdf", lambda lineas, filas: _pdf(lineas)),
+    "txt": ("text/plain; charset=utf-8", lambda lineas, filas: _txt(lineas)),
+    "csv": ("text/csv; charset=utf-8", lambda lineas, filas: _csv(filas)),
+}
+
+def descarga(tipo_archivo, lineas, filas_csv, nombre="resultado"):
+    """ Respuesta por flujo con el archivo pedido. lineas (texto para PDF y TXT) y filas_csv son
+    iterables perezosos: el archivo se genera mientras se envía """
+    mimetype, generar = FORMATOS_DESCARGA[tipo_archivo]
+    return Response(stream_with_context(generar(lineas, filas_csv)), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename={nombre}.{tipo_archivo}"})
@@ -0,0 +1,210 @@
+""" Trabajos en segundo plano para los modelos grandes: se envían a un pool de procesos acotado, con
+profundidad de cola configurable, cancelación, plazo y progreso reportado por los resolvedores.
+Compartido por las tres calculadoras """
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+TRABAJADORES = int(os.environ.get("TRABAJADORES_TRABAJOS") or max(1, (os.cpu_count() or 2) - 1))  # Procesos del pool
+PROFUNDIDAD_COLA = int(os.environ.get("PROFUNDIDAD_COLA_TRABAJOS", "16"))  # Trabajos en cola o en ejecución como máximo
+PLAZO_TRABAJOS = float(os.environ.get("PLAZO_TRABAJOS", "600"))  # Plazo máximo (segundos) de cada trabajo
+TTL_TRABAJOS = float(os.environ.get("TTL_TRABAJOS", "3600"))  # Segundos que se guarda un trabajo terminado
+INTERVALO_PROGRESO = 0.2  # Segundos mínimos entre dos reportes de progreso
+ACTIVOS = ("en cola", "ejecutando")
+
+class TrabajoDetenido(Exception):
+    """ Se lanza dentro del resolvedor cuando el trabajo se canceló o venció su plazo """
+
+# Estado del proceso hijo: canal de progreso, trabajos cancelados y trabajo en ejecución
+_canal = None
+_cancelados = None
+_actual = None
+
+def _iniciar_proceso(canal, cancelados):
+    global _canal, _cancelados
+    _canal = canal
+    _cancelados = cancelados
+
+def _ejecutar(id_trabajo, plazo, funcion, args):
+    """ Se ejecuta en el proceso hijo: devuelve el resultado y el último progreso reportado """
+    global _actual
+    if time.time() > plazo:
+        raise TrabajoDetenido("vencido")
+    _actual = {"id": id_trabajo, "plazo": plazo, "siguiente": 0.0, "datos": {}}
+    _canal.put((id_trabajo, "ejecutando", None))
+    try:
+        return funcion(*args), _actual["datos"]
+    finally:
+        _actual = None
+
+def reportar_progreso(**datos):
+    """ La llaman los resolvedores en cada pivote o asignación. Fuera de un trabajo no hace nada; dentro,
+    acumula los datos y los envía como máximo cada INTERVALO_PROGRESO segundos, momento en que también
+    detiene el trabajo si se canceló o venció su plazo """
+    if _actual is None:
+        return
+    _actual["datos"].update(datos)
+    ahora = time.time()
+    if ahora < _actual["siguiente"]:
+        return
+    _actual["siguiente"] = ahora + INTERVALO_PROGRESO
+    if ahora > _actual["plazo"]:
+        raise TrabajoDetenido("vencido")
+    if _actual["id"] in _cancelados:
+        raise TrabajoDetenido("cancelado")
+    _canal.put((_actual["id"], "progreso", dict(_actual["datos"])))
+
+class Trabajo:
+    def __init__(self, id_trabajo, plazo):
+        self.id = id_trabajo
+        self.estado = "en cola"
+        self.progreso = {}
+        self.creado = time.time()
+        self.plazo = plazo
+        self.terminado = None
+        self.resultado = None
+        self.error = None
+        self.futuro = None
+
+    def resumen(self):
+        ahora = self.terminado or time.time()
+        return {"id": self.id, "estado": self.estado, "progreso": self.progreso, "error": self.error,
+                "segundos": round(ahora - self.creado, 3), "plazo": round(self.plazo - self.creado, 3)}
+
+class ColaTrabajos:
+    """ Pool de procesos (creado al primer uso) con los trabajos por id. Rechaza trabajos nuevos cuando
+    hay `profundidad` trabajos ocupando el pool: en cola, en ejecución o ya cancelados o vencidos pero
+    con el resolvedor todavía corriendo (se detiene en su siguiente reporte de progreso). Los procesos
+    se crean con spawn: no heredan los hilos ni los candados del servidor """
+
+    def __init__(self, trabajadores=TRABAJADORES, profundidad=PROFUNDIDAD_COLA, plazo=PLAZO_TRABAJOS, ttl=TTL_TRABAJOS):
+        self.trabajadores = trabajadores
+        self.profundidad = profundidad
+        self.plazo = plazo
+        self.ttl = ttl
+        self._trabajos = OrderedDict()
+        self._candado = threading.Lock()
+        self._pool = None
+
+    def _iniciar(self):
+        contexto = multiprocessing.get_context("spawn")
+        self._manager = contexto.Manager()
+        self._cancelados = self._manager.dict()
+        self._canal = contexto.Queue()
+        self._pool = ProcessPoolExecutor(max_workers=self.trabajadores, mp_context=contexto,
+                                         initializer=_iniciar_proceso, initargs=(self._canal, self._cancelados))
+        threading.Thread(target=self._leer_progreso, daemon=True).start()
+
+    def _leer_progreso(self):
+        while True:
+            id_trabajo, tipo, datos = self._canal.get()
+            with self._candado:
+                trabajo = self._trabajos.get(id_trabajo)
+                if trabajo is None or trabajo.estado not in ACTIVOS:
+                    continue
+                if tipo == "ejecutando":
+                    trabajo.estado = "ejecutando"
+                else:
+                    trabajo.progreso = datos
+
+    def enviar(self, funcion, args, plazo=None, al_terminar=None):
+        """ Encola funcion(*args) (ambas deben poder enviarse a otro proceso). al_terminar convierte el
+        valor devuelto en el resultado del trabajo, en este proceso. Devuelve el trabajo o None si la
+        cola está llena """
+        plazo = min(plazo or self.plazo, self.plazo)
+        with self._candado:
+            self._vencer()
+            if self._ocupados() >= self.profundidad:
+                return None
+            if self._pool is None:
+                self._iniciar()
+            trabajo = Trabajo(secrets.token_urlsafe(12), time.time() + plazo)
+            self._trabajos[trabajo.id] = trabajo
+            trabajo.futuro = self._pool.submit(_ejecutar, trabajo.id, trabajo.plazo, funcion, args)
+        trabajo.futuro.add_done_callback(lambda futuro: self._terminar(trabajo, futuro, al_terminar))
+        return trabajo
+
+    def _terminar(self, trabajo, futuro, al_terminar):
+        estado, resultado, error, progreso = "terminado", None, None, None
+        if futuro.cancelled():
+            estado = "cancelado"
+        elif isinstance(futuro.exception(), TrabajoDetenido):
+            estado = str(futuro.exception())
+        elif futuro.exception() is not None:
+            estado, error = "error", str(futuro.exception())
+        else:
+            resultado, progreso = futuro.result()
+            try:
+                resultado = al_terminar(resultado) if al_terminar else resultado
+            except Exception as e:
+                estado, error = "error", str(e)
+
+        self._cancelados.pop(trabajo.id, None)
+        with self._candado:
+            if trabajo.estado in ACTIVOS:
+                trabajo.estado, trabajo.resultado, trabajo.error = estado, resultado, error
+                trabajo.progreso = progreso if progreso is not None else trabajo.progreso
+                trabajo.terminado = time.time()
+
+    def obtener(self, id_trabajo):
+        """ El trabajo o None; un trabajo activo que pasó su plazo se marca vencido aunque el resolvedor
+        todavía no lo haya notado """
+        with self._candado:
+            self._vencer()
+            trabajo = self._trabajos.get(id_trabajo)
+            vencido = trabajo is not None and trabajo.estado in ACTIVOS and time.time() > trabajo.plazo
+            if vencido:
+                trabajo.estado, trabajo.terminado = "vencido", time.time()
+        if vencido:
+            self._detener(trabajo)
+        return trabajo
+
+    def cancelar(self, id_trabajo):
+        """ Cancela un trabajo en cola o en ejecución (el resolvedor se detiene en su siguiente reporte
+        de progreso). Devuelve el trabajo o None si no existe """
+        with self._candado:
+            trabajo = self._trabajos.get(id_trabajo)
+            if trabajo is None or trabajo.estado not in ACTIVOS:
+                return trabajo
+            trabajo.estado, trabajo.terminado = "cancelado", time.time()
+        self._detener(trabajo)
+        return trabajo
+
+    def _detener(self, trabajo):
+        """ Quita el trabajo de la cola o, si ya se está ejecutando, le pide que se detenga """
+        if not trabajo.futuro.cancel():
+            self._cancelados[trabajo.id] = True
+
+    def _ocupados(self):
+        return sum(not trabajo.futuro.done() for trabajo in self._trabajos.values())
+
+    def _vencer(self):
+        limite = time.time() - self.ttl
+        for id_trabajo in [clave for clave, trabajo in self._trabajos.items()
+                           if trabajo.terminado is not None and trabajo.terminado < limite and trabajo.futuro.done()]:
+            del self._trabajos[id_trabajo]
+
+    def estadisticas(self):
+        with self._candado:
+            estados = [trabajo.estado for trabajo in self._trabajos.values()]
+            ocupados = self._ocupados()
+        return {"trabajadores": self.trabajadores, "profundidad": self.profundidad, "ocupados": ocupados,
+                "trabajos": {estado: estados.count(estado) for estado in set(estados)}}
+
+def respuesta_estado(trabajo):
+    """ (cuerpo, código) para las rutas /trabajos/<id> """
+    if trabajo is None:
+        return {"error": "El trabajo no existe o ya venció"}, 404
+    return trabajo.resumen(), 200
+
+def respuesta_resultado(trabajo):
+    """ (cuerpo, código) para las rutas /trabajos/<id>/resultado: 409 mientras no haya terminado """
+    if trabajo is None:
+        return {"error": "El trabajo no existe o ya venció"}, 404
+    if trabajo.estado != "terminado":
+        return trabajo.resumen(), 409
+    return trabajo.resultado, 200
@@ -0,0 +1,67 @@
+""" Microbenchmark: tiempo por pivote del bucle original frente al kernel vectorizado `pivotear`
+
+Uso: python benchmarks/bench_pivote.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from app import pivotear
+
+NUM_VARIABLES = 50
+DENSIDAD = 0.05  # Fracción de coeficientes distintos de cero en A
+PIVOTES = 5
+
+
+def pivote_original(tabla, col_pivote):
+    """ Copia del pivote con bucles de Python que usaban simplex, gran_m y dos_fases """
+    num_restricciones = tabla.shape[0] - 1
+    ratios = []
+    for i in range(num_restricciones):
+        if tabla[i, col_pivote] > 0:
+            ratios.append(tabla[i, -1] / tabla[i, col_pivote])
+        else:
+            ratios.append(np.inf)
+
+    fila_pivote = np.argmin(ratios)
+    if ratios[fila_pivote] == np.inf:
+        return None
+
+    tabla[fila_pivote, :] /= tabla[fila_pivote, col_pivote]
+    for i in range(num_restricciones + 1):
+        if i != fila_pivote:
+            tabla[i, :] -= tabla[i, col_pivote] * tabla[fila_pivote, :]
+    return fila_pivote
+
+
+def crear_tabla(num_restricciones, semilla=0):
+    rng = np.random.default_rng(semilla)
+    tabla = np.zeros((num_restricciones + 1, NUM_VARIABLES + num_restricciones + 1))
+    A = rng.uniform(0, 10, (num_restricciones, NUM_VARIABLES))
+    A[rng.random(A.shape) > DENSIDAD] = 0
+    A[0] = rng.uniform(1, 10, NUM_VARIABLES)  # Garantiza una fila pivote en cada columna
+    tabla[:-1, :NUM_VARIABLES] = A
+    tabla[:-1, NUM_VARIABLES:-1] = np.eye(num_restricciones)
+    tabla[:-1, -1] = rng.uniform(10, 100, num_restricciones)
+    tabla[-1, :NUM_VARIABLES] = -rng.uniform(1, 10, NUM_VARIABLES)
+    return tabla
+
+
+def medir(funcion, num_restricciones):
+    tabla = crear_tabla(num_restricciones)
+    inicio = time.perf_counter()
+    for col_pivote in range(PIVOTES):
+        funcion(tabla, col_pivote)
+    return (time.perf_counter() - inicio) / PIVOTES, tabla
+
+
+if __name__ == "__main__":
+    print(f"{'restricciones':>14} {'original (ms)':>14} {'kernel (ms)':>12} {'aceleración':>12}")
+    for num_restricciones in (100, 1000, 5000):
+        t_original, tabla_original = medir(pivote_original, num_restricciones)
+        t_kernel, tabla_kernel = medir(pivotear, num_restricciones)
+        assert np.array_equal(tabla_original, tabla_kernel)
+        print(f"{num_restricciones:>14} {t_original * 1e3:>14.2f} {t_kernel * 1e3:>12.2f} {t_original / t_kernel:>11.1f}x")
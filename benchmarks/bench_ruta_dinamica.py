@@ -0,0 +1,99 @@
+""" Benchmark: árbol de caminos mínimos dinámico (`ArbolDinamico`) frente a recalcular desde cero
+después de cada cambio de arista, en redes de 10k a 100k aristas. Comprueba que las distancias coincidan
+
+Uso: python benchmarks/bench_ruta_dinamica.py
+"""
+import os
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from app3 import MotorRutas, Red, calcular_ruta_optima
+
+CAMBIOS = 200
+CAMBIOS_NETWORKX = 3  # generar_grafo + Dijkstra de networkx es lento: se mide en pocos cambios
+ARISTAS_POR_NODO = 4
+
+
+def crear_red(num_aristas, semilla=0):
+    rng = np.random.default_rng(semilla)
+    num_nodos = num_aristas // ARISTAS_POR_NODO
+    G = nx.gnm_random_graph(num_nodos, num_aristas, seed=semilla)
+    conexiones = [(str(u), str(v), float(rng.integers(1, 100))) for u, v in G.edges]
+    return Red([str(i) for i in range(num_nodos)], conexiones)
+
+
+def crear_cambios(red, semilla=0):
+    """ Mezcla de subidas, bajadas, altas y bajas; la mitad sobre aristas del árbol desde el nodo 0 """
+    rng = np.random.default_rng(semilla)
+    _, predecesores = red.motor().arbol(0)
+    del_arbol = [(int(p), v) for v, p in enumerate(predecesores) if p >= 0]
+    aristas = list(red.aristas)
+    cambios = []
+    for k in range(CAMBIOS):
+        i, j = del_arbol[rng.integers(len(del_arbol))] if k % 2 else aristas[rng.integers(len(aristas))]
+        tipo = rng.choice(["subir", "bajar", "quitar", "agregar"])
+        if tipo == "agregar":
+            i, j = rng.integers(0, len(red.nodos), 2)
+        cambios.append((tipo, red.nodos[i], red.nodos[j], float(rng.integers(1, 100))))
+    return cambios
+
+
+def aplicar(red, cambio):
+    tipo, nodo1, nodo2, costo = cambio
+    if nodo1 == nodo2:
+        return
+    try:
+        if tipo == "quitar":
+            red.quitar(nodo1, nodo2)
+        elif tipo == "agregar":
+            red.agregar(nodo1, nodo2, costo)
+        else:
+            i, j = red.indices[nodo1], red.indices[nodo2]
+            anterior = red.aristas[(min(i, j), max(i, j))]
+            red.actualizar(nodo1, nodo2, anterior * 2 if tipo == "subir" else anterior / 2)
+    except KeyError:
+        pass  # La arista ya se había quitado en un cambio anterior
+
+
+def medir(num_aristas):
+    cambios = crear_cambios(crear_red(num_aristas))
+
+    # Dinámico: el árbol se repara dentro de cada cambio
+    red = crear_red(num_aristas)
+    arbol = red.dinamico("0")
+    inicio = time.perf_counter()
+    for cambio in cambios:
+        aplicar(red, cambio)
+    t_dinamico = (time.perf_counter() - inicio) / CAMBIOS
+    distancias_dinamico = np.array(arbol.distancia)
+
+    # Desde cero con CSR: reconstruir la matriz y Dijkstra de scipy después de cada cambio
+    red = crear_red(num_aristas)
+    inicio = time.perf_counter()
+    for cambio in cambios:
+        aplicar(red, cambio)
+        distancias, _ = MotorRutas(red.nodos, red.indices, red.aristas).arbol(0)
+    t_csr = (time.perf_counter() - inicio) / CAMBIOS
+    assert np.allclose(distancias_dinamico, distancias)
+
+    # Desde cero como antes en /resolver: generar_grafo y Dijkstra de networkx
+    red = crear_red(num_aristas)
+    inicio = time.perf_counter()
+    for cambio in cambios[:CAMBIOS_NETWORKX]:
+        aplicar(red, cambio)
+        red._grafo = None  # Sin reutilizar el grafo: reconstrucción completa como antes
+        calcular_ruta_optima(red.grafo(), "0", red.nodos[-1])
+    t_networkx = (time.perf_counter() - inicio) / CAMBIOS_NETWORKX
+    return t_dinamico, t_csr, t_networkx
+
+
+if __name__ == "__main__":
+    print(f"{'aristas':>8} {'dinámico (ms)':>14} {'CSR completo (ms)':>18} {'networkx (ms)':>14} {'vs CSR':>8} {'vs networkx':>12}")
+    for num_aristas in (10_000, 50_000, 100_000):
+        t_dinamico, t_csr, t_networkx = medir(num_aristas)
+        print(f"{num_aristas:>8} {t_dinamico * 1e3:>14.3f} {t_csr * 1e3:>18.2f} {t_networkx * 1e3:>14.2f} "
+              f"{t_csr / t_dinamico:>7.1f}x {t_networkx / t_dinamico:>11.1f}x")
@@ -0,0 +1,86 @@
+""" Benchmark: aproximación de Vogel original (penalizaciones recalculadas en cada asignación)
+frente a la versión incremental `aproximacion_vogel`. Comprueba que las asignaciones sean idénticas
+
+Uso: python benchmarks/bench_vogel.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+from app2 import aproximacion_vogel
+
+COSTO_MAXIMO = 50  # Costos enteros pequeños: muchos empates entre penalizaciones
+
+
+def vogel_original(supply, demand, cost_matrix):
+    """ Copia de la aproximación de Vogel con bucles de Python y np.sort en cada iteración """
+    supply = supply.copy()
+    demand = demand.copy()
+    allocation = np.zeros_like(cost_matrix)
+
+    while np.any(supply > 0) and np.any(demand > 0):
+        penalty_rows = []
+        penalty_cols = []
+
+        for i in range(len(supply)):
+            if supply[i] > 0:
+                row_valid = cost_matrix[i, :][demand > 0]
+                if len(row_valid) > 1:
+                    sorted_row = np.sort(row_valid)
+                    penalty_rows.append(sorted_row[1] - sorted_row[0])
+                else:
+                    penalty_rows.append(0)
+            else:
+                penalty_rows.append(-1)
+
+        for j in range(len(demand)):
+            if demand[j] > 0:
+                col_valid = cost_matrix[:, j][supply > 0]
+                if len(col_valid) > 1:
+                    sorted_col = np.sort(col_valid)
+                    penalty_cols.append(sorted_col[1] - sorted_col[0])
+                else:
+                    penalty_cols.append(0)
+            else:
+                penalty_cols.append(-1)
+
+        if np.max(penalty_rows) >= np.max(penalty_cols):
+            i = np.argmax(penalty_rows)
+            j = np.argmin(np.where(demand > 0, cost_matrix[i, :], np.inf))
+        else:
+            j = np.argmax(penalty_cols)
+            i = np.argmin(np.where(supply > 0, cost_matrix[:, j], np.inf))
+
+        qty = min(supply[i], demand[j])
+        allocation[i, j] = qty
+        supply[i] -= qty
+        demand[j] -= qty
+
+    return allocation
+
+
+def crear_problema(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    cost_matrix = rng.integers(1, COSTO_MAXIMO, (n, n)).astype(float)
+    supply = rng.integers(1, 100, n).astype(float)
+    demand = rng.multinomial(int(supply.sum()), np.ones(n) / n).astype(float)
+    return supply, demand, cost_matrix
+
+
+def medir(funcion, n):
+    supply, demand, cost_matrix = crear_problema(n)
+    inicio = time.perf_counter()
+    allocation = funcion(supply, demand, cost_matrix)
+    return time.perf_counter() - inicio, allocation
+
+
+if __name__ == "__main__":
+    print(f"{'m x n':>12} {'original (s)':>13} {'incremental (s)':>16} {'aceleración':>12}")
+    for n in (100, 300, 1000):
+        t_original, asignacion_original = medir(vogel_original, n)
+        t_incremental, asignacion_incremental = medir(aproximacion_vogel, n)
+        assert np.array_equal(asignacion_original, asignacion_incremental)
+        print(f"{f'{n} x {n}':>12} {t_original:>13.3f} {t_incremental:>16.3f} {t_original / t_incremental:>11.1f}x")
@@ -0,0 +1,144 @@
+""" Pruebas de la calculadora de programación lineal (app.py) con el cliente de pruebas de Flask.
+
+Uso:
+    python -m pytest tests
+"""
+import io
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+import app as calculadora
+
+
+def formulario(traza="full", metodo="simplex", **extra):
+    """ max 3x1 + 5x2 sujeto a x1 + 2x2 <= 8, 3x1 + x2 <= 9 (óptimo 21 en (2, 3)) """
+    datos = {"tipo": "max", "num_variables": "2", "num_restricciones": "2", "metodo": metodo, "traza": traza,
+             "c0": "3", "c1": "5", "a0_0": "1", "a0_1": "2", "b_0": "8", "des_0": "<=",
+             "a1_0": "3", "a1_1": "1", "b_1": "9", "des_1": "<="}
+    datos.update(extra)
+    return datos
+
+
+def esperar_trabajo(cliente, id_trabajo, plazo=60):
+    limite = time.time() + plazo
+    while time.time() < limite:
+        estado = cliente.get(f"/trabajos/{id_trabajo}").get_json()
+        if estado["estado"] not in ("en cola", "ejecutando"):
+            return estado
+        time.sleep(0.1)
+    raise AssertionError("El trabajo no terminó a tiempo")
+
+
+def test_trabajo_no_acotado_devuelve_el_mensaje():
+    cliente = calculadora.app.test_client()
+    respuesta = cliente.post("/trabajos", json={"tipo": "max", "c": [1, 1], "A": [[1, -1]], "b": [1],
+                                                "metodo": "simplex"})
+    assert respuesta.status_code == 202
+
+    estado = esperar_trabajo(cliente, respuesta.get_json()["id"])
+    assert estado["estado"] == "terminado"
+    resultado = cliente.get(f"/trabajos/{estado['id']}/resultado").get_json()
+    assert resultado["resultado"] == "Solución no acotada"
+    assert resultado["solucion"] is None
+
+
+def test_limite_de_iteraciones_muestra_el_mensaje():
+    cliente = calculadora.app.test_client()
+    for metodo in ("simplex", "revisado"):
+        for traza in ("off", "summary", "full"):
+            respuesta = cliente.post("/resolver", data=formulario(traza, metodo, max_iteraciones="1"))
+            html = respuesta.get_data(as_text=True)
+            assert respuesta.status_code == 200
+            assert calculadora.LIMITE_ITERACIONES in html
+            assert "Error en la resolución" not in html
+
+
+MPS_MINIMIZAR = """NAME          DIETA
+ROWS
+ N  COSTO
+ G  R1
+ G  R2
+COLUMNS
+    X1        COSTO     2.0          R1        1.0
+    X1        R2        1.0
+    X2        COSTO     3.0          R1        1.0
+    X2        R2        2.0
+RHS
+    RHS       R1        4.0          R2        6.0
+ENDATA
+"""
+
+
+def test_mps_sin_objsense_minimiza_y_simplex_usa_dos_fases():
+    """ min 2x1 + 3x2 con x1 + x2 >= 4, x1 + 2x2 >= 6: óptimo 10 en (2, 2), aunque el formulario diga max """
+    cliente = calculadora.app.test_client()
+    for metodo in ("revisado", "simplex"):
+        respuesta = cliente.post("/cargar", data={"modelo": (io.BytesIO(MPS_MINIMIZAR.encode()), "dieta.mps"),
+                                                  "tipo": "max", "metodo": metodo, "traza": "off"},
+                                 content_type="multipart/form-data")
+        html = respuesta.get_data(as_text=True)
+        assert "Valor Óptimo: 10.0" in html, metodo
+
+
+def test_traza_despues_de_un_acierto_de_cache_tiene_pasos():
+    cliente = calculadora.app.test_client()
+    datos = formulario("off", "simplex", c0="7", c1="11")
+    cliente.post("/resolver", data=datos)
+    aciertos = calculadora.cache_resultados.estadisticas()["aciertos"]
+    assert "Resultado recuperado de la caché" in cliente.post("/resolver", data=datos).get_data(as_text=True)
+    assert calculadora.cache_resultados.estadisticas()["aciertos"] == aciertos + 1
+
+    html = cliente.post("/resolver", data=dict(datos, traza="full")).get_data(as_text=True)
+    assert "Resultado recuperado de la caché" not in html
+    id_resultado = re.search(r'name="id_resultado" value="([^"]+)"', html).group(1)
+    assert cliente.get(f"/pasos/{id_resultado}").get_json()["total"] > 0
+
+    # Otro límite de iteraciones no reutiliza la entrada guardada
+    html = cliente.post("/resolver", data=dict(datos, max_iteraciones="1")).get_data(as_text=True)
+    assert calculadora.LIMITE_ITERACIONES in html
+
+
+def test_presolve_desactivado_por_defecto():
+    html = calculadora.app.test_client().get("/").get_data(as_text=True)
+    seleccion = html[html.index('name="presolve"'):]
+    assert seleccion.index('value="off"') < seleccion.index('value="on"')
+    assert 'value="off" selected' in seleccion
+
+
+def test_traza_completa_repetida_sale_de_la_cache():
+    cliente = calculadora.app.test_client()
+    datos = formulario("full", "simplex", c0="13", c1="17")
+    estadisticas = calculadora.cache_resultados.estadisticas()
+
+    primera = cliente.post("/resolver", data=datos).get_data(as_text=True)
+    segunda = cliente.post("/resolver", data=datos).get_data(as_text=True)
+    despues = calculadora.cache_resultados.estadisticas()
+    assert despues["fallos"] == estadisticas["fallos"] + 1
+    assert despues["aciertos"] == estadisticas["aciertos"] + 1
+    assert "recuperados de la caché" not in primera and "recuperados de la caché" in segunda
+
+    totales = []
+    for html in (primera, segunda):
+        id_resultado = re.search(r'name="id_resultado" value="([^"]+)"', html).group(1)
+        totales.append(cliente.get(f"/pasos/{id_resultado}").get_json()["total"])
+    assert totales[0] == totales[1] > 0
+
+    # Con traza, el mismo problema escalado tiene otras tablas: no reutiliza la entrada
+    escalado = dict(datos, a0_0="2", a0_1="4", b_0="16")
+    assert "recuperados de la caché" not in cliente.post("/resolver", data=escalado).get_data(as_text=True)
+
+
+def test_traza_recorta_el_buffer_al_terminar():
+    traza = calculadora.Traza("full")
+    for k in range(5):
+        traza.tabla(np.full((2, 3), k))
+    pasos = traza.pasos
+    assert pasos.shape == (5, 2, 3)
+    assert pasos.base is None  # Arreglo propio, no una vista del buffer de capacidad 8
+    assert [paso[0, 0] for paso in pasos] == [0, 1, 2, 3, 4]
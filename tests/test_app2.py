@@ -0,0 +1,277 @@
+""" Pruebas de la calculadora de transporte (app2.py) con el cliente de pruebas de Flask.
+
+Uso:
+    python -m pytest tests
+"""
+import io
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from scipy.optimize import linprog
+from werkzeug.datastructures import FileStorage
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+import app2 as transporte
+
+
+def test_resolver_red_muestra_solo_asignaciones_por_paginas():
+    """ 150 orígenes y 150 destinos con oferta y demanda 1 y carriles i -> i (costo 2, repetido con
+    costo 5) e i -> i+1 (costo 9): la solución son las 150 celdas de la diagonal """
+    n = 150
+    carriles = [f"{i},{i},5\n{i},{i},2\n" for i in range(n)] + [f"{i},{i + 1},9\n" for i in range(n - 1)]
+    cliente = transporte.app.test_client()
+    respuesta = cliente.post("/resolver_red", data={
+        "oferta": " ".join(["1"] * n), "demanda": " ".join(["1"] * n),
+        "carriles": (io.BytesIO("".join(carriles).encode()), "carriles.csv")}, content_type="multipart/form-data")
+    html = respuesta.get_data(as_text=True)
+    assert respuesta.status_code == 200
+    filas = html.split('<tbody id="asignaciones">')[1].split("</tbody>")[0]
+    assert filas.count("<tr>") == transporte.TAMANO_PAGINA_ASIGNACIONES
+    assert f"({transporte.TAMANO_PAGINA_ASIGNACIONES} de {n})" in html
+
+    id_resultado = html.split('name="id_resultado" value="')[1].split('"')[0]
+    pagina = cliente.get(f"/asignaciones/{id_resultado}?desde={transporte.TAMANO_PAGINA_ASIGNACIONES}").get_json()
+    assert pagina["total"] == n and pagina["hasta"] == n
+    assert pagina["asignaciones"][0] == [transporte.TAMANO_PAGINA_ASIGNACIONES + 1] * 2 + [1.0, 2.0]
+
+
+def problema_grande():
+    rng = np.random.default_rng(0)
+    oferta = rng.integers(1, 50, 600).astype(float)
+    demanda = oferta[rng.permutation(600)].copy()
+    return oferta, demanda, rng.integers(1, 100, (600, 600)).astype(float)
+
+
+def test_carrera_fuera_de_plazo_termina_sus_procesos_y_devuelve_una_solucion(monkeypatch):
+    oferta, demanda, costos = problema_grande()
+    tomados = []
+    tomar = transporte.pool_heuristicas.tomar
+    monkeypatch.setattr(transporte.pool_heuristicas, "tomar", lambda: tomados.append(tomar()) or tomados[-1])
+
+    inicio = time.monotonic()
+    _, solucion, resultados = transporte.carrera_heuristicas(oferta, demanda, costos, plazo=0)
+    assert time.monotonic() - inicio < 5
+    estados = [datos["estado"] for datos in resultados.values()]
+    assert "fuera de plazo" in estados and set(estados) <= {"ok", "fuera de plazo"}
+    assert factible(solucion, oferta, demanda)
+    terminados = [trabajador for trabajador in tomados if not trabajador.proceso.is_alive()]
+    assert len(terminados) == estados.count("fuera de plazo")
+
+
+def test_carreras_simultaneas_no_se_afectan():
+    """ Una carrera que vence su plazo solo termina sus propios procesos """
+    oferta, demanda, costos = problema_grande()
+    pequeno = (np.array([20.0, 30.0]), np.array([10.0, 40.0]), np.array([[1.0, 2.0], [3.0, 1.0]]))
+    transporte.carrera_heuristicas(*pequeno)  # Arranca los trabajadores
+    salidas = []
+
+    def vencida():
+        for _ in range(3):
+            transporte.carrera_heuristicas(oferta, demanda, costos, plazo=0)
+
+    hilo = threading.Thread(target=vencida)
+    hilo.start()
+    while hilo.is_alive():
+        salidas.append(transporte.carrera_heuristicas(*pequeno, plazo=30))
+    hilo.join()
+    for _, _, resultados in salidas:
+        assert all(datos["estado"] == "ok" for datos in resultados.values())
+
+
+def test_npy_mapeado_borra_el_temporal_despues_de_resolver(monkeypatch, tmp_path):
+    monkeypatch.setattr(transporte, "UMBRAL_MMAP", 0)
+    monkeypatch.setattr(transporte.tempfile, "tempdir", str(tmp_path))
+    costos = io.BytesIO()
+    np.save(costos, np.array([[4.0, 6.0], [5.0, 3.0]]))
+    respuesta = transporte.app.test_client().post("/cargar", data={
+        "costos": (io.BytesIO(costos.getvalue()), "costos.npy"), "oferta": "3 4", "demanda": "2 5",
+        "metodo": "Esquina Noroeste"}, content_type="multipart/form-data")
+    html = respuesta.get_data(as_text=True)
+    assert "Error" not in html
+    assert "<strong>26.0</strong>" in html
+    assert list(tmp_path.iterdir()) == []
+
+    # Los archivos subidos muestran solo las asignaciones distintas de cero, con su costo
+    filas = html.split('<tbody id="asignaciones">')[1].split("</tbody>")[0]
+    assert filas.count("<tr>") == 3
+    assert "<td>4</td>" in filas and "<td>3</td>" in filas
+
+
+def test_oferta_y_demanda_decimales_balanceadas():
+    """ 0.1 + 0.2 no es exactamente 0.15 + 0.15 en punto flotante, pero el problema está balanceado """
+    for metodo in ("Esquina Noroeste", "Menor Costo", "Aproximación de Vogel"):
+        datos = transporte.calcular_transporte(np.array([0.1, 0.2]), np.array([0.15, 0.15]),
+                                               np.array([[1.0, 2.0], [3.0, 1.0]]), metodo)
+        assert not isinstance(datos, str), datos
+        assert np.isclose(datos["costo_total"], 0.4)
+
+
+def test_npy_mapeado_de_otro_tipo_se_convierte_sin_copiar_a_memoria(monkeypatch, tmp_path):
+    monkeypatch.setattr(transporte, "UMBRAL_MMAP", 64)  # Bloques de 8 filas de 1 columna
+    monkeypatch.setattr(transporte.tempfile, "tempdir", str(tmp_path))
+    contenido = io.BytesIO()
+    np.save(contenido, np.arange(20, dtype=np.int32).reshape(20, 1))
+    archivo = FileStorage(io.BytesIO(contenido.getvalue()), filename="costos.npy")
+    with transporte.leer_arreglos(archivo) as datos:
+        assert isinstance(datos["costos"], np.memmap)
+        assert datos["costos"].dtype == np.float64
+        assert np.array_equal(datos["costos"][:, 0], np.arange(20))
+    assert list(tmp_path.iterdir()) == []
+
+
+def transporte_aleatorio(rng, degenerado=False):
+    """ Problema balanceado; con degenerado, las ofertas son las demandas en otro orden (hay sumas
+    parciales iguales y las heurísticas agotan fila y columna a la vez) """
+    m, n = rng.integers(2, 8, 2)
+    if degenerado:
+        demanda = rng.integers(1, 6, n).astype(float)
+        oferta = rng.permutation(demanda)
+    else:
+        oferta = rng.integers(1, 30, m).astype(float)
+        demanda = rng.multinomial(int(oferta.sum()), np.ones(n) / n).astype(float)
+    costos = rng.integers(1, 20, (len(oferta), len(demanda))).astype(float)
+    return oferta, demanda, costos
+
+
+def optimo_transporte(oferta, demanda, costos):
+    m, n = costos.shape
+    A = np.vstack([np.kron(np.eye(m), np.ones(n)), np.kron(np.ones(m), np.eye(n))])
+    return linprog(costos.ravel(), A_eq=A, b_eq=np.concatenate([oferta, demanda]), method="highs").fun
+
+
+def factible(asignacion, oferta, demanda):
+    asignacion = np.asarray(asignacion)
+    return (np.all(asignacion >= -1e-9) and np.allclose(asignacion.sum(axis=1), oferta)
+            and np.allclose(asignacion.sum(axis=0), demanda))
+
+
+def test_modi_llega_al_optimo_desde_cualquier_heuristica():
+    rng = np.random.default_rng(11)
+    for k in range(60):
+        oferta, demanda, costos = transporte_aleatorio(rng, degenerado=k % 2 == 1)
+        for heuristica in transporte.HEURISTICAS.values():
+            inicial = heuristica(oferta.copy(), demanda.copy(), costos)
+            optima, _ = transporte.transporte_simplex(inicial, costos)
+            assert factible(optima, oferta, demanda)
+            assert np.isclose(np.sum(optima * costos), optimo_transporte(oferta, demanda, costos))
+
+
+def test_limite_de_iteraciones_de_modi_muestra_el_mensaje(monkeypatch):
+    """ Esquina noroeste en este problema necesita varios pivotes MODI """
+    monkeypatch.setattr(transporte.transporte_simplex, "__defaults__", (1,))
+    datos = {"metodo": "Esquina Noroeste", "filas": "4", "columnas": "4"}
+    costos = [[8, 6, 10], [9, 12, 13], [14, 9, 16]]
+    for i, fila in enumerate(costos):
+        datos.update({f"cost_{i}_{j}": str(costo) for j, costo in enumerate(fila)})
+    datos.update({"supply_0": "35", "supply_1": "50", "supply_2": "40",
+                  "demand_0": "45", "demand_1": "20", "demand_2": "60"})
+    respuesta = transporte.app.test_client().post("/resolver", data=datos)
+    assert respuesta.status_code == 200
+    assert respuesta.get_data(as_text=True) == transporte.LIMITE_ITERACIONES_MODI
+
+
+def vogel_referencia(oferta, demanda, costos):
+    """ Vogel recalculando todas las penalizaciones en cada paso, como antes de hacerlo incremental """
+    oferta, demanda = oferta.copy(), demanda.copy()
+    asignacion = np.zeros_like(costos)
+    while np.any(oferta > 0) and np.any(demanda > 0):
+        def penalizaciones(matriz, activas, otras):
+            resultado = []
+            for k in range(len(activas)):
+                validas = np.sort(matriz[k, otras])
+                resultado.append(-1 if not activas[k] else validas[1] - validas[0] if len(validas) > 1 else 0)
+            return resultado
+        por_fila = penalizaciones(costos, oferta > 0, demanda > 0)
+        por_columna = penalizaciones(costos.T, demanda > 0, oferta > 0)
+        if max(por_fila) >= max(por_columna):
+            i = int(np.argmax(por_fila))
+            j = int(np.argmin(np.where(demanda > 0, costos[i], np.inf)))
+        else:
+            j = int(np.argmax(por_columna))
+            i = int(np.argmin(np.where(oferta > 0, costos[:, j], np.inf)))
+        cantidad = min(oferta[i], demanda[j])
+        asignacion[i, j] = cantidad
+        oferta[i] -= cantidad
+        demanda[j] -= cantidad
+    return asignacion
+
+
+def test_vogel_incremental_coincide_con_el_calculo_completo():
+    """ Costos pequeños para forzar empates en penalizaciones y en mínimos """
+    rng = np.random.default_rng(12)
+    for k in range(200):
+        oferta, demanda, costos = transporte_aleatorio(rng, degenerado=k % 2 == 1)
+        costos = rng.integers(1, 4, costos.shape).astype(float) if k % 3 == 0 else costos
+        asignacion = transporte.aproximacion_vogel(oferta, demanda, costos)
+        assert factible(asignacion, oferta, demanda)
+        assert np.array_equal(asignacion, vogel_referencia(oferta, demanda, costos))
+
+
+def menor_costo_referencia(oferta, demanda, costos):
+    """ Menor costo buscando el mínimo entre las celdas activas en cada paso """
+    oferta, demanda = oferta.copy(), demanda.copy()
+    asignacion = np.zeros_like(costos)
+    while np.any(oferta > 0) and np.any(demanda > 0):
+        activas = np.where((oferta[:, None] > 0) & (demanda > 0), costos, np.inf)
+        i, j = np.unravel_index(np.argmin(activas), costos.shape)
+        cantidad = min(oferta[i], demanda[j])
+        asignacion[i, j] = cantidad
+        oferta[i] -= cantidad
+        demanda[j] -= cantidad
+    return asignacion
+
+
+def test_menor_costo_coincide_con_la_busqueda_del_minimo():
+    rng = np.random.default_rng(13)
+    for k in range(200):
+        oferta, demanda, costos = transporte_aleatorio(rng, degenerado=k % 2 == 1)
+        costos = rng.integers(1, 4, costos.shape).astype(float) if k % 3 == 0 else costos
+        asignacion = transporte.menor_costo(oferta, demanda, costos)
+        assert factible(asignacion, oferta, demanda)
+        assert np.array_equal(asignacion, menor_costo_referencia(oferta, demanda, costos))
+
+
+def test_deteccion_del_problema_de_asignacion():
+    unos = np.ones(3)
+    assert transporte.es_problema_asignacion(unos, unos)
+    assert not transporte.es_problema_asignacion(unos, np.ones(4))
+    assert not transporte.es_problema_asignacion(unos, np.array([1.0, 2.0, 0.0]))
+    assert not transporte.es_problema_asignacion(np.full(3, 2.0), np.full(3, 2.0))
+
+
+def test_asignacion_es_una_permutacion_optima():
+    rng = np.random.default_rng(15)
+    for n in [1, 2, 5, 12, 30]:
+        costos = rng.integers(1, 50, (n, n)).astype(float)
+        unos = np.ones(n)
+        datos = transporte.calcular_transporte(unos, unos, costos, "Esquina Noroeste")
+        assert datos["metodo"] == "Problema de Asignación"
+        assert factible(datos["solucion"], unos, unos)
+        assert set(np.unique(datos["solucion"])) <= {0.0, 1.0}
+        assert np.isclose(datos["costo_total"], optimo_transporte(unos, unos, costos))
+
+
+def test_oferta_no_unitaria_no_es_asignacion():
+    oferta = demanda = np.full(3, 2.0)
+    costos = np.array([[4.0, 1.0, 3.0], [2.0, 0.0, 5.0], [3.0, 2.0, 2.0]])
+    datos = transporte.calcular_transporte(oferta, demanda, costos, "Esquina Noroeste")
+    assert datos["metodo"] == "Esquina Noroeste"
+    assert np.isclose(datos["costo_total"], optimo_transporte(oferta, demanda, costos))
+
+
+def test_trabajo_desbalanceado_termina_con_el_mensaje_como_error():
+    cliente = transporte.app.test_client()
+    enviado = cliente.post("/trabajos", json={"oferta": [10, 20], "demanda": [10, 25], "costos": [[1, 2], [3, 4]],
+                                              "metodo": "Menor Costo"})
+    assert enviado.status_code == 202
+    id_trabajo = enviado.get_json()["id"]
+    limite = time.monotonic() + 60
+    while (estado := cliente.get(f"/trabajos/{id_trabajo}").get_json())["estado"] in ("en cola", "ejecutando"):
+        assert time.monotonic() < limite
+        time.sleep(0.05)
+    assert estado["estado"] == "error"
+    assert estado["error"].startswith("El problema está desbalanceado")
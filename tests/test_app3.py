@@ -0,0 +1,212 @@
+""" Pruebas de la red de caminos mínimos (app3.py) contra un Dijkstra completo de scipy.
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import sys
+from itertools import pairwise
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+import app3 as redes
+
+
+def red_aleatoria(rng, n=40, densidad=0.08):
+    """ Nodos "n0".."n{n-1}" y aristas {(i, j): costo} con i < j; con poca densidad quedan nodos
+    sin camino entre sí """
+    nodos = [f"n{k}" for k in range(n)]
+    aristas = {}
+    for i in range(n):
+        for j in range(i + 1, n):
+            if rng.random() < densidad:
+                aristas[(i, j)] = float(rng.integers(1, 20))
+    return nodos, aristas
+
+
+def dijkstra_completo(n, aristas):
+    if not aristas:
+        return np.where(np.eye(n) > 0, 0.0, np.inf)
+    pares = np.array(list(aristas))
+    costos = np.array(list(aristas.values()))
+    matriz = sparse.csr_matrix((costos, (pares[:, 0], pares[:, 1])), shape=(n, n))
+    return csgraph.dijkstra(matriz, directed=False)
+
+
+def costo_camino(camino, indices, aristas):
+    """ Suma de las aristas del camino; falla si dos nodos consecutivos no están unidos """
+    total = 0.0
+    for u, v in pairwise(camino):
+        i, j = sorted((indices[u], indices[v]))
+        total += aristas[(i, j)]
+    return total
+
+
+def test_rutas_de_un_par_coinciden_con_dijkstra():
+    rng = np.random.default_rng(21)
+    for _ in range(10):
+        nodos, aristas = red_aleatoria(rng)
+        indices = {nodo: k for k, nodo in enumerate(nodos)}
+        motor = redes.MotorRutas(nodos, indices, aristas)
+        esperado = dijkstra_completo(len(nodos), aristas)
+        for _ in range(30):
+            s, t = rng.integers(0, len(nodos), 2)
+            for algoritmo in redes.ALGORITMOS_RUTA:
+                camino, costo = motor.ruta(nodos[s], nodos[t], algoritmo)
+                if np.isinf(esperado[s, t]):
+                    assert camino is None and costo is None
+                else:
+                    assert camino[0] == nodos[s] and camino[-1] == nodos[t]
+                    assert np.isclose(costo, esperado[s, t])
+                    assert np.isclose(costo_camino(camino, indices, aristas), costo)
+
+
+def test_uno_a_muchos_coincide_con_dijkstra():
+    rng = np.random.default_rng(22)
+    nodos, aristas = red_aleatoria(rng)
+    indices = {nodo: k for k, nodo in enumerate(nodos)}
+    motor = redes.MotorRutas(nodos, indices, aristas)
+    esperado = dijkstra_completo(len(nodos), aristas)
+    for destino, (camino, costo) in motor.uno_a_muchos("n3").items():
+        t = indices[destino]
+        assert costo is None if np.isinf(esperado[3, t]) else np.isclose(costo, esperado[3, t])
+        if camino is not None:
+            assert np.isclose(costo_camino(camino, indices, aristas), costo)
+
+
+def test_todos_los_pares_reutiliza_los_arboles_guardados(monkeypatch):
+    rng = np.random.default_rng(23)
+    nodos, aristas = red_aleatoria(rng)
+    motor = redes.MotorRutas(nodos, {nodo: k for k, nodo in enumerate(nodos)}, aristas)
+    for origen in (0, 5, 17):
+        motor.arbol(origen)
+    esperado = dijkstra_completo(len(nodos), aristas)
+
+    calculados = []
+    dijkstra = csgraph.dijkstra
+
+    def contar(matriz, **opciones):
+        calculados.extend(np.atleast_1d(opciones.get("indices", range(matriz.shape[0]))))
+        return dijkstra(matriz, **opciones)
+
+    monkeypatch.setattr(redes.csgraph, "dijkstra", contar)
+    distancias = motor.todos_los_pares()
+    assert np.allclose(distancias, esperado)
+    assert sorted(calculados) == [k for k in range(len(nodos)) if k not in (0, 5, 17)]
+
+
+def test_arbol_dinamico_coincide_con_dijkstra_tras_cada_cambio():
+    """ Altas (también de nodos nuevos), subidas, bajadas y bajas de aristas, del árbol y fuera de él """
+    rng = np.random.default_rng(24)
+    nodos, aristas = red_aleatoria(rng, n=30, densidad=0.12)
+    red = redes.Red(nodos, [(nodos[i], nodos[j], costo) for (i, j), costo in aristas.items()])
+    arboles = [red.dinamico("n0"), red.dinamico("n7")]
+    for paso in range(300):
+        opcion = rng.integers(0, 4)
+        if opcion == 0 or not red.aristas:
+            u, v = rng.integers(0, len(red.nodos) + 1, 2)
+            if u != v:
+                red.agregar(f"n{u}", f"n{v}", float(rng.integers(1, 20)))
+        else:
+            i, j = list(red.aristas)[rng.integers(0, len(red.aristas))]
+            if opcion == 1:
+                red.actualizar(red.nodos[i], red.nodos[j], red.aristas[(i, j)] + float(rng.integers(1, 10)))
+            elif opcion == 2:
+                red.actualizar(red.nodos[i], red.nodos[j], float(rng.integers(1, max(2, red.aristas[(i, j)]))))
+            else:
+                red.quitar(red.nodos[i], red.nodos[j])
+        esperado = dijkstra_completo(len(red.nodos), red.aristas)
+        for arbol in arboles:
+            for t in range(len(red.nodos)):
+                camino, costo = arbol.ruta(t)
+                if np.isinf(esperado[arbol.origen, t]):
+                    assert camino is None, paso
+                else:
+                    assert np.isclose(costo, esperado[arbol.origen, t]), paso
+                    assert camino[0] == arbol.origen and camino[-1] == t
+                    assert np.isclose(costo_camino([red.nodos[k] for k in camino], red.indices, red.aristas), costo)
+
+
+def test_ruta_dinamica_aplica_los_cambios_y_repara_el_arbol():
+    cliente = redes.app.test_client()
+    id_red = cliente.post("/redes", json={"nodos": ["A", "B", "C", "D"],
+                                          "conexiones": [["A", "B", 1], ["B", "C", 1], ["C", "D", 1], ["A", "D", 10]]}).get_json()["id"]
+    respuesta = cliente.post(f"/redes/{id_red}/dinamica", json={"inicio": "A", "fin": "D"}).get_json()
+    assert respuesta["ruta"] == ["A", "B", "C", "D"] and respuesta["costo"] == 3
+    respuesta = cliente.post(f"/redes/{id_red}/dinamica", json={"inicio": "A", "fin": "D", "quitar": [["B", "C"]]}).get_json()
+    assert respuesta["ruta"] == ["A", "D"] and respuesta["costo"] == 10 and respuesta["version"] == 1
+    respuesta = cliente.post(f"/redes/{id_red}/dinamica", json={"inicio": "A", "fin": "E", "agregar": [["D", "E", 2]]}).get_json()
+    assert respuesta["ruta"] == ["A", "D", "E"] and respuesta["costo"] == 12
+    assert cliente.post(f"/redes/{id_red}/dinamica", json={"inicio": "A", "fin": "Z"}).status_code == 404
+
+
+def test_almacen_de_redes_por_rutas():
+    cliente = redes.app.test_client()
+    creada = cliente.post("/redes", json={"nodos": ["A", "B", "C"], "conexiones": [["A", "B", 2], ["B", "C", 3]]})
+    assert creada.status_code == 201
+    id_red = creada.get_json()["id"]
+    assert cliente.get(f"/redes/{id_red}").get_json() == {"id": id_red, "nodos": 3, "aristas": 2, "version": 0}
+
+    cambios = {"agregar": [["C", "D", 1]], "actualizar": [["A", "B", 5]], "quitar": [["B", "C"]]}
+    assert cliente.patch(f"/redes/{id_red}/aristas", json=cambios).get_json()["version"] == 3
+    assert cliente.patch(f"/redes/{id_red}/aristas", json={"quitar": [["A", "C"]]}).status_code == 404
+
+    resuelta = cliente.post("/resolver", data={"id": id_red, "inicio": "A", "fin": "B", "formato": "json"})
+    assert resuelta.status_code == 200
+    assert "<strong>A -&gt; B</strong>" in resuelta.get_data(as_text=True)
+    assert "<strong>5.0</strong>" in resuelta.get_data(as_text=True)
+    distancias = cliente.get(f"/redes/{id_red}/distancias").get_json()
+    assert distancias["nodos"] == ["A", "B", "C", "D"]
+    assert distancias["distancias"][0] == [0.0, 5.0, None, None]
+
+    assert cliente.delete(f"/redes/{id_red}").status_code == 200
+    assert cliente.get(f"/redes/{id_red}").status_code == 404
+    assert cliente.get("/ver_red", query_string={"id": id_red}).status_code == 404
+
+
+def test_formulario_guarda_la_red_y_redirige_con_su_id():
+    cliente = redes.app.test_client()
+    respuesta = cliente.post("/", data={"nodos": "A,B", "inicio": "A", "fin": "B", "formato": "json", "costo_A_B": "4"})
+    assert respuesta.status_code == 302
+    id_red = respuesta.headers["Location"].split("id=")[1].split("&")[0]
+    assert redes.almacen_redes.obtener(id_red).aristas == {(0, 1): 4.0}
+
+
+def test_almacen_de_redes_desaloja_por_cantidad_y_por_tiempo(monkeypatch):
+    almacen = redes.AlmacenRedes(tamano=2, ttl=60)
+    ids = [almacen.crear(["A"], []) for _ in range(3)]
+    assert almacen.obtener(ids[0]) is None
+    assert almacen.obtener(ids[1]) is not None and almacen.obtener(ids[2]) is not None
+
+    ahora = redes.time.monotonic()
+    monkeypatch.setattr(redes.time, "monotonic", lambda: ahora + 61)
+    assert almacen.obtener(ids[2]) is None
+    assert almacen.estadisticas()["desalojadas"] == 3
+
+
+def test_layout_se_reutiliza_sin_importar_el_orden_de_insercion(monkeypatch):
+    monkeypatch.setattr(redes, "cache_layouts", redes.CacheLRU(4))
+    conexiones = [("A", "B", 1), ("B", "C", 2), ("C", "D", 3), ("D", "A", 4)]
+    G = redes.generar_grafo(["A", "B", "C", "D"], conexiones)
+    H = redes.generar_grafo(["D", "C", "B", "A"], [(v, u, costo) for u, v, costo in reversed(conexiones)])
+    pos = redes.calcular_layout(G)
+    assert redes.calcular_layout(H) is pos
+    assert redes.cache_layouts.estadisticas() == {"tamano": 4, "entradas": 1, "aciertos": 1, "fallos": 1}
+
+    # Otro peso es otro grafo
+    redes.calcular_layout(redes.generar_grafo(["A", "B", "C", "D"], conexiones[:-1] + [("D", "A", 5)]))
+    assert redes.cache_layouts.estadisticas()["entradas"] == 2
+
+
+def test_ver_red_y_resolver_comparten_el_layout(monkeypatch):
+    monkeypatch.setattr(redes, "cache_layouts", redes.CacheLRU(4))
+    cliente = redes.app.test_client()
+    id_red = cliente.post("/redes", json={"nodos": ["A", "B", "C"], "conexiones": [["A", "B", 2], ["B", "C", 3]]}).get_json()["id"]
+    cliente.get("/ver_red", query_string={"id": id_red, "formato": "json"})
+    cliente.post("/resolver", data={"id": id_red, "inicio": "A", "fin": "C", "formato": "json"})
+    estadisticas = cliente.get("/cache").get_json()
+    assert estadisticas["aciertos"] == 1 and estadisticas["fallos"] == 1
@@ -0,0 +1,50 @@
+""" Pruebas de los módulos compartidos por las calculadoras.
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from reportes import AlmacenResultados, tamano_en_bytes
+from trabajos import ColaTrabajos
+
+
+def test_almacen_descarta_los_mas_antiguos_al_pasar_del_limite_de_bytes():
+    almacen = AlmacenResultados(tamano=100, ttl=3600, bytes_maximos=3 * 8000)
+    ids = [almacen.guardar({"pasos": np.zeros(1000), "mensaje": "ok"}) for _ in range(5)]
+    assert [almacen.obtener(id_resultado) is not None for id_resultado in ids] == [False, False, True, True, True]
+    assert almacen.bytes == 3 * 8000
+
+    # El último se conserva aunque por sí solo pase del límite
+    grande = almacen.guardar({"pasos": np.zeros(10000)})
+    assert almacen.obtener(grande) is not None
+    assert almacen.bytes == 80000
+
+
+def test_tamano_en_bytes_cuenta_arreglos_y_matrices_dispersas():
+    matriz = sparse.csr_matrix(np.eye(4))
+    esperado = 16 * 8 + matriz.data.nbytes + matriz.indices.nbytes + matriz.indptr.nbytes
+    assert tamano_en_bytes({"a": np.zeros((2, 8)), "b": [matriz, 3.0, "texto"]}) == esperado
+
+
+def test_trabajos_cancelados_ocupan_la_cola_hasta_que_terminan():
+    """ time.sleep no reporta progreso: cancelado, sigue ocupando su proceso hasta terminar """
+    cola = ColaTrabajos(trabajadores=1, profundidad=2)
+    trabajos = [cola.enviar(time.sleep, (1.5,)) for _ in range(2)]
+    time.sleep(0.3)
+    for trabajo in trabajos:
+        assert cola.cancelar(trabajo.id).estado == "cancelado"
+    assert cola.estadisticas()["ocupados"] == 2
+    assert cola.enviar(time.sleep, (0,)) is None
+
+    limite = time.time() + 30
+    while cola.estadisticas()["ocupados"] and time.time() < limite:
+        time.sleep(0.1)
+    assert cola.enviar(time.sleep, (0,)) is not None
@@ -0,0 +1,207 @@
+""" Pruebas de los métodos Simplex de app.py comparados con HiGHS (scipy.optimize.linprog).
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linprog
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+import app as calculadora
+
+INFACTIBLE = "No existe solución factible"
+NO_ACOTADA = "Solución no acotada"
+
+
+def problemas(semilla, cantidad, b_negativo=True):
+    """ Problemas aleatorios pequeños en forma <= (las filas con b negativo son filas >=). Una parte
+    tiene A con ceros y b con ceros (degenerados); hay óptimos, infactibles y no acotados """
+    rng = np.random.default_rng(semilla)
+    for k in range(cantidad):
+        m, n = rng.integers(1, 7), rng.integers(1, 7)
+        A = rng.integers(-3, 6, (m, n)).astype(float)
+        if k % 3 == 0:
+            A[rng.random((m, n)) < 0.5] = 0
+        b = rng.integers(-4 if b_negativo else 0, 10, m).astype(float)
+        if k % 4 == 0:
+            b[rng.random(m) < 0.5] = 0
+        c = rng.integers(-5, 6, n).astype(float)
+        yield c, A, b, "max" if k % 2 else "min"
+
+
+def comparar(resultado, c, A, b, tipo):
+    """ Compara (valor, solucion, holguras, ...) de un método con la solución de HiGHS """
+    valor, solucion, holguras = resultado[:3]
+    referencia = linprog(-c if tipo == "max" else c, A_ub=A, b_ub=b, method="highs")
+    if referencia.status == 2:
+        # El presolve de HiGHS informa como infactibles algunos problemas no acotados
+        sin_presolve = linprog(-c if tipo == "max" else c, A_ub=A, b_ub=b, method="highs", options={"presolve": False})
+        referencia = sin_presolve if sin_presolve.status == 3 else referencia
+    if referencia.status == 2:
+        assert valor == INFACTIBLE
+    elif referencia.status == 3:
+        assert valor == NO_ACOTADA
+    else:
+        assert referencia.status == 0
+        assert not isinstance(valor, str), valor
+        assert abs(valor - round(-referencia.fun if tipo == "max" else referencia.fun, 2)) < 0.011
+        x = np.asarray(solucion)
+        assert np.all(x >= -1e-7) and np.all(A @ x <= b + 1e-6)
+        assert np.allclose(holguras, b - A @ x, atol=1e-6)
+    return referencia
+
+
+def test_revisado_coincide_con_linprog():
+    estados = set()
+    for c, A, b, tipo in problemas(1, 300):
+        estados.add(comparar(calculadora.simplex_revisado(c, A, b, tipo, "off"), c, A, b, tipo).status)
+    assert estados == {0, 2, 3}
+
+
+def test_revisado_degenerado_no_cicla():
+    """ Ejemplo de Beale: cicla con Dantzig sin anti-ciclado """
+    c = np.array([0.75, -150, 0.02, -6])
+    A = np.array([[0.25, -60, -0.04, 9], [0.5, -90, -0.02, 3], [0, 0, 1, 0]])
+    b = np.array([0.0, 0.0, 1.0])
+    for regla in calculadora.Pricing.REGLAS:
+        comparar(calculadora.simplex_revisado(c, A, b, "max", "off", calculadora.Pricing(regla)), c, A, b, "max")
+
+
+def test_revisado_refactoriza_y_quita_artificiales_en_problemas_grandes():
+    """ Más pivotes que REFACTORIZAR_CADA, A dispersa y filas >= con b = 0 (artificiales en nivel cero) """
+    rng = np.random.default_rng(5)
+    for _ in range(3):
+        A = sparse.random(80, 60, density=0.15, random_state=rng, data_rvs=lambda k: rng.integers(1, 9, k)).toarray()
+        b = rng.integers(20, 60, 80).astype(float)
+        A[:10], b[:10] = -A[:10], 0  # Filas >= 0: la fase 1 termina con artificiales en la base
+        A[10:20], b[10:20] = -A[10:20], -1.0
+        c = rng.integers(1, 20, 60).astype(float)
+        pricing = calculadora.Pricing()
+        comparar(calculadora.simplex_revisado(c, sparse.csr_matrix(A), b, "max", "off", pricing), c, A, b, "max")
+        assert pricing.iteraciones > calculadora.REFACTORIZAR_CADA
+
+
+def eliminar_referencia(tabla, fila_pivote, col_pivote):
+    """ Gauss-Jordan celda por celda """
+    tabla = tabla.copy()
+    tabla[fila_pivote] = tabla[fila_pivote] / tabla[fila_pivote, col_pivote]
+    for i in range(len(tabla)):
+        if i != fila_pivote:
+            tabla[i] = tabla[i] - tabla[i, col_pivote] * tabla[fila_pivote]
+    return tabla
+
+
+def test_eliminar_coincide_con_gauss_jordan():
+    rng = np.random.default_rng(2)
+    for _ in range(50):
+        tabla = rng.integers(-5, 6, (6, 9)).astype(float)
+        tabla[rng.random(tabla.shape) < 0.3] = 0
+        tabla[2, 4] = rng.choice([-3.0, 2.0, 7.0])
+        esperada = eliminar_referencia(tabla, 2, 4)
+        calculadora.eliminar(tabla, 2, 4)
+        assert np.allclose(tabla, esperada)
+
+
+def test_pivotear_razon_minima_empates_y_no_acotada():
+    # Razones 4, 2, 2 (las filas de Z no cuentan): con base, el empate se rompe por el menor índice básico
+    tabla = np.array([[1.0, 0, 4], [2, 1, 4], [1, 2, 2], [-5, 0, 0], [-7, 0, 0]])
+    assert calculadora.pivotear(tabla.copy(), 0, num_objetivos=2) == 1
+    assert calculadora.pivotear(tabla.copy(), 0, base=[5, 9, 3], num_objetivos=2) == 2
+    sin_positivos = np.array([[-1.0, 1, 4], [0, 1, 2], [-3, 0, 0]])
+    assert calculadora.pivotear(sin_positivos, 0) is None
+    assert np.array_equal(sin_positivos, [[-1.0, 1, 4], [0, 1, 2], [-3, 0, 0]])  # Sin cambios
+
+
+def test_dos_fases_coincide_con_linprog():
+    for c, A, b, tipo in problemas(3, 300):
+        comparar(calculadora.dos_fases(c, A, b, tipo, "off"), c, A, b, tipo)
+
+
+def test_dos_fases_con_igualdades_redundantes():
+    """ x1 + x2 = 4 escrita dos veces (cada igualdad como <= y >=): quedan artificiales en nivel cero
+    en filas redundantes que se eliminan antes de la fase 2 """
+    c = np.array([2.0, 3.0])
+    A = np.array([[1.0, 1], [-1, -1], [2, 2], [-2, -2], [1, 0]])
+    b = np.array([4.0, -4, 8, -8, 3])
+    for tipo in ("min", "max"):
+        comparar(calculadora.dos_fases(c, A, b, tipo, "off"), c, A, b, tipo)
+
+
+def test_dos_fases_continua_desde_la_base_de_la_fase_1():
+    """ min x1 + 2x2 con x1 + x2 >= 2: la fase 1 deja x1 en la base, que ya es óptima; la fase 2 no pivotea """
+    c, A, b = np.array([1.0, 2.0]), np.array([[-1.0, -1.0]]), np.array([-2.0])
+    pricing = calculadora.Pricing()
+    comparar(calculadora.dos_fases(c, A, b, "min", "off", pricing), c, A, b, "min")
+    assert pricing.iteraciones == 1
+
+
+def problemas_no_degenerados(semilla, cantidad):
+    """ max c x con A, b y c positivos (siempre hay óptimo) cuya solución de HiGHS no es degenerada:
+    los precios sombra y los rangos quedan determinados """
+    rng = np.random.default_rng(semilla)
+    while cantidad:
+        m, n = rng.integers(2, 6), rng.integers(2, 6)
+        A = rng.integers(1, 9, (m, n)).astype(float)
+        b = rng.integers(10, 40, m).astype(float)
+        c = rng.integers(1, 12, n).astype(float)
+        referencia = linprog(-c, A_ub=A, b_ub=b, method="highs")
+        x = referencia.x
+        if np.count_nonzero(x > 1e-7) + np.count_nonzero(b - A @ x > 1e-7) == m:
+            cantidad -= 1
+            yield c, A, b, referencia
+
+
+def valor_optimo(c, A, b):
+    return -linprog(-c, A_ub=A, b_ub=b, method="highs").fun
+
+
+def test_sensibilidad_coincide_con_los_marginales_de_highs():
+    for c, A, b, referencia in problemas_no_degenerados(4, 40):
+        *_, sensibilidad = calculadora.reoptimizar(c, A, b, "max")
+        assert np.allclose(sensibilidad["precios_sombra"], -referencia.ineqlin.marginals, atol=1e-7)
+
+        # Dentro del rango de b el objetivo cambia según el precio sombra
+        for i, (precio, rango) in enumerate(zip(sensibilidad["precios_sombra"], sensibilidad["rangos_b"])):
+            for delta in (0.5 * (rango["aumento"] if rango["aumento"] is not None else 1),
+                          -0.5 * (rango["disminucion"] if rango["disminucion"] is not None else 1)):
+                b_nuevo = b.copy()
+                b_nuevo[i] += delta
+                assert np.isclose(valor_optimo(c, A, b_nuevo), -referencia.fun + precio * delta, atol=1e-6)
+
+        # Dentro del rango de c la solución no cambia
+        for j, rango in enumerate(sensibilidad["rangos_c"]):
+            for delta in (0.5 * (rango["aumento"] if rango["aumento"] is not None else 1),
+                          -0.5 * (rango["disminucion"] if rango["disminucion"] is not None else 1)):
+                c_nuevo = c.copy()
+                c_nuevo[j] += delta
+                assert np.isclose(valor_optimo(c_nuevo, A, b), c_nuevo @ referencia.x, atol=1e-6)
+
+
+def test_reoptimizar_desde_la_base_anterior():
+    rng = np.random.default_rng(6)
+    for c, A, b, _ in problemas_no_degenerados(6, 30):
+        _, _, _, _, base, _ = calculadora.reoptimizar(c, A, b, "max")
+        b_nuevo = b + rng.integers(-8, 9, len(b))  # Simplex Dual (puede volverse infactible)
+        comparar(calculadora.reoptimizar(c, A, b_nuevo, "max", base), c, A, b_nuevo, "max")
+        c_nuevo = c + rng.integers(-5, 6, len(c))  # Simplex primal (puede volverse no acotado)
+        comparar(calculadora.reoptimizar(c_nuevo, A, b, "max", base), c_nuevo, A, b, "max")
+
+
+def test_gran_m_coincide_con_linprog():
+    for c, A, b, tipo in problemas(9, 300):
+        comparar(calculadora.gran_m(c, A, b, tipo, "off"), c, A, b, tipo)
+
+
+def test_gran_m_lexicografica_con_costos_enormes():
+    """ min 1e8 x1 + x2 con x1 + x2 >= 1, x2 <= 0.5: con un M numérico menor que 1e8 la artificial
+    saldría más barata que x1 y el problema parecería infactible """
+    c = np.array([1e8, 1.0])
+    A = np.array([[-1.0, -1.0], [0.0, 1.0]])
+    b = np.array([-1.0, 0.5])
+    comparar(calculadora.gran_m(c, A, b, "min", "off"), c, A, b, "min")
+    comparar(calculadora.gran_m(-c, A, b, "max", "off"), -c, A, b, "max")